@@ -0,0 +1,399 @@
+"""
+Offline load test for the LLM processor.
+
+Starts the external-service stubs in-process, launches the service against
+them with a generated config, drives the query and crawl endpoints at a target
+request rate (open loop, so a slow server cannot throttle the arrival rate) and
+writes throughput, latency percentiles and error rates to JSON.
+
+Usage:
+    python -m benchmarks.load_test --rps 20 --duration 60
+    python -m benchmarks.load_test --scenario benchmarks/scenarios/baseline.json \\
+        --baseline benchmarks/results/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import yaml
+
+from .stubs import create_stub_app, load_behaviors
+
+PROCESSOR_DIR = Path(__file__).parent.parent
+REPO_ROOT = PROCESSOR_DIR.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_QUERIES = [
+    "How does Jupiter route swaps across Solana DEXs?",
+    "What are the risks of providing liquidity on Raydium CLMM pools?",
+    "Compare Marinade mSOL and JitoSOL staking yields",
+    "Explain how Drift perpetuals handle funding rates",
+    "What collateral does Solend accept for USDC loans?",
+    "Summarize my recent wallet activity",
+]
+_BASE58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _wallet(rng: random.Random) -> str:
+    return "".join(rng.choice(_BASE58) for _ in range(44))
+
+
+def _process_prompt_payload(rng: random.Random) -> Dict[str, Any]:
+    return {"prompt": rng.choice(_QUERIES), "userWallet": _wallet(rng), "context": {"source": "load-test"}}
+
+
+def _chat_payload(rng: random.Random) -> Dict[str, Any]:
+    return {"query": rng.choice(_QUERIES), "user_wallet": _wallet(rng), "include_portfolio_context": True}
+
+
+def _crawl_payload(rng: random.Random) -> Dict[str, Any]:
+    return {"urls": [f"https://docs.example.org/load-test/{rng.randint(0, 10 ** 6)}"]}
+
+
+ENDPOINTS: Dict[str, tuple[str, Callable[[random.Random], Dict[str, Any]]]] = {
+    "process_prompt": ("/process_prompt", _process_prompt_payload),
+    "chat_langgraph": ("/chat/langgraph", _chat_payload),
+    "admin_crawl": ("/admin/crawl", _crawl_payload),
+}
+
+DEFAULT_SCENARIO: Dict[str, Any] = {
+    "rps": 10.0,
+    "duration_s": 30.0,
+    "arrival": "constant",  # constant or poisson
+    "mix": {"process_prompt": 0.5, "chat_langgraph": 0.45, "admin_crawl": 0.05},
+    "provider": "CEREBRAS",
+    "timeout_s": 60.0,
+    "max_connections": 512,
+    "intent_mix": {"retrieval": 0.6, "chat": 0.35, "crawl_web": 0.05},
+    "stubs": {},
+    "seed": 0,
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int  # 0 for transport errors and timeouts
+    latency_s: float  # from the scheduled send time
+    service_s: float  # from the actual send time
+    error: str = ""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_stub_config(base: Dict[str, Any], stub_url: str, provider: str, workdir: Path) -> Dict[str, Any]:
+    """Point every external dependency in ``base`` at the stub server."""
+    cfg = copy.deepcopy(base)
+    processor = cfg["llm_processor"]
+    processor["provider"] = provider
+    processor["cerebras"].update({"api_key": "stub", "endpoint_url": f"{stub_url}/openai/v1"})
+    processor["gemini"].update({"api_key": "stub", "endpoint_url": f"{stub_url}/gemini/v1"})
+    processor["ollama_embedding"]["base_url"] = f"{stub_url}/ollama"
+    rag = processor["rag"]
+    rag["enabled"] = True
+    rag["vector_db"].update({"api_key": "stub", "host": f"{stub_url}/pinecone"})
+    rag.setdefault("lexical", {})["index_path"] = str(workdir / "bm25_index.json")
+    rag.setdefault("rerank", {})["enabled"] = False
+    processor["firecrawl"].update({"api_key": "fc-stub", "api_url": f"{stub_url}/firecrawl", "mode": "scrape"})
+    cfg["api_gateway"]["indexer"] = {"type": "HELIUS", "api_key": "stub", "base_url": f"{stub_url}/helius"}
+    langsmith = cfg["global"].setdefault("langsmith", {})
+    langsmith["enabled"] = False
+    langsmith.setdefault("exporter", {}).setdefault("file_sink", {})["enabled"] = False
+    return cfg
+
+
+class StubServer:
+    """Runs the stub app with uvicorn on its own thread and event loop."""
+
+    def __init__(self, app: Any, port: int) -> None:
+        import uvicorn
+
+        self.url = f"http://127.0.0.1:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, name="load-test-stubs", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub server did not start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def launch_service(config_path: Path, port: int) -> subprocess.Popen:
+    env = {**os.environ, "SOLAI_CONFIG_PATH": str(config_path)}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=PROCESSOR_DIR,
+        env=env,
+    )
+
+
+async def wait_healthy(base_url: str, timeout_s: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient(timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"Service at {base_url} did not become healthy within {timeout_s}s")
+
+
+async def run_load(base_url: str, scenario: Dict[str, Any]) -> tuple[List[Sample], float]:
+    """
+    Fire requests at the scenario's arrival rate until its duration elapses.
+
+    Returns:
+        Samples for every request sent, and the wall-clock seconds from the first
+        send to the last completion
+    """
+    rng = random.Random(scenario["seed"])
+    names = list(scenario["mix"])
+    weights = [scenario["mix"][name] for name in names]
+    total = int(scenario["rps"] * scenario["duration_s"])
+    limits = httpx.Limits(max_connections=scenario["max_connections"], max_keepalive_connections=64)
+    samples: List[Sample] = []
+
+    async def send(client: httpx.AsyncClient, name: str, scheduled: float) -> None:
+        path, payload_fn = ENDPOINTS[name]
+        sent = time.perf_counter()
+        try:
+            response = await client.post(f"{base_url}{path}", json=payload_fn(rng))
+            status = response.status_code
+            error = "" if status < 400 else f"HTTP {status}: {response.text[:200]}"
+        except httpx.HTTPError as exc:
+            status, error = 0, f"{type(exc).__name__}: {exc}"
+        done = time.perf_counter()
+        samples.append(Sample(name, status, done - scheduled, done - sent, error))
+
+    async with httpx.AsyncClient(timeout=scenario["timeout_s"], limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        scheduled = start
+        for _ in range(total):
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights=weights)[0]
+            tasks.append(asyncio.create_task(send(client, name, scheduled)))
+            if scenario["arrival"] == "poisson":
+                scheduled += rng.expovariate(scenario["rps"])
+            else:
+                scheduled += 1.0 / scenario["rps"]
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples: List[Sample], elapsed_s: float) -> Dict[str, Any]:
+    ok = [sample for sample in samples if 0 < sample.status < 400]
+    latencies = sorted(sample.latency_s * 1000 for sample in ok)
+    service = sorted(sample.service_s * 1000 for sample in ok)
+    statuses = Counter(str(sample.status) for sample in samples)
+    errors = Counter(sample.error.split(":", 1)[0] for sample in samples if sample.error)
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(ok) / elapsed_s, 3) if elapsed_s else 0.0,
+        "status_counts": dict(statuses),
+        "top_errors": dict(errors.most_common(5)),
+        "latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "max": latencies[-1] if latencies else None,
+        },
+        "service_time_ms": {"p50": _percentile(service, 50), "p99": _percentile(service, 99)},
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression_pct: float) -> List[str]:
+    """Lines describing p95/error-rate regressions beyond the allowed percentage."""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        before, after = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        if before and after and (after - before) / before * 100 > max_regression_pct:
+            regressions.append(f"{name}: p95 {before:.1f}ms -> {after:.1f}ms")
+        if current["error_rate"] > previous["error_rate"] + max_regression_pct / 100:
+            regressions.append(f"{name}: error rate {previous['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    return regressions
+
+
+async def run(
+    scenario: Dict[str, Any],
+    base_config: Dict[str, Any],
+    target: Optional[str] = None,
+    stub_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run one load test.
+
+    Without ``target`` the stubs and the service are started here; with it, the
+    service (and the stubs at ``stub_url``, if given) are assumed to be running.
+    """
+    stubs: Optional[StubServer] = None
+    service: Optional[subprocess.Popen] = None
+    workdir = Path(tempfile.mkdtemp(prefix="solai-load-"))
+    try:
+        if target is None:
+            stubs = StubServer(
+                create_stub_app(
+                    load_behaviors(scenario["stubs"]), intent_mix=scenario["intent_mix"], seed=scenario["seed"]
+                ),
+                _free_port(),
+            )
+            stubs.start()
+            stub_url = stubs.url
+            config_path = workdir / "config.yml"
+            stub_config = build_stub_config(base_config, stub_url, scenario["provider"], workdir)
+            config_path.write_text(yaml.safe_dump(stub_config, sort_keys=False), encoding="utf-8")
+            port = _free_port()
+            service = launch_service(config_path, port)
+            target = f"http://127.0.0.1:{port}"
+        await wait_healthy(target)
+
+        samples, elapsed = await run_load(target, scenario)
+        stub_stats: Dict[str, Any] = {}
+        if stub_url:
+            async with httpx.AsyncClient() as client:
+                stub_stats = (await client.get(f"{stub_url}/stats")).json()
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait(timeout=10)
+        if stubs is not None:
+            stubs.stop()
+
+    by_endpoint: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "target": target,
+            "elapsed_s": round(elapsed, 3),
+            "scenario": {**scenario, "stubs": {k: asdict(v) for k, v in load_behaviors(scenario["stubs"]).items()}},
+        },
+        "overall": summarize(samples, elapsed),
+        "endpoints": {name: summarize(group, elapsed) for name, group in sorted(by_endpoint.items())},
+        "stub_calls": stub_stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the LLM processor against local stubs")
+    parser.add_argument("--scenario", help="JSON scenario file (keys as in DEFAULT_SCENARIO)")
+    parser.add_argument("--rps", type=float, help="Target requests per second")
+    parser.add_argument("--duration", type=float, help="Seconds of load")
+    parser.add_argument("--arrival", choices=("constant", "poisson"))
+    parser.add_argument("--provider", choices=("CEREBRAS", "GEMINI"))
+    parser.add_argument("--target", help="Drive an already running service instead of launching one")
+    parser.add_argument("--stub-url", help="Standalone stubs used by --target, for stub call counts")
+    parser.add_argument("--config", help="Base config (default: SOLAI_CONFIG_PATH, config.yml, config.example.yml)")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    scenario = copy.deepcopy(DEFAULT_SCENARIO)
+    if args.scenario:
+        with open(args.scenario, "r", encoding="utf-8") as fh:
+            scenario.update(json.load(fh))
+    for key, value in (("rps", args.rps), ("duration_s", args.duration), ("arrival", args.arrival),
+                       ("provider", args.provider)):
+        if value is not None:
+            scenario[key] = value
+    unknown = set(scenario["mix"]) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints in mix: {sorted(unknown)}")
+
+    candidates = [args.config, os.environ.get("SOLAI_CONFIG_PATH"), REPO_ROOT / "config.yml",
+                  REPO_ROOT / "config.example.yml"]
+    config_path = next(Path(path) for path in candidates if path and Path(path).exists())
+    with config_path.open("r", encoding="utf-8") as fh:
+        base_config = yaml.safe_load(fh)
+
+    report = asyncio.run(run(scenario, base_config, args.target, args.stub_url))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(f"Report written to {output}")
+    for name, stats in report["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(
+            f"  {name:<16} {stats['throughput_rps']:>7.2f} rps  "
+            f"p50={latency['p50'] or 0:.0f}ms p95={latency['p95'] or 0:.0f}ms p99={latency['p99'] or 0:.0f}ms  "
+            f"errors={stats['error_rate']:.2%}"
+        )
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
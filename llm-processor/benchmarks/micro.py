@@ -0,0 +1,359 @@
+"""
+Microbenchmarks for the CPU-bound parts of ingestion and request handling.
+
+Each benchmark runs against synthetic corpora of 1k, 100k and 1M chunks and
+records wall time (min/median over repeats) and peak traced memory. Results
+are stored per commit under benchmarks/results/micro/ so they can be compared
+across commits.
+
+Usage:
+    python -m benchmarks.micro                         # all benchmarks, all sizes
+    python -m benchmarks.micro --sizes 1000,100000 --only upsert_payload
+    python -m benchmarks.micro --compare HEAD~1        # diff against a stored commit
+    python -m benchmarks.micro --history prepare_for_indexing
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+PROCESSOR_DIR = Path(__file__).parent.parent
+REPO_ROOT = PROCESSOR_DIR.parent
+RESULTS_DIR = Path(__file__).parent / "results" / "micro"
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+# The services read config at construction; fall back to the example config offline
+if "SOLAI_CONFIG_PATH" not in os.environ and not (REPO_ROOT / "config.yml").exists():
+    os.environ["SOLAI_CONFIG_PATH"] = str(REPO_ROOT / "config.example.yml")
+
+_WORDS = (
+    "solana jupiter raydium orca marinade drift kamino solend phoenix swap liquidity staking validator "
+    "lending perpetuals oracle slippage route pool fees yield vault collateral token program account "
+    "transaction signature epoch leader stake reward market order"
+).split()
+_BOILERPLATE = [
+    "Copyright 2025 Example Protocol. All rights reserved. Terms of service and privacy policy apply.",
+    "Join our Discord community and follow us on Twitter for the latest protocol announcements.",
+    "This documentation is provided for informational purposes only and is not financial advice.",
+]
+
+
+def synthetic_chunks(count: int, seed: int = 0, boilerplate_ratio: float = 0.15) -> List[str]:
+    """Paragraph-sized chunks with a share of repeated boilerplate (exercises dedup)."""
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        if rng.random() < boilerplate_ratio:
+            chunks.append(rng.choice(_BOILERPLATE))
+        else:
+            chunks.append(" ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 90))).capitalize() + ".")
+    return chunks
+
+
+def synthetic_documents(chunk_count: int, chunks_per_doc: int = 20, seed: int = 0) -> List[Dict[str, Any]]:
+    """Crawled pages (as returned by FirecrawlWorker) totalling ``chunk_count`` paragraphs."""
+    chunks = synthetic_chunks(chunk_count, seed)
+    return [
+        {
+            "url": f"https://docs.example.org/page-{start // chunks_per_doc}",
+            "content": "\n\n".join(chunks[start:start + chunks_per_doc]),
+            "metadata": {"title": f"Page {start // chunks_per_doc}", "source": "benchmark"},
+        }
+        for start in range(0, chunk_count, chunks_per_doc)
+    ]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[int], Any]  # size -> state passed to run (not timed)
+    run: Callable[[Any], Any]
+    description: str
+
+
+def _setup_prepare(dedup: bool) -> Callable[[int], Any]:
+    def setup(size: int) -> Any:
+        from src.data_ingestion.firecrawl_worker import FirecrawlWorker
+
+        worker = FirecrawlWorker()
+        worker.dedup_enabled = dedup
+        return worker, synthetic_documents(size)
+    return setup
+
+
+def _run_prepare(state: Any) -> Any:
+    worker, documents = state
+    return worker.prepare_for_indexing(documents)
+
+
+def _setup_upsert_payload(size: int) -> Any:
+    chunks = synthetic_chunks(size)
+    documents = [
+        {"text": text, "metadata": {"source_url": f"https://docs.example.org/page-{idx // 20}", "chunk_index": idx}}
+        for idx, text in enumerate(chunks)
+    ]
+    # One shared vector: the payload build references embeddings without copying them
+    embedding = [0.0] * 1024
+    return documents, [embedding] * size
+
+
+def _run_upsert_payload(state: Any) -> Any:
+    from src.rag.vector_store import build_upsert_vectors
+
+    return build_upsert_vectors(*state)
+
+
+def _setup_chat_shaping(size: int) -> Any:
+    rng = random.Random(0)
+    chunks = synthetic_chunks(min(size, 1000))
+    events = []
+    # One stream event per 10 chunks, cycling through the node types
+    for idx in range(max(size // 10, 1)):
+        node = ("intent_detection", "retrieval", "chat", "crawl_web", "final_synthesis")[idx % 5]
+        events.append({node: {
+            "intent": "retrieval",
+            "intent_confidence": rng.random(),
+            "intent_reasoning": chunks[idx % len(chunks)],
+            "chat_response": chunks[(idx + 1) % len(chunks)] * 3,
+            "rag_sources": [f"https://docs.example.org/{n}" for n in range(10)],
+            "confidence": rng.random(),
+            "crawl_url": "https://docs.example.org/crawl",
+            "metadata": {"crawl_success": True, "intent": "retrieval"},
+            "final_response": chunks[idx % len(chunks)],
+            "sources": [f"https://docs.example.org/{n}" for n in range(10)],
+        }})
+    return events
+
+
+def _run_chat_shaping(events: Any) -> Any:
+    from src.langgraph_workflow.steps import describe_step
+
+    steps = []
+    final_result = None
+    for event in events:
+        for node_name, node_state in event.items():
+            steps.append(describe_step(node_name, node_state))
+            final_result = node_state
+    return steps, final_result
+
+
+def _setup_mock_search(size: int) -> Any:
+    from src.services.mock_services import MockRAGService
+
+    original = MockRAGService.DOCUMENTS
+    rng = random.Random(0)
+    MockRAGService.DOCUMENTS = [
+        {
+            "text": text,
+            "source": f"https://docs.example.org/{idx}",
+            "title": " ".join(rng.choice(_WORDS) for _ in range(3)).title(),
+            "relevance": round(rng.uniform(0.5, 0.9), 2),
+        }
+        for idx, text in enumerate(synthetic_chunks(size))
+    ]
+    MockRAGService._index = None
+    MockRAGService._get_index()  # build the BM25 index outside the timed region
+    return MockRAGService, original
+
+
+def _run_mock_search(state: Any) -> Any:
+    service, _ = state
+    return service.search_documents("jupiter swap slippage liquidity", top_k=5)
+
+
+def _teardown_mock_search(state: Any) -> None:
+    service, original = state
+    service.DOCUMENTS = original
+    service._index = None
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    bench.name: bench
+    for bench in (
+        Benchmark("prepare_for_indexing", _setup_prepare(True), _run_prepare,
+                  "FirecrawlWorker.prepare_for_indexing with dedup"),
+        Benchmark("prepare_for_indexing_nodedup", _setup_prepare(False), _run_prepare,
+                  "FirecrawlWorker.prepare_for_indexing, chunking only"),
+        Benchmark("upsert_payload", _setup_upsert_payload, _run_upsert_payload,
+                  "Pinecone upsert payload build (build_upsert_vectors)"),
+        Benchmark("chat_langgraph_shaping", _setup_chat_shaping, _run_chat_shaping,
+                  "/chat/langgraph workflow step shaping over size/10 events"),
+        Benchmark("mock_rag_search", _setup_mock_search, _run_mock_search,
+                  "MockRAGService.search_documents scoring over the corpus"),
+    )
+}
+_TEARDOWN: Dict[str, Callable[[Any], None]] = {"mock_rag_search": _teardown_mock_search}
+
+
+def measure(bench: Benchmark, size: int, repeat: int) -> Dict[str, Any]:
+    """Time ``repeat`` runs, then one traced run for peak memory."""
+    state = bench.setup(size)
+    try:
+        times = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            bench.run(state)
+            times.append(time.perf_counter() - start)
+        # Separate run: tracemalloc slows allocation-heavy code too much to time under it
+        gc.collect()
+        tracemalloc.start()
+        bench.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        teardown = _TEARDOWN.get(bench.name)
+        if teardown:
+            teardown(state)
+    return {
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "per_item_us": min(times) / size * 1e6,
+        "peak_mem_mb": round(peak / 2 ** 20, 3),
+    }
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _result_path(ref: str) -> Path:
+    candidate = Path(ref)
+    if candidate.exists():
+        return candidate
+    commit = _git("rev-parse", "--short", ref) or ref
+    return RESULTS_DIR / f"{commit}.json"
+
+
+def _load_results() -> List[Dict[str, Any]]:
+    runs = []
+    for path in RESULTS_DIR.glob("*.json"):
+        with path.open("r", encoding="utf-8") as fh:
+            runs.append(json.load(fh))
+    return sorted(runs, key=lambda run: run["meta"]["timestamp"])
+
+
+def print_history(name: str) -> None:
+    runs = [run for run in _load_results() if name in run["results"]]
+    if not runs:
+        print(f"No stored results for {name}")
+        return
+    sizes = sorted({size for run in runs for size in run["results"][name]}, key=int)
+    print(f"{'commit':<12}" + "".join(f"{size:>16}" for size in sizes))
+    for run in runs:
+        cells = []
+        for size in sizes:
+            result = run["results"][name].get(size)
+            cells.append(f"{result['min_s'] * 1000:>11.1f} ms  " if result else f"{'-':>16}")
+        suffix = "*" if run["meta"].get("dirty") else ""
+        print(f"{run['meta']['commit'] + suffix:<12}" + "".join(cells))
+
+
+def print_comparison(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print time/memory ratios against ``baseline``; return the number of regressions."""
+    regressions = 0
+    print(f"Comparing against {baseline['meta']['commit']}")
+    for name, sizes in current["results"].items():
+        for size, result in sizes.items():
+            previous = baseline["results"].get(name, {}).get(size)
+            if not previous:
+                continue
+            time_ratio = result["min_s"] / previous["min_s"] if previous["min_s"] else 1.0
+            mem_ratio = result["peak_mem_mb"] / previous["peak_mem_mb"] if previous["peak_mem_mb"] else 1.0
+            flag = ""
+            if time_ratio > 1 + threshold or mem_ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"  {name:<30} {size:>9}  time x{time_ratio:.2f}  mem x{mem_ratio:.2f}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU microbenchmarks for ingestion and response shaping")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes in chunks")
+    parser.add_argument("--only", help="Comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (1 for 1M-chunk corpora)")
+    parser.add_argument("--compare", help="Commit or result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown counted as a regression")
+    parser.add_argument("--history", metavar="BENCHMARK", help="Print stored results for one benchmark and exit")
+    parser.add_argument("--no-save", action="store_true", help="Do not store results for this commit")
+    args = parser.parse_args()
+
+    if args.history:
+        print_history(args.history)
+        return
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks {sorted(unknown)}, choose from {sorted(BENCHMARKS)}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    for name in names:
+        bench = BENCHMARKS[name]
+        report["results"][name] = {}
+        for size in sizes:
+            repeat = args.repeat if size < 1_000_000 else 1
+            result = measure(bench, size, repeat)
+            report["results"][name][str(size)] = result
+            print(
+                f"{name:<30} {size:>9}  min {result['min_s'] * 1000:>10.2f} ms  "
+                f"({result['per_item_us']:.2f} us/item)  peak {result['peak_mem_mb']:>9.1f} MB"
+            )
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{report['meta']['commit']}.json"
+        if output.exists():
+            # Keep results of benchmarks not re-run this time
+            with output.open("r", encoding="utf-8") as fh:
+                previous = json.load(fh)
+            for name, sizes_run in report["results"].items():
+                previous["results"].setdefault(name, {}).update(sizes_run)
+            report = {"meta": report["meta"], "results": previous["results"]}
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {output}")
+
+    if args.compare:
+        path = _result_path(args.compare)
+        if not path.exists():
+            print(f"No stored results at {path}")
+            sys.exit(2)
+        with path.open("r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if print_comparison(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Retrieval quality evaluation.
+
+Runs a labelled query set (seeded from SAMPLE_DOCUMENTS in
+scripts/seed_pinecone.py) against a grid of retrieval configurations and
+reports recall@k, MRR and nDCG@k with per-query latency and cost, then picks
+the fastest configuration that meets a quality bar.
+
+Backends:
+    engine  The live RagEngine (Pinecone + Ollama + BM25 as configured)
+    local   In-memory index over SAMPLE_DOCUMENTS; supports re-chunking and
+            swapping the embedding model without touching Pinecone
+
+Usage:
+    python -m benchmarks.retrieval_eval --backend local --modes lexical,hybrid --top-k 3,5
+    python -m benchmarks.retrieval_eval --backend engine --modes vector,hybrid --mmr on,off --min-recall 0.8
+    python -m benchmarks.retrieval_eval --backend local --chunk-sizes 0,40 --embedding-models bge-m3,nomic-embed-text
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+PROCESSOR_DIR = Path(__file__).parent.parent
+REPO_ROOT = PROCESSOR_DIR.parent
+LABELS_PATH = Path(__file__).parent / "data" / "retrieval_labels.json"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+if "SOLAI_CONFIG_PATH" not in os.environ and not (REPO_ROOT / "config.yml").exists():
+    os.environ["SOLAI_CONFIG_PATH"] = str(REPO_ROOT / "config.example.yml")
+
+from scripts.seed_pinecone import sample_document_records  # noqa: E402
+from src.context.budget import count_tokens  # noqa: E402
+from src.rag.lexical_index import BM25Index, reciprocal_rank_fusion  # noqa: E402
+from src.rag.selection import RetrievalOptions, select_documents  # noqa: E402
+
+
+@dataclass
+class EvalConfig:
+    backend: str
+    mode: str
+    top_k: int
+    mmr: bool
+    rerank: bool
+    chunk_size: int = 0  # words per chunk for the local backend; 0 keeps whole documents
+    embedding_model: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        parts = [self.backend, self.mode, f"k={self.top_k}", "mmr" if self.mmr else "no-mmr"]
+        if self.rerank:
+            parts.append("rerank")
+        if self.chunk_size:
+            parts.append(f"chunk={self.chunk_size}")
+        if self.embedding_model:
+            parts.append(self.embedding_model)
+        return " ".join(parts)
+
+
+@dataclass
+class QueryCost:
+    embed_tokens: int = 0
+    vector_queries: int = 0
+    rerank_pairs: int = 0
+
+
+@dataclass
+class Prices:
+    embed_per_1k_tokens: float = 0.0
+    per_vector_query: float = 0.0
+    per_1k_rerank_pairs: float = 0.0
+
+    def usd(self, cost: QueryCost) -> float:
+        return (
+            cost.embed_tokens / 1000 * self.embed_per_1k_tokens
+            + cost.vector_queries * self.per_vector_query
+            + cost.rerank_pairs / 1000 * self.per_1k_rerank_pairs
+        )
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def parent_id(doc_id: str) -> str:
+    """Chunk IDs look like '<doc-id>#chunk-<n>'; labels are per document."""
+    return doc_id.split("#", 1)[0]
+
+
+def ranked_documents(results: Sequence[Dict[str, Any]]) -> List[str]:
+    """Document IDs in rank order, keeping the first chunk of each document."""
+    seen: List[str] = []
+    for doc in results:
+        doc_id = parent_id(str(doc.get("id", "")))
+        if doc_id and doc_id not in seen:
+            seen.append(doc_id)
+    return seen
+
+
+def recall_at_k(ranked: Sequence[str], relevant: Dict[str, int], k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & set(relevant)) / len(relevant)
+
+
+def reciprocal_rank(ranked: Sequence[str], relevant: Dict[str, int]) -> float:
+    for rank, doc_id in enumerate(ranked, start=1):
+        if doc_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: Sequence[str], relevant: Dict[str, int], k: int) -> float:
+    """nDCG with graded gains (2^grade - 1)."""
+    dcg = sum((2 ** relevant.get(doc_id, 0) - 1) / math.log2(rank + 2) for rank, doc_id in enumerate(ranked[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / math.log2(rank + 2) for rank, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)]
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+def _chunk(records: List[Dict[str, Any]], chunk_size: int) -> List[Dict[str, Any]]:
+    if not chunk_size:
+        return records
+    chunks = []
+    for record in records:
+        words = record["text"].split()
+        for idx, start in enumerate(range(0, len(words), chunk_size)):
+            chunks.append({
+                "id": f"{record['id']}#chunk-{idx}",
+                "text": " ".join(words[start:start + chunk_size]),
+                "metadata": record["metadata"],
+            })
+    return chunks
+
+
+class LocalBackend:
+    """In-memory vector + BM25 index over the sample documents."""
+
+    def __init__(self, config: EvalConfig) -> None:
+        self._config = config
+        self._chunks = _chunk(sample_document_records(), config.chunk_size)
+        self._docs = [{"id": chunk["id"], "text": chunk["text"], **chunk["metadata"]} for chunk in self._chunks]
+        self._lexical = BM25Index()
+        self._lexical.add_documents(self._chunks)
+        self._embedder = None
+        self._matrix = None
+        self.index_cost = QueryCost()
+        self._reranker = None
+
+    async def prepare(self) -> None:
+        if self._config.mode != "lexical":
+            import numpy as np
+
+            from src.rag.embeddings import OllamaEmbeddings
+
+            self._embedder = OllamaEmbeddings()
+            if self._config.embedding_model:
+                self._embedder._model = self._config.embedding_model
+            vectors = await self._embedder.embed_documents([chunk["text"] for chunk in self._chunks])
+            matrix = np.asarray(vectors, dtype=np.float32)
+            self._matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self.index_cost.embed_tokens = sum(count_tokens(chunk["text"]) for chunk in self._chunks)
+        if self._config.rerank:
+            from src.rag.reranker import CrossEncoderReranker
+
+            self._reranker = CrossEncoderReranker()
+            self._reranker.enabled = True
+
+    async def search(self, query: str, options: RetrievalOptions, cost: QueryCost) -> List[Dict[str, Any]]:
+        if self._reranker is not None:
+            options = options.override(top_k=max(options.top_k, self._reranker.fetch_k))
+        lexical = []
+        if self._config.mode != "vector":
+            results = self._lexical.search(query, options.fetch_k)
+            best = results[0]["bm25_score"] if results else 1.0
+            lexical = [{**doc, "score": doc["bm25_score"] / best} for doc in results]
+        if self._config.mode == "lexical":
+            results = lexical[:options.top_k]
+        else:
+            import numpy as np
+
+            embedding = await self._embedder.embed_query(query)
+            cost.embed_tokens += count_tokens(query)
+            cost.vector_queries += 1
+            query_vec = np.asarray(embedding, dtype=np.float32)
+            query_vec /= max(float(np.linalg.norm(query_vec)), 1e-12)
+            scores = self._matrix @ query_vec
+            top = np.argsort(-scores)[:options.fetch_k]
+            candidates = [{**self._docs[idx], "score": float(scores[idx])} for idx in top]
+            results = select_documents(query_vec, candidates, options, [self._matrix[idx] for idx in top])
+            if lexical:
+                results = reciprocal_rank_fusion(
+                    [results, lexical[:options.top_k]],
+                    key=lambda doc: doc["id"],
+                    limit=options.top_k,
+                )
+        if self._reranker is not None:
+            cost.rerank_pairs += len(results)
+            results = await self._reranker.rerank(query, results, top_n=self._config.top_k)
+        return results
+
+
+class EngineBackend:
+    """The service's RagEngine against the configured Pinecone index."""
+
+    def __init__(self, config: EvalConfig) -> None:
+        from src.rag.rag_logic import RagEngine
+
+        self._config = config
+        self._engine = RagEngine()
+        if config.embedding_model and self._engine._embedding_client is not None:
+            # Only meaningful if the index was seeded with the same model
+            self._engine._embedding_client._model = config.embedding_model
+        self.index_cost = QueryCost()
+
+    async def prepare(self) -> None:
+        return None
+
+    async def search(self, query: str, options: RetrievalOptions, cost: QueryCost) -> List[Dict[str, Any]]:
+        if self._config.mode != "lexical":
+            cost.embed_tokens += count_tokens(query)
+            cost.vector_queries += 1
+        if options.rerank:
+            cost.rerank_pairs += self._engine._reranker.fetch_k
+        return await self._engine.search(query, options, mode=self._config.mode)
+
+
+BACKENDS = {"local": LocalBackend, "engine": EngineBackend}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ConfigResult:
+    config: Dict[str, Any]
+    name: str
+    recall_at_k: float
+    mrr: float
+    ndcg_at_k: float
+    latency_ms: Dict[str, float]
+    cost: Dict[str, Any]
+    queries: List[Dict[str, Any]] = field(default_factory=list)
+
+
+async def evaluate(
+    config: EvalConfig,
+    labels: List[Dict[str, Any]],
+    prices: Prices,
+    repeat: int = 1,
+) -> ConfigResult:
+    backend = BACKENDS[config.backend](config)
+    await backend.prepare()
+    options = RetrievalOptions.from_config().override(
+        top_k=config.top_k, mmr=config.mmr, rerank=config.rerank
+    )
+
+    per_query = []
+    total_cost = QueryCost()
+    for item in labels:
+        latencies = []
+        for _ in range(repeat):
+            cost = QueryCost()
+            start = time.perf_counter()
+            results = await backend.search(item["query"], options, cost)
+            latencies.append((time.perf_counter() - start) * 1000)
+        for key, value in asdict(cost).items():
+            setattr(total_cost, key, getattr(total_cost, key) + value)
+        ranked = ranked_documents(results)
+        relevant = item["relevant"]
+        per_query.append({
+            "query": item["query"],
+            "retrieved": ranked[:config.top_k],
+            "recall": recall_at_k(ranked, relevant, config.top_k),
+            "rr": reciprocal_rank(ranked, relevant),
+            "ndcg": ndcg_at_k(ranked, relevant, config.top_k),
+            "latency_ms": min(latencies),
+            "cost_usd": prices.usd(cost),
+        })
+
+    latencies = [query["latency_ms"] for query in per_query]
+    count = len(per_query)
+    return ConfigResult(
+        config=asdict(config),
+        name=config.name,
+        recall_at_k=statistics.fmean(query["recall"] for query in per_query),
+        mrr=statistics.fmean(query["rr"] for query in per_query),
+        ndcg_at_k=statistics.fmean(query["ndcg"] for query in per_query),
+        latency_ms={
+            "mean": statistics.fmean(latencies),
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+        },
+        cost={
+            "per_query": {key: value / count for key, value in asdict(total_cost).items()},
+            "usd_per_1k_queries": prices.usd(total_cost) / count * 1000,
+            "index": {**asdict(backend.index_cost), "usd": prices.usd(backend.index_cost)},
+        },
+        queries=per_query,
+    )
+
+
+def pick_fastest(results: List[ConfigResult], min_recall: float, min_ndcg: float) -> Optional[ConfigResult]:
+    passing = [result for result in results if result.recall_at_k >= min_recall and result.ndcg_at_k >= min_ndcg]
+    return min(passing, key=lambda result: result.latency_ms["p95"]) if passing else None
+
+
+def _csv(value: str, cast: Any = str) -> List[Any]:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def _on_off(value: str) -> List[bool]:
+    return [item == "on" for item in _csv(value)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality, latency and cost")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="local")
+    parser.add_argument("--labels", default=str(LABELS_PATH), help="Labelled query set (JSON)")
+    parser.add_argument("--modes", default="vector,lexical,hybrid")
+    parser.add_argument("--top-k", default="3,5")
+    parser.add_argument("--mmr", default="off", help="on, off or on,off")
+    parser.add_argument("--rerank", default="off", help="on, off or on,off")
+    parser.add_argument("--chunk-sizes", default="0", help="Words per chunk (local backend; 0 = whole documents)")
+    parser.add_argument("--embedding-models", default="", help="Ollama embedding models to compare")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per query; latency is the minimum")
+    parser.add_argument("--min-recall", type=float, default=0.0, help="Quality bar on recall@k")
+    parser.add_argument("--min-ndcg", type=float, default=0.0, help="Quality bar on nDCG@k")
+    parser.add_argument("--price-embed-per-1k-tokens", type=float, default=0.0)
+    parser.add_argument("--price-per-vector-query", type=float, default=0.0)
+    parser.add_argument("--price-per-1k-rerank-pairs", type=float, default=0.0)
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/retrieval-<timestamp>.json)")
+    args = parser.parse_args()
+
+    with open(args.labels, "r", encoding="utf-8") as fh:
+        labels = json.load(fh)["queries"]
+    prices = Prices(args.price_embed_per_1k_tokens, args.price_per_vector_query, args.price_per_1k_rerank_pairs)
+    chunk_sizes = _csv(args.chunk_sizes, int) if args.backend == "local" else [0]
+    models: List[Optional[str]] = _csv(args.embedding_models) or [None]
+
+    configs = [
+        EvalConfig(args.backend, mode, top_k, mmr, rerank, chunk_size, model if mode != "lexical" else None)
+        for mode, top_k, mmr, rerank, chunk_size, model in itertools.product(
+            _csv(args.modes), _csv(args.top_k, int), _on_off(args.mmr), _on_off(args.rerank), chunk_sizes, models
+        )
+    ]
+    # Lexical search ignores the embedding model: evaluate it once
+    configs = list({config.name: config for config in configs}.values())
+
+    async def run_all() -> List[ConfigResult]:
+        return [await evaluate(config, labels, prices, args.repeat) for config in configs]
+
+    results = asyncio.run(run_all())
+
+    print(f"{'configuration':<52} {'recall@k':>9} {'MRR':>6} {'nDCG@k':>7} {'p50 ms':>8} {'p95 ms':>8} {'$/1k q':>8}")
+    for result in results:
+        print(
+            f"{result.name:<52} {result.recall_at_k:>9.3f} {result.mrr:>6.3f} {result.ndcg_at_k:>7.3f} "
+            f"{result.latency_ms['p50']:>8.1f} {result.latency_ms['p95']:>8.1f} "
+            f"{result.cost['usd_per_1k_queries']:>8.4f}"
+        )
+    best = pick_fastest(results, args.min_recall, args.min_ndcg)
+    if best:
+        print(f"\nFastest configuration meeting recall>={args.min_recall} nDCG>={args.min_ndcg}: {best.name}")
+    else:
+        print(f"\nNo configuration meets recall>={args.min_recall} nDCG>={args.min_ndcg}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"retrieval-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "labels": args.labels,
+        "query_count": len(labels),
+        "quality_bar": {"min_recall": args.min_recall, "min_ndcg": args.min_ndcg},
+        "recommended": best.name if best else None,
+        "results": [asdict(result) for result in results],
+    }, indent=2), encoding="utf-8")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Local stand-ins for the external services the LLM processor calls, so it can
+be load-tested offline with controllable latency and error rates.
+
+One FastAPI app serves every stub under its own prefix:
+
+    /openai/v1/chat/completions                 Cerebras (OpenAI-compatible), incl. tool calls
+    /gemini/v1/models/{model}:generateContent   Gemini REST
+    /ollama/api/embed                           Ollama embeddings (str or list input)
+    /pinecone/query, /pinecone/vectors/upsert   In-memory Pinecone data plane
+    /helius/v0/addresses/{wallet}/transactions  Helius transaction history
+    /firecrawl/v1/scrape, /firecrawl/v2/scrape  Firecrawl scrape
+
+Usage:
+    python -m benchmarks.stubs --port 9100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+SERVICES = ("openai", "gemini", "ollama", "pinecone", "helius", "firecrawl")
+
+_TOPICS = [
+    "Jupiter", "Raydium", "Orca", "Marinade", "Drift", "Kamino", "Solend", "Phoenix",
+    "swap", "liquidity", "staking", "validator", "lending", "perpetuals", "oracle", "slippage",
+    "CLMM", "JitoSOL", "mSOL", "USDC", "route", "pool", "fees", "yield", "vault", "collateral",
+]
+_TERM_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+@dataclass
+class StubBehavior:
+    """Latency and failure profile of one stubbed service."""
+
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    distribution: str = "fixed"  # fixed, uniform, normal, lognormal
+    error_rate: float = 0.0
+    error_status: int = 503
+
+    def sample_delay(self, rng: random.Random) -> float:
+        mean, spread = self.latency_ms, self.jitter_ms
+        if self.distribution == "uniform":
+            value = rng.uniform(mean - spread, mean + spread)
+        elif self.distribution == "normal":
+            value = rng.gauss(mean, spread)
+        elif self.distribution == "lognormal" and mean > 0:
+            # Parameterised by the target mean and standard deviation
+            sigma = math.sqrt(math.log(1.0 + (spread / mean) ** 2))
+            value = rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        else:
+            value = mean
+        return max(value, 0.0) / 1000.0
+
+
+DEFAULT_BEHAVIORS: Dict[str, StubBehavior] = {
+    "openai": StubBehavior(latency_ms=400.0, jitter_ms=150.0, distribution="lognormal"),
+    "gemini": StubBehavior(latency_ms=500.0, jitter_ms=200.0, distribution="lognormal"),
+    "ollama": StubBehavior(latency_ms=25.0, jitter_ms=10.0, distribution="lognormal"),
+    "pinecone": StubBehavior(latency_ms=40.0, jitter_ms=15.0, distribution="lognormal"),
+    "helius": StubBehavior(latency_ms=120.0, jitter_ms=60.0, distribution="lognormal"),
+    "firecrawl": StubBehavior(latency_ms=800.0, jitter_ms=300.0, distribution="lognormal"),
+}
+
+
+def load_behaviors(overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, StubBehavior]:
+    """Default behaviors with per-service field overrides applied."""
+    behaviors = {name: StubBehavior(**asdict(behavior)) for name, behavior in DEFAULT_BEHAVIORS.items()}
+    for name, fields in (overrides or {}).items():
+        if name not in behaviors:
+            raise ValueError(f"Unknown stub service '{name}', expected one of {SERVICES}")
+        behaviors[name] = StubBehavior(**{**asdict(behaviors[name]), **fields})
+    return behaviors
+
+
+@lru_cache(maxsize=8192)
+def hash_embedding(text: str, dimension: int) -> Tuple[float, ...]:
+    """Deterministic feature-hashed embedding: texts sharing terms land close together."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for term in _TERM_RE.findall(text.lower()):
+        digest = hashlib.blake2b(term.encode(), digest_size=8).digest()
+        slot = int.from_bytes(digest[:4], "little") % dimension
+        vector[slot] += 1.0 if digest[4] & 1 else -1.0
+    norm = float(np.linalg.norm(vector))
+    if norm:
+        vector /= norm
+    return tuple(vector.tolist())
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_TOPICS) for _ in range(words)) + "."
+
+
+def fake_from_schema(
+    schema: Dict[str, Any],
+    rng: random.Random,
+    enum_weights: Optional[Dict[str, Dict[str, float]]] = None,
+    name: str = "",
+    defs: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Build a value that validates against a (Pydantic-generated) JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        schema = defs.get(schema["$ref"].rsplit("/", 1)[-1], {})
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        schema = options[0] if options else {"type": "null"}
+    if "enum" in schema:
+        weights = (enum_weights or {}).get(name)
+        if weights:
+            choices = [value for value in schema["enum"] if value in weights]
+            if choices:
+                return rng.choices(choices, weights=[weights[value] for value in choices])[0]
+        return rng.choice(schema["enum"])
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: fake_from_schema(value, rng, enum_weights, key, defs)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [fake_from_schema(schema.get("items", {}), rng, enum_weights, name, defs) for _ in range(2)]
+    if kind == "number":
+        return round(rng.uniform(0.6, 0.95), 3)
+    if kind == "integer":
+        return rng.randint(1, 5)
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    if "url" in name:
+        return f"https://docs.example.org/{rng.choice(_TOPICS).lower()}"
+    return synthetic_text(rng, 24)
+
+
+class InMemoryIndex:
+    """Pinecone data-plane stand-in: exact cosine search over upserted vectors."""
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            rows = []
+            for vector in vectors:
+                values = np.asarray(vector["values"], dtype=np.float32)
+                norm = float(np.linalg.norm(values)) or 1.0
+                if vector["id"] in self._positions:
+                    position = self._positions[vector["id"]]
+                    self._matrix[position] = values / norm
+                    self._metadata[position] = vector.get("metadata", {})
+                    continue
+                self._positions[vector["id"]] = len(self._ids)
+                self._ids.append(vector["id"])
+                self._metadata.append(vector.get("metadata", {}))
+                rows.append(values / norm)
+            if rows:
+                self._matrix = np.vstack([self._matrix, np.stack(rows)])
+        return len(vectors)
+
+    def query(self, vector: List[float], top_k: int, include_values: bool) -> List[Dict[str, Any]]:
+        with self._lock:
+            if not self._ids:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            query /= float(np.linalg.norm(query)) or 1.0
+            scores = self._matrix @ query
+            top = np.argsort(-scores)[:top_k]
+            return [
+                {
+                    "id": self._ids[idx],
+                    "score": float(scores[idx]),
+                    "values": self._matrix[idx].tolist() if include_values else [],
+                    "metadata": dict(self._metadata[idx]),
+                }
+                for idx in top
+            ]
+
+
+def create_stub_app(
+    behaviors: Optional[Dict[str, StubBehavior]] = None,
+    dimension: int = 1024,
+    seed_documents: int = 500,
+    intent_mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> FastAPI:
+    """
+    Build the stub app.
+
+    Args:
+        behaviors: Latency/error profile per service (defaults to DEFAULT_BEHAVIORS)
+        dimension: Embedding dimension served by the Ollama stub and stored in the index
+        seed_documents: Synthetic documents preloaded into the in-memory index
+        intent_mix: Weights for the "intent" field of structured LLM outputs,
+            e.g. {"retrieval": 0.6, "chat": 0.3, "crawl_web": 0.1}
+        seed: RNG seed for latencies, errors and synthetic content
+    """
+    behaviors = behaviors or load_behaviors()
+    rng = random.Random(seed)
+    enum_weights = {"intent": intent_mix} if intent_mix else {}
+    index = InMemoryIndex(dimension)
+    calls: Dict[str, int] = {name: 0 for name in SERVICES}
+    errors: Dict[str, int] = {name: 0 for name in SERVICES}
+
+    seed_rng = random.Random(seed + 1)
+    seed_vectors = []
+    for idx in range(seed_documents):
+        text = synthetic_text(seed_rng, 60)
+        topic = seed_rng.choice(_TOPICS)
+        seed_vectors.append({
+            "id": f"seed-{idx}",
+            "values": list(hash_embedding(text, dimension)),
+            "metadata": {
+                "text": text,
+                "source": topic,
+                "source_url": f"https://docs.example.org/{topic.lower()}/{idx}",
+            },
+        })
+    index.upsert(seed_vectors)
+
+    app = FastAPI(title="SolAI load-test stubs")
+
+    async def simulate(service: str) -> None:
+        behavior = behaviors[service]
+        calls[service] += 1
+        await asyncio.sleep(behavior.sample_delay(rng))
+        if behavior.error_rate and rng.random() < behavior.error_rate:
+            errors[service] += 1
+            raise HTTPException(status_code=behavior.error_status, detail=f"{service} stub injected error")
+
+    @app.get("/stats")
+    async def stats() -> Dict[str, Any]:
+        return {"calls": calls, "injected_errors": errors, "index_size": len(index)}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        await simulate("openai")
+        prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+        message: Dict[str, Any] = {"role": "assistant", "content": synthetic_text(rng, 80)}
+        finish_reason = "stop"
+        tools = body.get("tools") or []
+        response_format = body.get("response_format") or {}
+        if tools:
+            function = tools[0]["function"]
+            arguments = fake_from_schema(function.get("parameters", {}), rng, enum_weights)
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{rng.getrandbits(48):012x}",
+                    "type": "function",
+                    "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+                }],
+            }
+            finish_reason = "tool_calls"
+        elif response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            message["content"] = json.dumps(fake_from_schema(schema, rng, enum_weights))
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            "id": f"chatcmpl-{rng.getrandbits(64):016x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.post("/gemini/v1/models/{target}")
+    async def gemini_generate(target: str, request: Request) -> Dict[str, Any]:
+        if not target.endswith(":generateContent"):
+            raise HTTPException(status_code=404, detail="Only :generateContent is stubbed")
+        await request.json()
+        await simulate("gemini")
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": synthetic_text(rng, 80)}]},
+                "finishReason": "STOP",
+            }],
+            "modelVersion": target.split(":", 1)[0],
+        }
+
+    @app.post("/ollama/api/embed")
+    async def ollama_embed(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        await simulate("ollama")
+        inputs = body.get("input", "")
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        return {
+            "model": body.get("model", "stub"),
+            "embeddings": [list(hash_embedding(text, dimension)) for text in texts],
+        }
+
+    @app.post("/pinecone/query")
+    async def pinecone_query(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        await simulate("pinecone")
+        matches = index.query(body.get("vector", []), int(body.get("topK", 5)), bool(body.get("includeValues")))
+        if not body.get("includeMetadata", True):
+            for match in matches:
+                match.pop("metadata", None)
+        return {"matches": matches, "namespace": body.get("namespace", ""), "usage": {"readUnits": 1}}
+
+    @app.post("/pinecone/vectors/upsert")
+    async def pinecone_upsert(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        await simulate("pinecone")
+        return {"upsertedCount": index.upsert(body.get("vectors", []))}
+
+    @app.api_route("/pinecone/describe_index_stats", methods=["GET", "POST"])
+    async def pinecone_stats() -> Dict[str, Any]:
+        return {
+            "dimension": dimension,
+            "totalVectorCount": len(index),
+            "namespaces": {"": {"vectorCount": len(index)}},
+        }
+
+    @app.get("/helius/v0/addresses/{wallet}/transactions")
+    async def helius_transactions(wallet: str, limit: int = 10) -> List[Dict[str, Any]]:
+        await simulate("helius")
+        return [
+            {
+                "signature": f"{rng.getrandbits(256):064x}",
+                "timestamp": int(time.time()) - idx * 60,
+                "feePayer": wallet,
+                "lamportTransfers": [
+                    {"fromUserAccount": wallet, "toUserAccount": f"acct{n}", "amount": rng.randint(1, 10 ** 9)}
+                    for n in range(rng.randint(1, 3))
+                ],
+            }
+            for idx in range(limit)
+        ]
+
+    async def firecrawl_scrape(request: Request) -> JSONResponse:
+        body = await request.json()
+        await simulate("firecrawl")
+        sections = "\n\n".join(
+            f"## {rng.choice(_TOPICS)}\n\n{synthetic_text(rng, 120)}" for _ in range(rng.randint(3, 8))
+        )
+        url = body.get("url", "")
+        return JSONResponse({
+            "success": True,
+            "data": {
+                "markdown": f"# {url}\n\n{sections}",
+                "html": f"<html><body>{sections}</body></html>",
+                "metadata": {"sourceURL": url, "url": url, "title": url, "statusCode": 200},
+            },
+        })
+
+    app.add_api_route("/firecrawl/v1/scrape", firecrawl_scrape, methods=["POST"])
+    app.add_api_route("/firecrawl/v2/scrape", firecrawl_scrape, methods=["POST"])
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the external-service stubs standalone")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--behaviors", help="JSON file of per-service behavior overrides")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--seed-documents", type=int, default=500)
+    args = parser.parse_args()
+
+    overrides = None
+    if args.behaviors:
+        with open(args.behaviors, "r", encoding="utf-8") as fh:
+            overrides = json.load(fh)
+    app = create_stub_app(load_behaviors(overrides), args.dimension, args.seed_documents)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Check that importing the service stays within a cold-start budget.
+
+Runs ``python -X importtime -c "import src.main"`` in a fresh interpreter, fails
+if the import takes longer than the budget or pulls in an SDK that should only
+load on first use or during startup initialization.
+
+Usage:
+    python -m scripts.check_import_time
+    python -m scripts.check_import_time --budget-ms 800 --top 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).parent.parent
+
+# Must not be imported by `import src.main` (deferred to first use / the startup task)
+DEFERRED_MODULES = (
+    "pinecone",
+    "langgraph",
+    "langchain_openai",
+    "langchain_google_genai",
+    "firecrawl",
+    "sentence_transformers",
+    "torch",
+)
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[int, int, str]]]:
+    """
+    Import ``module`` in a subprocess under -X importtime.
+
+    Returns:
+        Total import time in microseconds and (self_us, cumulative_us, name) for top-level imports
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    top_level: List[Tuple[int, int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:  self_us |  cumulative_us |   <2 spaces per nesting level>name"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            top_level.append((int(self_us), int(cumulative_us), name.strip()))
+    return sum(cumulative for _, cumulative, _ in top_level), top_level
+
+
+def imported_modules(module: str) -> List[str]:
+    code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return proc.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum import time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    args = parser.parse_args()
+
+    total_us, top_level = measure(args.module)
+    print(f"import {args.module}: {total_us / 1000:.0f} ms (budget {args.budget_ms:.0f} ms)\n")
+    for _, cumulative, name in sorted(top_level, reverse=True, key=lambda item: item[1])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_us / 1000 > args.budget_ms:
+        failures.append(f"import took {total_us / 1000:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    loaded = {name.split(".")[0] for name in imported_modules(args.module)}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    if eager:
+        failures.append(f"imported at module load (should be deferred): {', '.join(eager)}")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Import time within budget and no deferred SDKs loaded")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
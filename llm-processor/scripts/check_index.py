@@ -30,7 +30,7 @@ def main():
     
     # Get index stats
     try:
-        stats = vector_store._index.describe_index_stats()
+        stats = vector_store.index.describe_index_stats()
         print(f"✅ Index Statistics:")
         print(f"   Total vectors: {stats.get('total_vector_count', 0)}")
         print(f"   Dimension: {stats.get('dimension', 'N/A')}")
@@ -16,6 +16,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.rag.embeddings import OllamaEmbeddings
+from src.rag.lexical_index import index_documents
 from src.rag.vector_store import PineconeVectorStore
 
 
@@ -300,6 +301,19 @@ Understanding Solana wallets and account model:
 ]
 
 
+def sample_document_records():
+    """SAMPLE_DOCUMENTS with the stable IDs they are indexed under."""
+    documents = []
+    for i, doc in enumerate(SAMPLE_DOCUMENTS):
+        protocol = doc["metadata"].get("protocol", "Unknown")
+        documents.append({
+            "id": f"solana-defi-{protocol.lower()}-{i}",
+            "text": doc["text"].strip(),
+            "metadata": doc["metadata"]
+        })
+    return documents
+
+
 async def main():
     print("🚀 Starting Pinecone seeding process...")
     
@@ -321,15 +335,7 @@ async def main():
         return
     
     # Prepare documents with IDs
-    documents = []
-    for i, doc in enumerate(SAMPLE_DOCUMENTS):
-        protocol = doc["metadata"].get("protocol", "Unknown")
-        category = doc["metadata"].get("category", "general")
-        documents.append({
-            "id": f"solana-defi-{protocol.lower()}-{i}",
-            "text": doc["text"].strip(),
-            "metadata": doc["metadata"]
-        })
+    documents = sample_document_records()
     
     # Upsert to Pinecone
     print(f"📤 Uploading documents to Pinecone...")
@@ -341,6 +347,10 @@ async def main():
         print(f"❌ Error upserting to Pinecone: {e}")
         return
     
+    # Build the local BM25 index alongside the vectors
+    indexed = index_documents(documents)
+    print(f"✅ Indexed {indexed} documents in the BM25 lexical index")
+    
     # Test retrieval
     print("\n🔍 Testing retrieval with sample query...")
     test_query = "How do I provide liquidity on Raydium?"
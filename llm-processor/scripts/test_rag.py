@@ -41,7 +41,7 @@ async def main():
         
         try:
             # Retrieve context
-            contexts, scores = await rag.retrieve_context(query)
+            contexts, scores, _ = await rag.retrieve_context(query)
             
             if not contexts:
                 print("⚠️  No context retrieved")
@@ -50,7 +50,7 @@ async def main():
             print(f"✅ Retrieved {len(contexts)} documents\n")
             
             # Show top result
-            for j, (context, (doc_id, score)) in enumerate(zip(contexts, scores.items()), 1):
+            for j, (context, score) in enumerate(zip(contexts, scores), 1):
                 if j > 2:  # Show only top 2
                     break
                     
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+from ..settings import get_config
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+
+_DEFAULT_CONTEXT_WINDOWS = {"CEREBRAS": 8192, "GEMINI": 32768}
+
+
+@lru_cache(maxsize=1)
+def _get_encoder() -> Any:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken missing or its BPE file not cached locally: use the estimate
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the local BPE tokenizer, or estimate them if unavailable."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(_TOKEN_RE.findall(text))
+
+
+@dataclass
+class ContextBlock:
+    """A candidate piece of prompt context with its relevance score."""
+
+    id: str
+    kind: str  # client, wallet or rag
+    text: str
+    score: float = 0.0
+    payload: Any = None  # original object the block was built from
+
+
+@dataclass
+class PackedContext:
+    included: List[ContextBlock] = field(default_factory=list)
+    dropped: List[Dict[str, Any]] = field(default_factory=list)
+    budget_tokens: int = 0
+    used_tokens: int = 0
+
+    def join(self, separator: str = "\n---\n") -> str:
+        return separator.join(block.text for block in self.included)
+
+    def as_meta(self) -> Dict[str, Any]:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.used_tokens,
+            "included": len(self.included),
+            "dropped": self.dropped,
+        }
+
+
+class ContextPacker:
+    """Greedily pack context blocks by relevance into a per-model token budget."""
+
+    def __init__(self) -> None:
+        cfg = get_config()["llm_processor"].get("context_budget", {})
+        self._enabled = cfg.get("enabled", True)
+        self._context_windows = {**_DEFAULT_CONTEXT_WINDOWS, **cfg.get("context_windows", {})}
+        self._reserved_output = cfg.get("reserved_output_tokens", 1024)
+        self._overlap_threshold = cfg.get("overlap_threshold", 0.8)
+        self.client_context_score = cfg.get("client_context_score", 1.0)
+        self.wallet_block_score = cfg.get("wallet_block_score", 0.6)
+
+    def context_window(self, provider: str) -> int:
+        return self._context_windows.get(provider.upper(), _DEFAULT_CONTEXT_WINDOWS["CEREBRAS"])
+
+    def budget_for(self, provider: str, overhead: str = "") -> int:
+        """Tokens left for context once the response and fixed prompt text are reserved."""
+        return max(0, self.context_window(provider) - self._reserved_output - count_tokens(overhead))
+
+    def pack(
+        self,
+        blocks: List[ContextBlock],
+        provider: str,
+        overhead: str = "",
+        budget_tokens: Optional[int] = None,
+    ) -> PackedContext:
+        """
+        Select the highest-scoring blocks that fit the budget.
+
+        Blocks are considered in descending score order; ones that repeat text
+        already selected are dropped as overlapping. Selected blocks keep their
+        original relative order so the prompt still reads naturally.
+
+        Args:
+            blocks: Candidate context blocks
+            provider: LLM provider the prompt is for (CEREBRAS or GEMINI)
+            overhead: Fixed prompt text (template, query) that shares the window
+            budget_tokens: Explicit budget overriding the per-model one
+
+        Returns:
+            PackedContext with the included blocks and what was dropped
+        """
+        budget = budget_tokens if budget_tokens is not None else self.budget_for(provider, overhead)
+        if not self._enabled:
+            tokens = sum(count_tokens(block.text) for block in blocks)
+            return PackedContext(included=list(blocks), budget_tokens=budget, used_tokens=tokens)
+
+        order = {id(block): idx for idx, block in enumerate(blocks)}
+        ranked = sorted(blocks, key=lambda block: block.score, reverse=True)
+        selected: List[ContextBlock] = []
+        dropped: List[Dict[str, Any]] = []
+        seen_shingles: Set[str] = set()
+        used = 0
+
+        for block in ranked:
+            tokens = count_tokens(block.text)
+            shingles = self._shingles(block.text)
+            if shingles and len(shingles & seen_shingles) / len(shingles) >= self._overlap_threshold:
+                dropped.append(self._drop(block, tokens, "overlap"))
+                continue
+            if used + tokens > budget:
+                dropped.append(self._drop(block, tokens, "budget"))
+                continue
+            selected.append(block)
+            seen_shingles |= shingles
+            used += tokens
+
+        selected.sort(key=lambda block: order[id(block)])
+        return PackedContext(included=selected, dropped=dropped, budget_tokens=budget, used_tokens=used)
+
+    @staticmethod
+    def _shingles(text: str) -> Set[str]:
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < 3:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+    @staticmethod
+    def _drop(block: ContextBlock, tokens: int, reason: str) -> Dict[str, Any]:
+        return {"id": block.id, "kind": block.kind, "score": block.score, "tokens": tokens, "reason": reason}
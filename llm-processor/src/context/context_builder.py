@@ -5,7 +5,13 @@ from typing import Any, Dict, List
 
 import httpx
 
-from ..settings import get_config
+from ..observability.metrics import time_stage
+from ..observability.spans import span
+from ..serving.http import get_http_client, prewarm_connections
+from ..serving.resilience import get_retry_policy
+from ..serving.shared_cache import get_shared_cache
+from ..serving.single_flight import get_single_flight
+from ..settings import get_config, subscribe
 
 
 @dataclass
@@ -18,17 +24,47 @@ class ContextBuilder:
     """Generate contextual knowledge for a wallet using configured data sources."""
 
     def __init__(self) -> None:
-        self._cfg = get_config()
-        self._context_limits = self._cfg["llm_processor"]["context_generation"]
-        self._indexer_cfg = self._cfg["api_gateway"].get("indexer", {})
+        self._configure(get_config())
+        self._retry = get_retry_policy("helius", 20.0)
+        self._cache = get_shared_cache("wallet_context")
+        # Concurrent lookups of the same wallet share one Helius call
+        self._flights = get_single_flight("wallet_context")
+        subscribe("llm_processor.context_generation", self._configure)
+        subscribe("api_gateway.indexer", self._configure)
+
+    def _configure(self, config: Dict[str, Any]) -> None:
+        indexer_cfg = config["api_gateway"].get("indexer", {})
+        # One assignment, so a lookup never mixes old and new settings
+        self._cfg, self._context_limits, self._indexer_cfg, self._helius_base_url = (
+            config,
+            config["llm_processor"]["context_generation"],
+            indexer_cfg,
+            indexer_cfg.get("base_url", "https://api.helius.xyz").rstrip("/"),
+        )
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open pooled connections to the indexer API."""
+        if self._indexer_cfg.get("type") == "HELIUS":
+            await prewarm_connections("helius", self._helius_base_url, connections)
 
     async def build_wallet_context(self, wallet: str) -> WalletContext:
+        cache_key = f"{wallet}\n{self._context_limits['max_transaction_history']}"
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return WalletContext(text_blocks=cached["text_blocks"], metadata=cached["metadata"])
+        return await self._flights.do(cache_key, lambda: self._build_wallet_context(wallet, cache_key))
+
+    async def _build_wallet_context(self, wallet: str, cache_key: str) -> WalletContext:
         blocks: List[str] = []
         metadata: Dict[str, Any] = {}
-        if self._indexer_cfg.get("type") == "HELIUS":
-            helius_blocks, helius_meta = await self._build_helius_context(wallet)
-            blocks.extend(helius_blocks)
-            metadata.update({"helius": helius_meta})
+        with time_stage("wallet_context"):
+            if self._indexer_cfg.get("type") == "HELIUS":
+                helius_blocks, helius_meta = await self._build_helius_context(wallet)
+                blocks.extend(helius_blocks)
+                metadata.update({"helius": helius_meta})
+        # Failed lookups (no "reason" means success) are retried on the next request
+        if not any("reason" in meta for meta in metadata.values()):
+            self._cache.set(cache_key, {"text_blocks": blocks, "metadata": metadata})
         return WalletContext(text_blocks=blocks, metadata=metadata)
 
     async def _build_helius_context(self, wallet: str) -> tuple[List[str], Dict[str, Any]]:
@@ -37,15 +73,20 @@ class ContextBuilder:
             return [], {"reason": "missing_api_key"}
         limit = self._context_limits["max_transaction_history"]
         url = (
-            f"https://api.helius.xyz/v0/addresses/{wallet}/transactions"
+            f"{self._helius_base_url}/v0/addresses/{wallet}/transactions"
             f"?api-key={api_key}&limit={limit}"
         )
+
+        async def request(timeout: float) -> Any:
+            client = get_http_client("helius")
+            response = await client.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-        except httpx.HTTPError as exc:
+            with span("helius", limit=limit):
+                data = await self._retry.call(request)
+        except (httpx.HTTPError, TimeoutError) as exc:  # TimeoutError covers DeadlineExceeded
             return [], {"reason": "helius_error", "detail": str(exc)}
         transactions = data if isinstance(data, list) else data.get("transactions", [])
         blocks: List[str] = []
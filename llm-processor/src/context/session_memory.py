@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from ..observability.metrics import time_stage
+from ..serving.shared_cache import state_dir
+from ..settings import get_config
+from .budget import ContextBlock, ContextPacker, count_tokens
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS turns (
+        wallet TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        query TEXT NOT NULL,
+        response TEXT NOT NULL,
+        embedding BLOB,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (wallet, session_id, seq)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summaries (
+        wallet TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (wallet, session_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS turns_created_at ON turns (created_at)",
+)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class Turn:
+    seq: int
+    query: str
+    response: str
+    embedding: Optional[np.ndarray] = None
+
+    def text(self) -> str:
+        return f"User: {self.query}\nAssistant: {self.response}"
+
+
+def summarize_turn(turn: Turn, max_chars: int = 240) -> str:
+    """One extractive line per turn: the question and the first sentence of the answer."""
+    answer = _SENTENCE_RE.split(turn.response.strip(), 1)[0]
+    line = f"- Asked: {turn.query.strip()} | Answer: {answer}"
+    return line if len(line) <= max_chars else line[:max_chars - 3] + "..."
+
+
+class SessionMemory:
+    """
+    Conversation memory per (wallet, session id), stored in a local SQLite file.
+
+    Each session keeps a ring buffer of its last ``max_turns`` turns. Turns pushed
+    out of the buffer are folded into a rolling extractive summary, so nothing
+    is lost outright and the summary stays under ``summary_tokens``. The history
+    handed to the prompts is packed into ``history_tokens`` from:
+
+    - the rolling summary,
+    - older buffered turns whose query embedding is close to the new query,
+    - the last ``recent_turns`` turns verbatim.
+
+    Sessions idle for longer than ``ttl_s`` are deleted.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()["llm_processor"].get("memory", {})
+        self.enabled = cfg.get("enabled", True)
+        self._path = Path(cfg.get("path") or state_dir() / "sessions.sqlite3")
+        self._ttl_s = cfg.get("ttl_s", 86400)
+        self._max_turns = cfg.get("max_turns", 20)
+        self._recent_turns = min(cfg.get("recent_turns", 4), self._max_turns)
+        self._relevant_turns = cfg.get("relevant_turns", 3)
+        self._min_similarity = cfg.get("min_similarity", 0.5)
+        self._history_tokens = cfg.get("history_tokens", 1200)
+        self._summary_tokens = cfg.get("summary_tokens", 300)
+        self._embed_timeout_s = cfg.get("embed_timeout_s", 2.0)
+        self._local = threading.local()
+        self._packer = ContextPacker()
+        self._embedder = None
+        self._last_purge = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        # Same client (and shared embedding cache) as retrieval: the query is usually embedded already
+        from ..rag.embeddings import OllamaEmbeddings
+
+        if self._embedder is None:
+            self._embedder = OllamaEmbeddings()
+        try:
+            vector = await asyncio.wait_for(self._embedder.embed_query(text), timeout=self._embed_timeout_s)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Session memory embedding unavailable: {exc!r}")
+            return None
+        return np.asarray(vector, dtype=np.float32) if vector else None
+
+    # -- storage (blocking, run in a worker thread) ---------------------------
+
+    def _load(self, wallet: str, session_id: str) -> tuple[List[Turn], str]:
+        conn = self._connection()
+        cutoff = time.time() - self._ttl_s
+        rows = conn.execute(
+            "SELECT seq, query, response, embedding FROM turns"
+            " WHERE wallet = ? AND session_id = ? AND created_at > ? ORDER BY seq",
+            (wallet, session_id, cutoff),
+        ).fetchall()
+        summary = conn.execute(
+            "SELECT summary FROM summaries WHERE wallet = ? AND session_id = ? AND updated_at > ?",
+            (wallet, session_id, cutoff),
+        ).fetchone()
+        turns = [
+            Turn(seq, query, response, np.frombuffer(blob, dtype=np.float32) if blob else None)
+            for seq, query, response, blob in rows
+        ]
+        return turns, summary[0] if summary else ""
+
+    def _append(self, wallet: str, session_id: str, turn: Turn) -> None:
+        conn = self._connection()
+        now = time.time()
+        blob = turn.embedding.astype(np.float32).tobytes() if turn.embedding is not None else None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM turns WHERE wallet = ? AND session_id = ?", (wallet, session_id)
+            ).fetchone()
+            seq = row[0] + 1
+            conn.execute(
+                "INSERT INTO turns (wallet, session_id, seq, query, response, embedding, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (wallet, session_id, seq, turn.query, turn.response, blob, now),
+            )
+            # Ring buffer: fold the turns that fell out of it into the rolling summary
+            evicted = conn.execute(
+                "SELECT seq, query, response FROM turns WHERE wallet = ? AND session_id = ? AND seq <= ? ORDER BY seq",
+                (wallet, session_id, seq - self._max_turns),
+            ).fetchall()
+            if evicted:
+                current = conn.execute(
+                    "SELECT summary FROM summaries WHERE wallet = ? AND session_id = ?", (wallet, session_id)
+                ).fetchone()
+                lines = (current[0].splitlines() if current else []) + [
+                    summarize_turn(Turn(*row)) for row in evicted
+                ]
+                # Oldest lines go first once the summary outgrows its budget
+                while len(lines) > 1 and count_tokens("\n".join(lines)) > self._summary_tokens:
+                    lines.pop(0)
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries (wallet, session_id, summary, updated_at) VALUES (?, ?, ?, ?)",
+                    (wallet, session_id, "\n".join(lines), now),
+                )
+                conn.execute(
+                    "DELETE FROM turns WHERE wallet = ? AND session_id = ? AND seq <= ?",
+                    (wallet, session_id, seq - self._max_turns),
+                )
+            else:
+                conn.execute(
+                    "UPDATE summaries SET updated_at = ? WHERE wallet = ? AND session_id = ?",
+                    (now, wallet, session_id),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if now - self._last_purge > 300:
+            self._last_purge = now
+            self._purge(now - self._ttl_s)
+
+    def _purge(self, cutoff: float) -> None:
+        """TTL eviction of idle sessions."""
+        conn = self._connection()
+        conn.execute("DELETE FROM turns WHERE created_at <= ?", (cutoff,))
+        conn.execute("DELETE FROM summaries WHERE updated_at <= ?", (cutoff,))
+
+    # -- public API ------------------------------------------------------------
+
+    def _relevant(self, query_embedding: np.ndarray, turns: Sequence[Turn]) -> List[tuple[Turn, float]]:
+        candidates = [
+            turn for turn in turns if turn.embedding is not None and len(turn.embedding) == len(query_embedding)
+        ]
+        if not candidates:
+            return []
+        matrix = np.stack([turn.embedding for turn in candidates])
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_embedding) or 1.0)
+        similarities = matrix @ query_embedding / np.where(norms == 0, 1.0, norms)
+        ranked = sorted(zip(candidates, similarities.tolist()), key=lambda item: item[1], reverse=True)
+        return [(turn, score) for turn, score in ranked[:self._relevant_turns] if score >= self._min_similarity]
+
+    async def history(self, wallet: str, session_id: str, query: str, provider: str) -> str:
+        """Token-budgeted conversation history for ``query`` ("" for a new session)."""
+        if not self.enabled:
+            return ""
+        with time_stage("session_history"):
+            try:
+                turns, summary = await asyncio.to_thread(self._load, wallet, session_id)
+            except sqlite3.Error as exc:
+                logger.warning(f"Failed to load session {session_id}: {exc!r}")
+                return ""
+            if not turns and not summary:
+                return ""
+            recent = turns[-self._recent_turns:] if self._recent_turns else []
+            older = turns[:len(turns) - len(recent)]
+
+            # payload = turn number, so packed blocks read in conversation order
+            blocks: List[ContextBlock] = []
+            if summary:
+                text = f"Earlier in this conversation:\n{summary}"
+                blocks.append(ContextBlock(id="summary", kind="summary", text=text, score=0.5, payload=0))
+            if older and self._relevant_turns:
+                query_embedding = await self._embed(query)
+                if query_embedding is not None:
+                    blocks.extend(
+                        ContextBlock(
+                            id=f"turn-{turn.seq}", kind="relevant", text=turn.text(), score=score, payload=turn.seq
+                        )
+                        for turn, score in self._relevant(query_embedding, older)
+                    )
+            # Most recent turns rank highest: they are what a follow-up question refers to
+            blocks.extend(
+                ContextBlock(id=f"turn-{turn.seq}", kind="recent", text=turn.text(), score=2.0 + idx, payload=turn.seq)
+                for idx, turn in enumerate(recent)
+            )
+            blocks.sort(key=lambda block: block.payload)
+            packed = self._packer.pack(blocks, provider, budget_tokens=self._history_tokens)
+        return packed.join("\n\n")
+
+    async def record(self, wallet: str, session_id: str, query: str, response: str) -> None:
+        """Append a finished turn (embedding its query for later relevance lookups)."""
+        if not self.enabled:
+            return
+        embedding = await self._embed(query)
+        try:
+            await asyncio.to_thread(self._append, wallet, session_id, Turn(0, query, response, embedding))
+        except sqlite3.Error as exc:
+            logger.warning(f"Failed to record turn for session {session_id}: {exc!r}")
+
+
+@lru_cache(maxsize=1)
+def get_session_memory() -> SessionMemory:
+    return SessionMemory()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@dataclass
+class DedupReport:
+    """Statistics for a single deduplication pass over a crawl."""
+
+    total_chunks: int = 0
+    unique_chunks: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    per_source: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def dedup_ratio(self) -> float:
+        if not self.total_chunks:
+            return 0.0
+        return 1.0 - self.unique_chunks / self.total_chunks
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_chunks": self.total_chunks,
+            "unique_chunks": self.unique_chunks,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dedup_ratio": round(self.dedup_ratio, 4),
+            "per_source": self.per_source,
+        }
+
+
+class ChunkDeduplicator:
+    """Collapse exact and near-duplicate chunks before they reach the embedder.
+
+    Exact copies are caught with a hash of the normalized text. Near-duplicates
+    (boilerplate with small edits) are found with MinHash signatures bucketed by
+    LSH bands and confirmed against the estimated Jaccard similarity.
+    """
+
+    def __init__(
+        self,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        threshold: Optional[float] = None,
+        shingle_size: Optional[int] = None,
+        seed: int = 1,
+    ) -> None:
+        cfg = get_config()["llm_processor"]["firecrawl"].get("dedup", {})
+        self._num_perm = num_perm or cfg.get("num_perm", 128)
+        self._bands = bands or cfg.get("bands", 32)
+        self._threshold = threshold if threshold is not None else cfg.get("threshold", 0.85)
+        self._shingle_size = shingle_size or cfg.get("shingle_size", 5)
+        if self._num_perm % self._bands:
+            raise ValueError("dedup.num_perm must be divisible by dedup.bands")
+        self._rows = self._num_perm // self._bands
+        rng = np.random.RandomState(seed)
+        self._perm_a = rng.randint(1, _MERSENNE_PRIME, size=self._num_perm, dtype=np.uint64)
+        self._perm_b = rng.randint(0, _MERSENNE_PRIME, size=self._num_perm, dtype=np.uint64)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _shingles(self, normalized: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(normalized)
+        k = self._shingle_size
+        if len(tokens) <= k:
+            return [" ".join(tokens)]
+        return [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of ``text``."""
+        shingles = set(self._shingles(self._normalize(text)))
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                for s in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # (a * h + b) mod p for every permutation/shingle pair, then min over shingles
+        permuted = (np.outer(self._perm_a, hashes) + self._perm_b[:, None]) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self._bands)]
+
+    def deduplicate(self, chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], DedupReport]:
+        """
+        Keep one canonical chunk per duplicate cluster.
+
+        The first chunk seen in each cluster is kept and its metadata gains a
+        ``source_urls`` list covering every page the text appeared on, plus a
+        ``duplicate_count``.
+
+        Args:
+            chunks: Output of ``FirecrawlWorker.prepare_for_indexing``
+
+        Returns:
+            Tuple of (canonical chunks, dedup report)
+        """
+        report = DedupReport(total_chunks=len(chunks))
+        canonical: List[Dict[str, Any]] = []
+        signatures: List[np.ndarray] = []
+        exact_index: Dict[str, int] = {}
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+        for chunk in chunks:
+            metadata = chunk.get("metadata", {})
+            source_url = metadata.get("source_url", "")
+            source_stats = report.per_source.setdefault(source_url, {"chunks": 0, "dropped": 0})
+            source_stats["chunks"] += 1
+
+            normalized = self._normalize(chunk["text"])
+            digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+            match = exact_index.get(digest)
+            if match is not None:
+                report.exact_duplicates += 1
+                source_stats["dropped"] += 1
+                self._merge_into(canonical[match], source_url)
+                continue
+
+            signature = self.signature(chunk["text"])
+            keys = self._band_keys(signature)
+            match = self._find_near_duplicate(signature, keys, buckets, signatures)
+            if match is not None:
+                report.near_duplicates += 1
+                source_stats["dropped"] += 1
+                exact_index[digest] = match
+                self._merge_into(canonical[match], source_url)
+                continue
+
+            position = len(canonical)
+            canonical.append({
+                **chunk,
+                "metadata": {**metadata, "source_urls": [source_url], "duplicate_count": 0},
+            })
+            signatures.append(signature)
+            exact_index[digest] = position
+            for key in keys:
+                buckets.setdefault(key, []).append(position)
+
+        report.unique_chunks = len(canonical)
+        logger.info(
+            f"Dedup kept {report.unique_chunks}/{report.total_chunks} chunks "
+            f"({report.exact_duplicates} exact, {report.near_duplicates} near duplicates)"
+        )
+        return canonical, report
+
+    def _find_near_duplicate(
+        self,
+        signature: np.ndarray,
+        keys: List[Tuple[int, bytes]],
+        buckets: Dict[Tuple[int, bytes], List[int]],
+        signatures: List[np.ndarray],
+    ) -> Optional[int]:
+        candidates = {position for key in keys for position in buckets.get(key, ())}
+        for position in sorted(candidates):
+            similarity = float(np.mean(signatures[position] == signature))
+            if similarity >= self._threshold:
+                return position
+        return None
+
+    @staticmethod
+    def _merge_into(chunk: Dict[str, Any], source_url: str) -> None:
+        metadata = chunk["metadata"]
+        metadata["duplicate_count"] += 1
+        if source_url not in metadata["source_urls"]:
+            metadata["source_urls"].append(source_url)
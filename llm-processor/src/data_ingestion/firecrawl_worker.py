@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from firecrawl import FirecrawlApp
 
+from ..observability.metrics import time_stage
+from ..serving.resilience import get_retry_policy
 from ..settings import get_config
+from .dedup import ChunkDeduplicator, DedupReport
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +23,12 @@ class FirecrawlWorker:
         self.mode = cfg["mode"]
         self.max_depth = cfg["max_crawl_depth"]
         self.source_urls = cfg["source_urls"]
-        self.app = FirecrawlApp(api_key=self.api_key)
+        self.dedup_enabled = cfg.get("dedup", {}).get("enabled", True)
+        self.last_dedup_report: Optional[DedupReport] = None
+        api_url = cfg.get("api_url")
+        self.app = FirecrawlApp(api_key=self.api_key, api_url=api_url) if api_url else FirecrawlApp(api_key=self.api_key)
+        self._scrape_retry = get_retry_policy("firecrawl", 60.0)
+        self._crawl_retry = get_retry_policy("firecrawl_crawl", 600.0)
 
     async def crawl_single_url(self, url: str) -> List[Dict[str, Any]]:
         """
@@ -32,15 +40,19 @@ class FirecrawlWorker:
         Returns:
             List of document dictionaries with 'content' and 'metadata'
         """
+        with time_stage("firecrawl"):
+            return await self._crawl_single_url(url)
+
+    async def _crawl_single_url(self, url: str) -> List[Dict[str, Any]]:
         try:
             logger.info(f"Crawling URL: {url}")
             
             # Use scrape for single page or crawl for multi-page
             if self.mode == "scrape":
                 # Scrape single page (v2 API returns object, not dict)
-                result = self.app.scrape(
-                    url,
-                    formats=['markdown', 'html']
+                # The SDK is synchronous: run it off the event loop
+                result = await self._scrape_retry.call(
+                    lambda _timeout: asyncio.to_thread(self.app.scrape, url, formats=['markdown', 'html'])
                 )
                 
                 # Convert result object to dict
@@ -59,10 +71,13 @@ class FirecrawlWorker:
                 # Crawl multiple pages with depth (v2 API)
                 from firecrawl.types import ScrapeOptions
                 
-                crawl_result = self.app.crawl(
-                    url,
-                    limit=50,  # Max pages to crawl
-                    scrape_options=ScrapeOptions(formats=['markdown', 'html'])
+                crawl_result = await self._crawl_retry.call(
+                    lambda _timeout: asyncio.to_thread(
+                        self.app.crawl,
+                        url,
+                        limit=50,  # Max pages to crawl
+                        scrape_options=ScrapeOptions(formats=['markdown', 'html']),
+                    )
                 )
                 
                 # Handle CrawlJob object - wait for completion
@@ -111,7 +126,9 @@ class FirecrawlWorker:
         """
         Prepare documents for vector store indexing.
         
-        Chunks large documents and adds metadata.
+        Chunks large documents and adds metadata. When dedup is enabled,
+        repeated boilerplate is collapsed into one canonical chunk and the
+        stats are kept on ``last_dedup_report``.
         """
         prepared_docs = []
         
@@ -134,6 +151,9 @@ class FirecrawlWorker:
                 })
         
         logger.info(f"Prepared {len(prepared_docs)} chunks from {len(documents)} documents")
+
+        if self.dedup_enabled:
+            prepared_docs, self.last_dedup_report = ChunkDeduplicator().deduplicate(prepared_docs)
         return prepared_docs
 
 
@@ -152,6 +172,8 @@ async def main() -> None:
     prepared = worker.prepare_for_indexing(documents)
     
     logger.info(f"Ready to index {len(prepared)} chunks")
+    if worker.last_dedup_report:
+        logger.info(f"Dedup ratio: {worker.last_dedup_report.dedup_ratio:.1%}")
     logger.info("To index these documents, use the RAG vector store upsert method")
     
     # TODO: Integrate with vector_store.py to actually index
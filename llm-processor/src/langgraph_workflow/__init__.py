@@ -2,7 +2,8 @@
 LangGraph workflow for SolAI chat processing
 """
 
-from .workflow import create_chat_workflow
+from typing import Any
+
 from .schemas import (
     IntentDetectionOutput,
     ChatResponse,
@@ -13,9 +14,19 @@ from .schemas import (
 
 __all__ = [
     "create_chat_workflow",
+    "get_chat_workflow",
     "IntentDetectionOutput",
     "ChatResponse",
     "RagSearchResult",
     "WebCrawlResult",
     "FinalResponse",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # The workflow module pulls in langgraph, langchain and firecrawl: import it on first use
+    if name in ("create_chat_workflow", "get_chat_workflow"):
+        from . import workflow
+
+        return getattr(workflow, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
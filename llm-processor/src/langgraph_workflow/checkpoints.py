@@ -0,0 +1,59 @@
+"""
+Per-node checkpoints of the workflow, stored in the shared SQLite cache
+
+Each node's state update is saved under a hash of the state the node received
+(query, context, history, options and every upstream node's output). A retry of
+a request that failed part-way replays the completed nodes from the store and
+only re-runs the node that failed; an identical request within the TTL is served
+entirely from checkpoints.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from functools import lru_cache, wraps
+from typing import Any, Awaitable, Callable, Dict, Mapping
+
+from ..serving.shared_cache import SharedCache
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+Node = Callable[[Any], Awaitable[Dict]]
+
+
+def state_key(state: Mapping[str, Any]) -> str:
+    """Canonical JSON of a node's input state."""
+    return json.dumps(dict(state), sort_keys=True, ensure_ascii=False, default=str)
+
+
+@lru_cache(maxsize=None)
+def get_node_store(name: str) -> SharedCache:
+    cfg = get_config()["llm_processor"].get("workflow_checkpoints", {})
+    ttl_s = cfg.get("node_ttl_s", {}).get(name, cfg.get("ttl_s", 600))
+    store = SharedCache(f"node:{name}", ttl_s=ttl_s)
+    store.enabled = store.enabled and cfg.get("enabled", True) and name not in cfg.get("skip_nodes", [])
+    return store
+
+
+def checkpointed(name: str, node: Node) -> Node:
+    """Wrap a node so its update is served from, and saved to, the checkpoint store."""
+
+    @wraps(node)
+    async def wrapper(state: Any) -> Dict:
+        store = get_node_store(name)
+        if not store.enabled:
+            return await node(state)
+        key = state_key(state)
+        update = store.get(key)
+        if update is not None:
+            logger.info(f"{name}: resumed from checkpoint")
+            return update
+        update = await node(state)
+        # A node that raised stores nothing; a crawl that failed softly is retried too
+        if (update.get("metadata") or {}).get("crawl_success") is not False:
+            store.set(key, update)
+        return update
+
+    return wrapper
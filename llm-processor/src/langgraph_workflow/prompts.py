@@ -1,60 +1,154 @@
 """
-Prompt loaders - Read .md files from prompts directory
+Prompt loaders - Read .md files from prompts directory and compile them into templates
+
+Each template is split at the ``<!-- variables ... -->`` marker line into a
+static prefix (role, rules, output format) and a suffix holding the
+``{placeholders}``. The prefix is sent unchanged as the system message on every
+call, so provider-side prompt caching can match it; only the suffix varies.
 """
 
-import os
+from __future__ import annotations
+
+import threading
 from pathlib import Path
-from typing import Dict
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
 
 
 # Get prompts directory path
 PROMPTS_DIR = Path(__file__).parent.parent.parent / "prompts"
 
+SUFFIX_MARKER = "<!-- variables"
+
+# Placeholders each template must use, in its suffix and nowhere else
+PROMPT_VARIABLES: Dict[str, Tuple[str, ...]] = {
+    "intent_detection": ("context", "conversation_history", "query"),
+    "chat_response": ("context", "conversation_history", "query"),
+    "rag_synthesis": ("context", "sources", "retrieved_docs", "query"),
+    "web_crawl_synthesis": ("context", "url", "crawled_content", "query"),
+    "final_output": ("context", "conversation_history", "intent", "sources", "processed_content", "query"),
+}
+
 
 def load_prompt(filename: str) -> str:
     """
     Load a prompt template from the prompts directory
-    
+
     Args:
         filename: Name of the .md file (e.g., "intent_detection.md")
-        
+
     Returns:
         The prompt template as a string
     """
     filepath = PROMPTS_DIR / filename
-    
+
     if not filepath.exists():
         raise FileNotFoundError(f"Prompt file not found: {filepath}")
-    
+
     with open(filepath, "r", encoding="utf-8") as f:
         return f.read()
 
 
+class PromptTemplate:
+    """A prompt split into a static prefix and a pre-parsed variable suffix."""
+
+    def __init__(self, name: str, source: str) -> None:
+        self.name = name
+        head, marker, tail = source.partition(f"\n{SUFFIX_MARKER}")
+        if not marker:
+            raise ValueError(f"Prompt {name}: missing '{SUFFIX_MARKER} ...' line between instructions and variables")
+        self.prefix = head.strip()
+        # Drop the rest of the marker line; the suffix starts on the next one
+        self.suffix = tail.split("\n", 1)[1].strip() if "\n" in tail else ""
+
+        if any(field is not None for _, field, _, _ in Formatter().parse(self.prefix)):
+            raise ValueError(f"Prompt {name}: placeholders belong after the variables marker, not in the prefix")
+        # (literal text, field name or None) pairs, joined at render time
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(self.suffix):
+            if field is not None and (not field.isidentifier() or spec or conversion):
+                raise ValueError(f"Prompt {name}: unsupported placeholder {{{field}}}")
+            self._parts.append((literal, field))
+        self.variables = tuple(dict.fromkeys(field for _, field in self._parts if field is not None))
+
+        expected = PROMPT_VARIABLES.get(name)
+        if expected is not None and set(self.variables) != set(expected):
+            raise ValueError(
+                f"Prompt {name}: placeholders {sorted(self.variables)} do not match expected {sorted(expected)}"
+            )
+        self._tokens: Optional[Dict[str, int]] = None
+        self._tokens_lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        """The whole template, placeholders included (for context budget overhead estimates)."""
+        return f"{self.prefix}\n\n{self.suffix}"
+
+    def render(self, **values: Any) -> str:
+        """Fill the suffix; the prefix never changes."""
+        missing = [name for name in self.variables if name not in values]
+        if missing:
+            raise KeyError(f"Prompt {self.name}: missing values for {', '.join(missing)}")
+        return "".join(literal + ("" if field is None else str(values[field])) for literal, field in self._parts)
+
+    @property
+    def token_counts(self) -> Dict[str, int]:
+        """Tokens in the static prefix and in the suffix without its values (counted once)."""
+        if self._tokens is None:
+            from ..context.budget import count_tokens
+
+            with self._tokens_lock:
+                if self._tokens is None:
+                    suffix_static = "".join(literal for literal, _ in self._parts)
+                    self._tokens = {"prefix": count_tokens(self.prefix), "suffix_static": count_tokens(suffix_static)}
+        return self._tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "variables": list(self.variables), "tokens": self.token_counts}
+
+
 # Cache prompts for performance
 _prompt_cache: Dict[str, str] = {}
+_template_cache: Dict[str, PromptTemplate] = {}
 
 
 def get_prompt(name: str) -> str:
     """
     Get a cached prompt template
-    
+
     Args:
         name: Name of the prompt (e.g., "intent_detection")
-        
+
     Returns:
         The prompt template string
     """
     filename = f"{name}.md"
-    
+
     if filename not in _prompt_cache:
         _prompt_cache[filename] = load_prompt(filename)
-    
+
     return _prompt_cache[filename]
 
 
+def get_template(name: str) -> PromptTemplate:
+    """Compiled template for ``name`` (parsed and validated on first use)."""
+    if name not in _template_cache:
+        _template_cache[name] = PromptTemplate(name, get_prompt(name))
+    return _template_cache[name]
+
+
+def compile_prompts() -> List[PromptTemplate]:
+    """Compile and validate every known template; raises ValueError on the first invalid one."""
+    return [get_template(name) for name in PROMPT_VARIABLES]
+
+
+def prompt_stats() -> List[Dict[str, Any]]:
+    return [template.stats() for template in compile_prompts()]
+
+
 # Pre-load all prompts
-INTENT_DETECTION_PROMPT = get_prompt("intent_detection")
-CHAT_RESPONSE_PROMPT = get_prompt("chat_response")
-RAG_SYNTHESIS_PROMPT = get_prompt("rag_synthesis")
-WEB_CRAWL_SYNTHESIS_PROMPT = get_prompt("web_crawl_synthesis")
-FINAL_OUTPUT_PROMPT = get_prompt("final_output")
+INTENT_DETECTION_PROMPT = get_template("intent_detection")
+CHAT_RESPONSE_PROMPT = get_template("chat_response")
+RAG_SYNTHESIS_PROMPT = get_template("rag_synthesis")
+WEB_CRAWL_SYNTHESIS_PROMPT = get_template("web_crawl_synthesis")
+FINAL_OUTPUT_PROMPT = get_template("final_output")
@@ -0,0 +1,33 @@
+"""
+Shaping of workflow stream events into the per-step summary returned by /chat/langgraph
+"""
+
+from typing import Any, Dict
+
+
+def describe_step(node_name: str, node_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Summarize one node's output for the workflow_steps list
+    """
+    step = {
+        "node": node_name,
+        "status": "completed"
+    }
+    
+    # Add specific info based on node type
+    if node_name == "intent_detection":
+        step["intent"] = node_state.get("intent")
+        step["confidence"] = node_state.get("intent_confidence")
+        step["reasoning"] = node_state.get("intent_reasoning")
+    elif node_name == "chat":
+        step["response_preview"] = (node_state.get("chat_response") or "")[:200]
+    elif node_name == "retrieval":
+        step["sources_count"] = len(node_state.get("rag_sources", []))
+        step["confidence"] = node_state.get("confidence")
+    elif node_name == "crawl_web":
+        step["url"] = node_state.get("crawl_url")
+        step["success"] = node_state.get("metadata", {}).get("crawl_success")
+    elif node_name == "final_synthesis":
+        step["final"] = True
+    
+    return step
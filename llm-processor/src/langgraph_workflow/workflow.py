@@ -6,17 +6,25 @@ Defines nodes, edges, and state management for chat processing
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Literal, TypedDict
+import threading
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Literal, TypedDict
 
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from ..context.budget import ContextBlock, ContextPacker
 from ..llm.cerebras_handler import CerebrasHandler
 from ..llm.gemini_handler import GeminiHandler
-from ..rag.vector_store import PineconeVectorStore
-from ..rag.embeddings import OllamaEmbeddings
+from ..llm.rate_limiter import get_rate_limiter
+from ..observability.metrics import time_stage
+from ..rag.rag_logic import RagEngine
+from ..rag.selection import RetrievalOptions
 from ..data_ingestion.firecrawl_worker import FirecrawlWorker
+from ..serving.resilience import get_retry_policy
 from ..settings import get_config
+from .checkpoints import checkpointed
 from .schemas import (
     IntentDetectionOutput,
     ChatResponse,
@@ -25,6 +33,7 @@ from .schemas import (
     FinalResponse,
 )
 from .prompts import (
+    PromptTemplate,
     INTENT_DETECTION_PROMPT,
     CHAT_RESPONSE_PROMPT,
     RAG_SYNTHESIS_PROMPT,
@@ -45,6 +54,7 @@ class WorkflowState(TypedDict):
     # Input
     query: str
     context: str  # User context (wallet, history, etc.)
+    conversation_history: str  # Token-budgeted session memory ("" for a new session)
     
     # Intent Detection
     intent: str
@@ -60,6 +70,9 @@ class WorkflowState(TypedDict):
     crawl_response: str | None
     crawl_url: str | None
     
+    # Retrieval overrides (top_k, mmr, lambda_mult, min_score, max_per_source)
+    retrieval_options: Dict[str, Any]
+    
     # Final Output
     final_response: str
     sources: List[str]
@@ -71,13 +84,52 @@ class WorkflowState(TypedDict):
 # Helper Functions
 # =============================================================================
 
-def get_llm_with_structured_output(schema: Any):
+_rag_engine: RagEngine | None = None
+
+
+def get_rag_engine() -> RagEngine:
+    """Shared RAG engine so the Pinecone client and BM25 index are reused across runs"""
+    global _rag_engine
+    if _rag_engine is None:
+        _rag_engine = RagEngine()
+    return _rag_engine
+
+
+_chat_workflow: Any = None
+_chat_workflow_lock = threading.Lock()
+# After a failed compile, the next attempt waits at least this long (doubling up to the cap)
+_COMPILE_RETRY_S = (5.0, 60.0)
+_compile_failures = 0
+_compile_retry_at = 0.0
+
+
+def get_chat_workflow() -> Any:
+    """
+    Compiled workflow, built once on first use (or by the startup task)
+    Returns None if compilation failed; it is retried on a later call after a backoff
+    """
+    global _chat_workflow, _compile_failures, _compile_retry_at
+    if _chat_workflow is None and time.monotonic() >= _compile_retry_at:
+        with _chat_workflow_lock:
+            if _chat_workflow is None and time.monotonic() >= _compile_retry_at:
+                try:
+                    _chat_workflow = create_chat_workflow()
+                    _compile_failures = 0
+                except Exception as e:
+                    backoff = min(_COMPILE_RETRY_S[0] * 2 ** _compile_failures, _COMPILE_RETRY_S[1])
+                    _compile_failures += 1
+                    _compile_retry_at = time.monotonic() + backoff
+                    logger.warning(f"Failed to initialize LangGraph workflow: {e} (retrying in {backoff:.0f}s)")
+    return _chat_workflow
+
+
+def get_llm_with_structured_output(schema: Any, provider: str | None = None):
     """
     Get LLM instance with structured output support
-    Uses Cerebras as primary, Gemini as fallback
+    Uses the configured provider (or ``provider``), Gemini as fallback
     """
     config = get_config()
-    provider = config["llm_processor"]["provider"]
+    provider = provider or config["llm_processor"]["provider"]
     
     try:
         if provider == "CEREBRAS":
@@ -95,6 +147,49 @@ def get_llm_with_structured_output(schema: Any):
         return llm.with_structured_output(schema)
 
 
+def prompt_messages(template: PromptTemplate, **values: Any) -> List[Any]:
+    """
+    System message with the template's static prefix (identical on every call, so it is
+    cacheable provider-side), then a human message with the filled-in suffix
+    """
+    return [SystemMessage(content=template.prefix), HumanMessage(content=template.render(**values))]
+
+
+async def invoke_structured(schema: Any, messages: List[Any]) -> Any:
+    """
+    Invoke the configured LLM with structured output, timing the provider call
+    """
+    rate_limiter = get_rate_limiter()
+    estimated = rate_limiter.estimate_tokens("\n".join(str(message.content) for message in messages))
+    provider = rate_limiter.route(get_config()["llm_processor"]["provider"], estimated)
+    llm = get_llm_with_structured_output(schema, provider)
+    retry = get_retry_policy(provider.lower(), 30.0)
+
+    async def request(_timeout: float) -> Any:
+        # Every attempt, retries included, draws from the provider's quota
+        await rate_limiter.acquire(provider, estimated)
+        try:
+            return await llm.ainvoke(messages)
+        except Exception as exc:
+            if getattr(exc, "status_code", None) == 429 or "RateLimit" in type(exc).__name__:
+                rate_limiter.penalize(provider, None)
+            raise
+
+    with time_stage(f"llm:{provider.lower()}"):
+        return await retry.call(request)
+
+
+def timed_node(name: str, node: Callable[[WorkflowState], Awaitable[Dict]]):
+    """
+    Wrap a node so its duration is recorded in the stage latency histogram
+    """
+    @wraps(node)
+    async def wrapper(state: WorkflowState) -> Dict:
+        with time_stage(f"node:{name}"):
+            return await node(state)
+    return wrapper
+
+
 # =============================================================================
 # Node Implementations
 # =============================================================================
@@ -105,18 +200,16 @@ async def intent_detection_node(state: WorkflowState) -> Dict:
     """
     logger.info("Intent Detection Node: Starting")
     
-    # Get LLM with structured output
-    llm = get_llm_with_structured_output(IntentDetectionOutput)
-    
     # Format prompt
-    prompt = INTENT_DETECTION_PROMPT.format(
+    messages = prompt_messages(
+        INTENT_DETECTION_PROMPT,
         context=state.get("context", "No context provided"),
+        conversation_history=state.get("conversation_history") or "No earlier messages",
         query=state["query"]
     )
     
     # Invoke LLM
-    messages = [SystemMessage(content=prompt)]
-    result: IntentDetectionOutput = await llm.ainvoke(messages)
+    result: IntentDetectionOutput = await invoke_structured(IntentDetectionOutput, messages)
     
     logger.info(f"Intent detected: {result.intent} (confidence: {result.confidence})")
     
@@ -135,19 +228,16 @@ async def chat_node(state: WorkflowState) -> Dict:
     """
     logger.info("Chat Node: Starting")
     
-    # Get LLM with structured output
-    llm = get_llm_with_structured_output(ChatResponse)
-    
     # Format prompt
-    prompt = CHAT_RESPONSE_PROMPT.format(
+    messages = prompt_messages(
+        CHAT_RESPONSE_PROMPT,
         context=state.get("context", "No context provided"),
-        conversation_history="",  # TODO: Add conversation history
+        conversation_history=state.get("conversation_history") or "No earlier messages",
         query=state["query"]
     )
     
     # Invoke LLM
-    messages = [SystemMessage(content=prompt)]
-    result: ChatResponse = await llm.ainvoke(messages)
+    result: ChatResponse = await invoke_structured(ChatResponse, messages)
     
     logger.info("Chat Node: Response generated")
     
@@ -167,35 +257,49 @@ async def rag_node(state: WorkflowState) -> Dict:
     logger.info("RAG Node: Starting")
     
     # Perform RAG search
-    vector_store = PineconeVectorStore()
-    embeddings = OllamaEmbeddings()
     search_query = state.get("search_query") or state["query"]
     
     logger.info(f"RAG Node: Searching for: {search_query}")
     
-    # Generate embedding for the query
-    query_embedding = await embeddings.embed_query(search_query)
-    
-    # Search using embedding
-    results = vector_store.similarity_search(query_embedding)
+    # Hybrid vector + BM25 search, then filter and diversify the candidates
+    options = RetrievalOptions.from_config().override(**(state.get("retrieval_options") or {}))
+    results = await get_rag_engine().search(search_query, options)
     
+    # Pack retrieved documents into the model's context budget
+    config = get_config()
+    provider = config["llm_processor"]["provider"]
+    template_overhead = "\n".join([
+        RAG_SYNTHESIS_PROMPT.text,
+        state.get("context", "No context provided"),
+        state["query"],
+    ])
+    packed = ContextPacker().pack(
+        [
+            ContextBlock(
+                id=f"doc-{i}", kind="rag", text=doc.get("text", ""), score=doc.get("score", 0.0), payload=doc
+            )
+            for i, doc in enumerate(results)
+        ],
+        provider,
+        overhead=template_overhead,
+    )
+    packed_results = [block.payload for block in packed.included]
+
     # Format retrieved documents
     retrieved_docs = "\n\n---\n\n".join([
         f"**Document {i+1}** (Score: {doc.get('score', 0.0):.2f}):\n{doc.get('text', '')}\n"
         f"Source: {doc.get('source', 'Unknown')}"
-        for i, doc in enumerate(results)
+        for i, doc in enumerate(packed_results)
     ])
     
     sources = [
         doc.get("source", doc.get("source_url", "Unknown"))
-        for doc in results
+        for doc in packed_results
     ]
     
-    # Get LLM with structured output for synthesis
-    llm = get_llm_with_structured_output(RagSearchResult)
-    
     # Format prompt
-    prompt = RAG_SYNTHESIS_PROMPT.format(
+    messages = prompt_messages(
+        RAG_SYNTHESIS_PROMPT,
         context=state.get("context", "No context provided"),
         query=state["query"],
         retrieved_docs=retrieved_docs,
@@ -203,8 +307,7 @@ async def rag_node(state: WorkflowState) -> Dict:
     )
     
     # Invoke LLM
-    messages = [SystemMessage(content=prompt)]
-    result: RagSearchResult = await llm.ainvoke(messages)
+    result: RagSearchResult = await invoke_structured(RagSearchResult, messages)
     
     logger.info(f"RAG Node: Response synthesized (confidence: {result.confidence})")
     
@@ -215,6 +318,7 @@ async def rag_node(state: WorkflowState) -> Dict:
         "metadata": {
             "has_complete_answer": result.has_complete_answer,
             "documents_retrieved": len(results),
+            "context_budget": packed.as_meta(),
         }
     }
 
@@ -256,11 +360,9 @@ async def firecrawl_node(state: WorkflowState) -> Dict:
         crawled_content = f"Error crawling the URL: {str(e)}"
         crawl_success = False
     
-    # Get LLM with structured output for synthesis
-    llm = get_llm_with_structured_output(WebCrawlResult)
-    
     # Format prompt
-    prompt = WEB_CRAWL_SYNTHESIS_PROMPT.format(
+    messages = prompt_messages(
+        WEB_CRAWL_SYNTHESIS_PROMPT,
         context=state.get("context", "No context provided"),
         query=state["query"],
         url=url,
@@ -268,8 +370,7 @@ async def firecrawl_node(state: WorkflowState) -> Dict:
     )
     
     # Invoke LLM
-    messages = [SystemMessage(content=prompt)]
-    result: WebCrawlResult = await llm.ainvoke(messages)
+    result: WebCrawlResult = await invoke_structured(WebCrawlResult, messages)
     
     logger.info(f"Firecrawl Node: Response synthesized")
     
@@ -309,9 +410,6 @@ async def final_synthesis_node(state: WorkflowState) -> Dict:
             {"type": "web_crawl", "url": crawl_url if crawl_url else "No URL provided"}
         ]
     
-    # Get LLM with structured output
-    llm = get_llm_with_structured_output(FinalResponse)
-    
     # Format prompt - ensure all source values are strings
     source_names = []
     for s in sources:
@@ -319,8 +417,10 @@ async def final_synthesis_node(state: WorkflowState) -> Dict:
         # Ensure name is not None
         source_names.append(str(name) if name else "Unknown")
     
-    prompt = FINAL_OUTPUT_PROMPT.format(
+    messages = prompt_messages(
+        FINAL_OUTPUT_PROMPT,
         context=state.get("context", "No context provided"),
+        conversation_history=state.get("conversation_history") or "No earlier messages",
         query=state["query"],
         processed_content=processed_content,
         intent=intent,
@@ -328,8 +428,7 @@ async def final_synthesis_node(state: WorkflowState) -> Dict:
     )
     
     # Invoke LLM
-    messages = [SystemMessage(content=prompt)]
-    result: FinalResponse = await llm.ainvoke(messages)
+    result: FinalResponse = await invoke_structured(FinalResponse, messages)
     
     logger.info("Final Synthesis Node: Complete")
     
@@ -372,11 +471,16 @@ def create_chat_workflow():
     workflow = StateGraph(WorkflowState)
     
     # Add nodes
-    workflow.add_node("intent_detection", intent_detection_node)
-    workflow.add_node("chat", chat_node)
-    workflow.add_node("retrieval", rag_node)
-    workflow.add_node("crawl_web", firecrawl_node)
-    workflow.add_node("final_synthesis", final_synthesis_node)
+    # Each node's output is checkpointed, so a retried request resumes after the last completed node
+    nodes = (
+        ("intent_detection", intent_detection_node),
+        ("chat", chat_node),
+        ("retrieval", rag_node),
+        ("crawl_web", firecrawl_node),
+        ("final_synthesis", final_synthesis_node),
+    )
+    for name, node in nodes:
+        workflow.add_node(name, timed_node(name, checkpointed(name, node)))
     
     # Set entry point
     workflow.set_entry_point("intent_detection")
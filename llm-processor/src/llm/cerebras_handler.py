@@ -1,23 +1,43 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 
-import httpx
-from langchain_openai import ChatOpenAI
+from ..observability.metrics import time_stage
+from ..serving.http import get_http_client, prewarm_connections
+from ..serving.resilience import get_retry_policy
+from ..settings import get_config, subscribe
+from .rate_limiter import get_rate_limiter, retry_after_seconds
 
-from ..settings import get_config
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 
 class CerebrasClient:
     """Asynchronous HTTP client for Cerebras inference API."""
 
     def __init__(self) -> None:
-        cfg = get_config()["llm_processor"]["cerebras"]
-        self._api_key = cfg["api_key"]
-        self._model_name = cfg["model_name"]
-        self._endpoint = cfg["endpoint_url"].rstrip("/")
+        self._configure(get_config())
+        self._rate_limiter = get_rate_limiter()
+        self._retry = get_retry_policy("cerebras", 30.0)
+        subscribe("llm_processor.cerebras", self._configure)
+
+    def _configure(self, config: Dict) -> None:
+        cfg = config["llm_processor"]["cerebras"]
+        # One assignment: a request never sees a new key paired with the old endpoint
+        self._api_key, self._model_name, self._endpoint = (
+            cfg["api_key"], cfg["model_name"], cfg["endpoint_url"].rstrip("/")
+        )
 
-    async def generate(self, prompt: str, context: str) -> Dict[str, str]:
+    async def prewarm(self, connections: int = 1) -> None:
+        """Open pooled connections (TLS, DNS); the pool belongs to this process."""
+        await prewarm_connections("cerebras", self._endpoint, connections)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open pooled connections and send a one-token completion (TLS, DNS and provider routing)."""
+        await self.prewarm(connections)
+        await self.generate("ping", "", max_tokens=1)
+
+    async def generate(self, prompt: str, context: str, max_tokens: int = 512) -> Dict[str, str]:
         payload = {
             "model": self._model_name,
             "messages": [
@@ -26,20 +46,32 @@ class CerebrasClient:
                     "content": f"Context:\n{context}\n\nUser Prompt:\n{prompt}"
                 }
             ],
-            "max_tokens": 512,
+            "max_tokens": max_tokens,
         }
         headers = {
             "Authorization": f"Bearer {self._api_key}",
             "Content-Type": "application/json"
         }
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        url = f"{self._endpoint}/chat/completions"
+        estimated = self._rate_limiter.estimate_tokens(payload["messages"][0]["content"], payload["max_tokens"])
+
+        async def request(timeout: float) -> Dict:
+            await self._rate_limiter.acquire("CEREBRAS", estimated)
+            client = get_http_client("cerebras")
             response = await client.post(
-                f"{self._endpoint}/chat/completions",
+                url,
                 json=payload,
-                headers=headers
+                headers=headers,
+                timeout=timeout,
             )
+            if response.status_code == 429:
+                self._rate_limiter.penalize("CEREBRAS", retry_after_seconds(response.headers.get("retry-after")))
             response.raise_for_status()
-            data = response.json()
+            return response.json()
+
+        with time_stage("llm:cerebras", model=self._model_name):
+            data = await self._retry.call(request)
+        self._rate_limiter.settle("CEREBRAS", estimated, data.get("usage", {}).get("total_tokens"))
         return {
             "completion": data.get("choices", [{}])[0].get("message", {}).get("content", ""),
             "id": data.get("id", ""),
@@ -59,10 +91,13 @@ class CerebrasHandler:
         """
         Get LangChain LLM instance for Cerebras (OpenAI-compatible)
         """
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(
             model=self._model_name,
             api_key=self._api_key,
             base_url=f"{self._endpoint}",
             temperature=0.2,
             max_tokens=2048,  # Increased from 512 to 2048 for LangGraph structured outputs
+            max_retries=0,  # Retried by RetryPolicy in invoke_structured, within the request deadline
         )
@@ -1,24 +1,47 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional
 
-import httpx
-from langchain_google_genai import ChatGoogleGenerativeAI
+from ..observability.metrics import time_stage
+from ..serving.http import get_http_client, prewarm_connections
+from ..serving.resilience import get_retry_policy
+from ..settings import get_config, subscribe
+from .rate_limiter import get_rate_limiter, retry_after_seconds
 
-from ..settings import get_config
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
 
 class GeminiClient:
     """Fallback client for Google Gemini models."""
 
     def __init__(self) -> None:
-        cfg = get_config()["llm_processor"]["gemini"]
-        self._api_key = cfg["api_key"]
-        self._model = cfg["model_name"]
-        self._temperature = cfg["temperature"]
-        self._max_tokens = cfg["max_output_tokens"]
+        self._configure(get_config())
+        self._rate_limiter = get_rate_limiter()
+        self._retry = get_retry_policy("gemini", 30.0)
+        subscribe("llm_processor.gemini", self._configure)
+
+    def _configure(self, config: Dict) -> None:
+        cfg = config["llm_processor"]["gemini"]
+        # One assignment: a request never sees a new key paired with the old endpoint
+        self._api_key, self._model, self._temperature, self._max_tokens, self._endpoint = (
+            cfg["api_key"],
+            cfg["model_name"],
+            cfg["temperature"],
+            cfg["max_output_tokens"],
+            cfg.get("endpoint_url", "https://generativelanguage.googleapis.com/v1").rstrip("/"),
+        )
 
-    async def generate(self, prompt: str, context: str) -> Dict[str, str]:
+    async def prewarm(self, connections: int = 1) -> None:
+        """Open pooled connections (TLS, DNS); the pool belongs to this process."""
+        await prewarm_connections("gemini", self._endpoint, connections)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open pooled connections and send a one-token completion (TLS, DNS and provider routing)."""
+        await self.prewarm(connections)
+        await self.generate("ping", "", max_tokens=1)
+
+    async def generate(self, prompt: str, context: str, max_tokens: Optional[int] = None) -> Dict[str, str]:
         payload = {
             "contents": [
                 {
@@ -30,17 +53,31 @@ class GeminiClient:
             ],
             "generationConfig": {
                 "temperature": self._temperature,
-                "maxOutputTokens": self._max_tokens,
+                "maxOutputTokens": max_tokens or self._max_tokens,
             },
         }
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        url, params = f"{self._endpoint}/models/{self._model}:generateContent", {"key": self._api_key}
+        estimated = self._rate_limiter.estimate_tokens(
+            payload["contents"][0]["parts"][0]["text"], payload["generationConfig"]["maxOutputTokens"]
+        )
+
+        async def request(timeout: float) -> Dict:
+            await self._rate_limiter.acquire("GEMINI", estimated)
+            client = get_http_client("gemini")
             response = await client.post(
-                f"https://generativelanguage.googleapis.com/v1/models/{self._model}:generateContent",
-                params={"key": self._api_key},
+                url,
+                params=params,
                 json=payload,
+                timeout=timeout,
             )
+            if response.status_code == 429:
+                self._rate_limiter.penalize("GEMINI", retry_after_seconds(response.headers.get("retry-after")))
             response.raise_for_status()
-            data = response.json()
+            return response.json()
+
+        with time_stage("llm:gemini", model=self._model):
+            data = await self._retry.call(request)
+        self._rate_limiter.settle("GEMINI", estimated, data.get("usageMetadata", {}).get("totalTokenCount"))
         text = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
         return {
             "completion": text,
@@ -62,9 +99,12 @@ class GeminiHandler:
         """
         Get LangChain LLM instance for Google Gemini
         """
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         return ChatGoogleGenerativeAI(
             model=self._model,
             google_api_key=self._api_key,
             temperature=self._temperature,
             max_output_tokens=self._max_tokens,
+            max_retries=0,  # Retried by RetryPolicy in invoke_structured, within the request deadline
         )
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from ..context.budget import count_tokens
+from ..observability.metrics import RATE_LIMIT_SPILLOVER, time_stage
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_LIMITS = {
+    "CEREBRAS": {"rpm": 30, "tpm": 60000},
+    "GEMINI": {"rpm": 30, "tpm": 1000000, "rpd": 1500},
+}
+_WINDOWS = {"rpm": 60.0, "tpm": 60.0, "rpd": 86400.0}
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a provider cannot take the call within the configured maximum wait."""
+
+    def __init__(self, provider: str, wait_s: float) -> None:
+        super().__init__(f"{provider} rate limit: next slot in {wait_s:.1f}s")
+        self.provider = provider
+        self.retry_after_s = wait_s
+
+
+class TokenBucket:
+    """Token bucket that may go negative: a negative level is capacity already promised to queued callers."""
+
+    def __init__(self, capacity: float, window_s: float) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / window_s
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self._level
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self._level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self._level = min(self.capacity, self._level + amount)
+
+    def block_for(self, seconds: float, now: float) -> None:
+        """Empty the bucket so nothing is granted for ``seconds`` (provider answered 429)."""
+        self._refill(now)
+        self._level = min(self._level, -seconds * self.rate)
+
+
+class ProviderLimits:
+    """RPM / TPM (and optional requests-per-day) buckets for one provider."""
+
+    def __init__(self, name: str, limits: Dict[str, float]) -> None:
+        self.name = name
+        self._buckets: List[Tuple[str, TokenBucket]] = [
+            (key, TokenBucket(limits[key], window))
+            for key, window in _WINDOWS.items()
+            if limits.get(key)
+        ]
+
+    @staticmethod
+    def _amount(key: str, tokens: int) -> float:
+        return float(tokens) if key == "tpm" else 1.0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        return max((bucket.wait_time(self._amount(key, tokens), now) for key, bucket in self._buckets), default=0.0)
+
+    def reserve(self, tokens: int, now: float) -> None:
+        for key, bucket in self._buckets:
+            bucket.consume(self._amount(key, tokens), now)
+
+    def refund(self, tokens: int, request: bool = False) -> None:
+        for key, bucket in self._buckets:
+            if key == "tpm":
+                bucket.refund(tokens)
+            elif request:
+                bucket.refund(1.0)
+
+    def block_for(self, seconds: float, now: float) -> None:
+        for key, bucket in self._buckets:
+            if key != "rpd":
+                bucket.block_for(seconds, now)
+
+
+class LLMRateLimiter:
+    """
+    Client-side RPM/TPM limiter shared by the Cerebras and Gemini clients.
+
+    Calls reserve capacity up front from an estimate of prompt plus completion
+    tokens and sleep until their reservation is due (``queue`` mode), so bursts
+    are spread out instead of coming back as 429s. In ``spillover`` mode,
+    ``route`` sends a call to the other provider when the preferred one would
+    make it wait longer than ``spillover_after_ms``.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()["llm_processor"].get("rate_limits", {})
+        self.enabled = cfg.get("enabled", False)
+        self._mode = cfg.get("mode", "queue")
+        self._max_wait_s = cfg.get("max_wait_ms", 10000) / 1000.0
+        self._spillover_after_s = cfg.get("spillover_after_ms", 500) / 1000.0
+        self._completion_tokens = cfg.get("completion_tokens_estimate", 512)
+        providers_cfg = cfg.get("providers", {})
+        self._providers: Dict[str, ProviderLimits] = {
+            name: ProviderLimits(name, {**defaults, **providers_cfg.get(name, {})})
+            for name, defaults in _DEFAULT_LIMITS.items()
+        }
+
+    def estimate_tokens(self, text: str, completion_tokens: Optional[int] = None) -> int:
+        """Prompt tokens plus the expected completion, which TPM quotas also count."""
+        return count_tokens(text) + (completion_tokens if completion_tokens is not None else self._completion_tokens)
+
+    def route(self, preferred: str, tokens: int) -> str:
+        """Provider to send a call to: the preferred one, unless spill-over applies."""
+        if not self.enabled or self._mode != "spillover" or preferred not in self._providers:
+            return preferred
+        now = time.monotonic()
+        wait = self._providers[preferred].wait_time(tokens, now)
+        if wait <= self._spillover_after_s:
+            return preferred
+        alternatives = [
+            (limits.wait_time(tokens, now), name)
+            for name, limits in self._providers.items()
+            if name != preferred
+        ]
+        if not alternatives:
+            return preferred
+        other_wait, other = min(alternatives)
+        if other_wait >= wait:
+            return preferred
+        RATE_LIMIT_SPILLOVER.inc(source=preferred.lower(), target=other.lower())
+        logger.info(f"{preferred} saturated ({wait:.2f}s wait), spilling over to {other}")
+        return other
+
+    async def acquire(self, provider: str, tokens: int) -> None:
+        """
+        Reserve one request and ``tokens`` tokens on ``provider``, sleeping until they are available.
+
+        Raises:
+            RateLimitExceeded: if the wait would exceed ``max_wait_ms``
+        """
+        limits = self._providers.get(provider)
+        if not self.enabled or limits is None:
+            return
+        now = time.monotonic()
+        wait = limits.wait_time(tokens, now)
+        if wait > self._max_wait_s:
+            raise RateLimitExceeded(provider, wait)
+        limits.reserve(tokens, now)
+        if wait <= 0:
+            return
+        try:
+            with time_stage(f"rate_limit:{provider.lower()}"):
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            limits.refund(tokens, request=True)
+            raise
+
+    def settle(self, provider: str, estimated: int, actual: Optional[int]) -> None:
+        """Return the unused part of an estimate (or charge the overrun) once real usage is known."""
+        limits = self._providers.get(provider)
+        if not self.enabled or limits is None or actual is None:
+            return
+        limits.refund(estimated - actual)
+
+    def penalize(self, provider: str, retry_after_s: Optional[float]) -> None:
+        """Stop granting calls to ``provider`` after it answered 429."""
+        limits = self._providers.get(provider)
+        if not self.enabled or limits is None:
+            return
+        limits.block_for(retry_after_s if retry_after_s is not None else 1.0, time.monotonic())
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> LLMRateLimiter:
+    return LLMRateLimiter()
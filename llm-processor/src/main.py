@@ -1,33 +1,210 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import math
 import os
-from typing import Any, Dict, List, Optional
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from .context.context_builder import ContextBuilder
+from .context.budget import ContextBlock, ContextPacker
+from .context.context_builder import ContextBuilder, WalletContext
+from .context.session_memory import get_session_memory
 from .llm.cerebras_handler import CerebrasClient
 from .llm.gemini_handler import GeminiClient
-from .rag.rag_logic import RagEngine
+from .llm.rate_limiter import RateLimitExceeded, get_rate_limiter
+from .observability.profiler import ProfilerBusy, ProfilingService
+from .observability.metrics import INFLIGHT, query_stats, record_request, render_prometheus
+from .observability.spans import get_tracer, span
+from .observability.trace_exporter import get_trace_exporter
+from .rag.rag_logic import RETRIEVAL_MODES, RagEngine, RetrievedContext
+from .serving.admission import AdmissionController, AdmissionRejected
+from .serving.config_watcher import ConfigWatcher
+from .serving.http import close_http_clients
+from .serving.responses import CompressionMiddleware, FastJSONResponse, dumps
+from .serving.resilience import DeadlineExceeded, deadline_scope, remaining_s
+from .serving.single_flight import flight_key, get_single_flight, normalize_text
+from .serving.startup import get_startup_state
+from .serving.workers import get_leader_lock
 from .settings import get_config
-from .langgraph_workflow import create_chat_workflow
+from . import langgraph_workflow
+from .langgraph_workflow.prompts import compile_prompts, prompt_stats
+from .langgraph_workflow.steps import describe_step
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # A broken prompt template fails startup instead of the first request that uses it
+    compile_prompts()
+    startup = get_startup_state()
+    init_task: Optional[asyncio.Task] = None
+
+    async def initialize() -> None:
+        await startup.run(_startup_steps())
+        # Lets follower workers report ready (no-op unless this worker is the leader)
+        await asyncio.to_thread(get_leader_lock().mark_warmed)
+
+    if startup.deferred:
+        # Serve (and answer /health) right away; /ready flips once initialization finishes
+        init_task = asyncio.create_task(initialize())
+    else:
+        await initialize()
+    config_watcher.start()
+    yield
+    await config_watcher.stop()
+    if init_task is not None and not init_task.done():
+        init_task.cancel()
+    await close_http_clients()
+    get_leader_lock().release()
+    # Flush buffered trace runs before the process exits
+    await get_trace_exporter().shutdown()
+
+
+app = FastAPI(
+    title="SolAI LLM Processor",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+admission = AdmissionController()
+DEADLINE_ROUTES = set(
+    get_config()["llm_processor"].get("resilience", {}).get("deadline_routes", ["/process_prompt", "/chat/langgraph"])
+)
+
 
-app = FastAPI(title="SolAI LLM Processor", version="0.1.0")
+def _route_template(request: Request) -> str:
+    """Route path template (e.g. /api/user/account/{wallet_address}) to keep label cardinality low."""
+    from starlette.routing import Match
+
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+def _request_timeout_s(request: Request, route: str) -> Optional[float]:
+    """
+    Time budget for the request: X-Request-Timeout-Ms if the caller sent it, else the
+    gateway timeout for routes the gateway proxies, else none
+    """
+    header = request.headers.get("x-request-timeout-ms")
+    try:
+        if header:
+            return float(header) / 1000.0
+    except ValueError:
+        pass
+    return admission.default_timeout_s if route in DEADLINE_ROUTES else None
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next: Any) -> Response:
+    route = _route_template(request)
+    INFLIGHT.inc(route=route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        # Root span of the request trace; spans opened by handlers, nodes and clients nest under it
+        with span(f"{request.method} {route}", route=route, method=request.method) as root:
+            try:
+                # Outbound clients shrink their timeouts to what is left of this deadline
+                with deadline_scope(_request_timeout_s(request, route)):
+                    async with admission.admit(route, remaining_s()):
+                        response = await call_next(request)
+            except AdmissionRejected as exc:
+                response = JSONResponse(
+                    status_code=503,
+                    content={"detail": f"Server busy ({exc.reason}), retry later"},
+                    headers={"Retry-After": exc.retry_after},
+                )
+            status = response.status_code
+            if root is not None:
+                root.set_attribute("status", status)
+                response.headers["X-Trace-Id"] = root.trace_id
+        return response
+    finally:
+        INFLIGHT.dec(route=route)
+        record_request(route, request.method, status, time.perf_counter() - start)
+
+
+# Added after the metrics middleware, so it wraps it: compression is the last step before the socket
+app.add_middleware(CompressionMiddleware)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(_: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse(status_code=504, content={"detail": f"Request deadline exceeded: {exc}"})
 
 rag_engine = RagEngine()
 cerebras_client = CerebrasClient()
 gemini_client = GeminiClient()
 context_builder = ContextBuilder()
+context_packer = ContextPacker()
+profiling_service = ProfilingService()
+rate_limiter = get_rate_limiter()
+config_watcher = ConfigWatcher()
+session_memory = get_session_memory()
+# Identical requests arriving while one is being answered share its response
+prompt_flights = get_single_flight("process_prompt")
+chat_flights = get_single_flight("chat_langgraph")
 config = get_config()
+batch_cfg = config["llm_processor"].get("batch", {})
+BATCH_MAX_ITEMS = batch_cfg.get("max_items", 100)
+# Shared by every item of every batch request in this process
+batch_llm_slots = asyncio.Semaphore(batch_cfg.get("llm_concurrency", 8))
+
+
+def _startup_steps() -> Dict[str, Any]:
+    """Heavy initialization kept off the import path (blocking work runs in threads)."""
+
+    async def compile_workflow() -> None:
+        if await asyncio.to_thread(langgraph_workflow.get_chat_workflow) is None:
+            raise RuntimeError("LangGraph workflow failed to compile")
+
+    async def load_llm_sdks() -> None:
+        from .llm.cerebras_handler import CerebrasHandler
+        from .llm.gemini_handler import GeminiHandler
+
+        await asyncio.to_thread(lambda: (CerebrasHandler().get_langchain_llm(), GeminiHandler().get_langchain_llm()))
+
+    steps = {
+        "workflow": compile_workflow,
+        "llm_sdks": load_llm_sdks,
+        "rag": lambda: asyncio.to_thread(rag_engine.initialize),
+        # Loads the tokenizer and counts the static prompt tokens reported by /debug/prompts
+        "prompts": lambda: asyncio.to_thread(prompt_stats),
+    }
+
+    # Warm-up: pay the first-request costs (model load, index handshake, TLS) before /ready flips.
+    # Connection pools are per process, so every worker opens its own. The model load and the
+    # paid one-token completions serve the whole host, so only the elected leader runs them;
+    # followers wait (up to init_timeout_s) for the leader to finish before reporting ready.
+    warmup_cfg = config["llm_processor"].get("startup", {}).get("warmup", {})
+    if warmup_cfg.get("enabled", True):
+        connections = warmup_cfg.get("connections", 2)
+        leader_lock = get_leader_lock()
+        if leader_lock.is_leader:
+            if warmup_cfg.get("rag", True):
+                steps["warmup:rag"] = lambda: rag_engine.warm_up(connections)
+            if warmup_cfg.get("completions", True):
+                steps["warmup:cerebras"] = lambda: cerebras_client.warm_up(connections)
+                steps["warmup:gemini"] = lambda: gemini_client.warm_up(connections)
+        else:
+            if warmup_cfg.get("rag", True):
+                steps["warmup:rag"] = lambda: rag_engine.prewarm(connections)
+            if warmup_cfg.get("completions", True):
+                steps["warmup:cerebras"] = lambda: cerebras_client.prewarm(connections)
+                steps["warmup:gemini"] = lambda: gemini_client.prewarm(connections)
+            steps["warmup:leader"] = leader_lock.wait_until_warmed
+        steps["warmup:helius"] = lambda: context_builder.warm_up(connections)
+    return steps
 
-# Initialize LangGraph workflow
-try:
-    chat_workflow = create_chat_workflow()
-except Exception as e:
-    print(f"Warning: Failed to initialize LangGraph workflow: {e}")
-    chat_workflow = None
 
 langsmith_cfg = config["global"].get("langsmith", {})
 if langsmith_cfg.get("enabled"):
@@ -50,60 +227,171 @@ class ProcessPromptResponse(BaseModel):
 
 
 @app.post("/process_prompt", response_model=ProcessPromptResponse)
-async def process_prompt(payload: ProcessPromptRequest) -> ProcessPromptResponse:
-    base_context_blocks: List[str] = []
-    if payload.context:
-        base_context_blocks.append(
-            "Client context: " + json.dumps(payload.context, ensure_ascii=False)
-        )
+async def process_prompt(payload: ProcessPromptRequest) -> FastJSONResponse:
+    key = flight_key(payload.userWallet, normalize_text(payload.prompt), payload.context)
+    return FastJSONResponse(await prompt_flights.do(key, lambda: _process_prompt(payload)))
 
+
+async def _process_prompt(payload: ProcessPromptRequest) -> ProcessPromptResponse:
     wallet_context = await context_builder.build_wallet_context(payload.userWallet)
-    base_context_blocks.extend(wallet_context.text_blocks)
+    try:
+        rag_result = await rag_engine.retrieve_context(payload.prompt)
+    except Exception as exc:  # noqa: BLE001
+        rag_result = exc
+    return await _answer_prompt(payload, wallet_context, rag_result)
+
+
+async def _answer_prompt(
+    payload: ProcessPromptRequest,
+    wallet_context: WalletContext,
+    rag_result: Union[RetrievedContext, BaseException],
+) -> ProcessPromptResponse:
+    """Pack client, wallet and retrieved context for ``payload`` and generate the completion."""
+    context_blocks: List[ContextBlock] = []
+    if payload.context:
+        context_blocks.append(ContextBlock(
+            id="client",
+            kind="client",
+            text="Client context: " + json.dumps(payload.context, ensure_ascii=False),
+            score=context_packer.client_context_score,
+        ))
+
+    context_blocks.extend(
+        ContextBlock(id=f"wallet-{idx}", kind="wallet", text=block, score=context_packer.wallet_block_score)
+        for idx, block in enumerate(wallet_context.text_blocks)
+    )
 
     rag_docs: List[str] = []
+    doc_scores: List[float] = []
     scores: Dict[str, Any] = {}
-    try:
-        rag_docs, scores = await rag_engine.retrieve_context(payload.prompt)
+    if isinstance(rag_result, BaseException):
+        scores = {"error": "rag_failure"}
+    else:
+        rag_docs, doc_scores, scores = rag_result
         if rag_docs:
             rag_engine.trace(payload.prompt, rag_docs)
-    except Exception:  # noqa: BLE001
-        rag_docs = []
-        scores = {"error": "rag_failure"}
 
-    aggregated_context = "\n---\n".join(base_context_blocks + rag_docs)
+    context_blocks.extend(
+        ContextBlock(id=f"doc-{idx}", kind="rag", text=doc, score=score)
+        for idx, (doc, score) in enumerate(zip(rag_docs, doc_scores))
+    )
 
-    try:
-        result = await cerebras_client.generate(payload.prompt, aggregated_context)
-        model_provider = config["llm_processor"]["provider"]
-    except Exception:  # noqa: BLE001
-        result = await gemini_client.generate(payload.prompt, aggregated_context)
-        rag_docs.append("[Fallback] Gemini response used due to Cerebras failure")
-        model_provider = "GEMINI"
+    # Cerebras first, Gemini as fallback; spill-over may swap them when Cerebras is saturated.
+    # The same context goes to whichever answers, so it must fit the smaller window
+    clients = {"CEREBRAS": cerebras_client, "GEMINI": gemini_client}
+    smallest_window = min(clients, key=context_packer.context_window)
+    packed = context_packer.pack(context_blocks, smallest_window, overhead=payload.prompt)
+    aggregated_context = packed.join()
 
-    wallet_citations = [
-        {"id": f"wallet-{idx}", "excerpt": block[:160]}
-        for idx, block in enumerate(wallet_context.text_blocks)
-    ]
-    citations = wallet_citations + [
-        {"id": f"doc-{idx}", "excerpt": doc[:160]}
-        for idx, doc in enumerate(rag_docs)
-    ]
+    estimated_tokens = rate_limiter.estimate_tokens(payload.prompt + aggregated_context)
+    primary = rate_limiter.route("CEREBRAS", estimated_tokens)
+    fallback = "GEMINI" if primary == "CEREBRAS" else "CEREBRAS"
+    model_provider = primary
+
+    extra_citations: List[Dict[str, Any]] = []
+    try:
+        result = await clients[primary].generate(payload.prompt, aggregated_context)
+    except DeadlineExceeded:
+        raise
+    except Exception as primary_error:  # noqa: BLE001
+        try:
+            result = await clients[fallback].generate(payload.prompt, aggregated_context)
+        except RateLimitExceeded as exc:
+            raise HTTPException(
+                status_code=503,
+                detail="LLM providers are rate limited, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_s)))},
+            ) from primary_error
+        extra_citations.append({
+            "id": f"doc-{len(rag_docs)}",
+            "excerpt": f"[Fallback] {fallback.title()} response used due to {primary.title()} failure",
+        })
+        model_provider = fallback
+
+    citations = [
+        {"id": block.id, "excerpt": block.text[:160]}
+        for block in packed.included
+        if block.kind != "client"
+    ] + extra_citations
     meta = {
         "rag_scores": scores,
         "model": model_provider,
         "wallet_context": wallet_context.metadata,
+        "context_budget": packed.as_meta(),
     }
     return ProcessPromptResponse(completion=result.get("completion", ""), citations=citations, meta=meta)
 
 
+class ProcessPromptBatchRequest(BaseModel):
+    items: List[ProcessPromptRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+@app.post("/process_prompt/batch")
+async def process_prompt_batch(payload: ProcessPromptBatchRequest) -> StreamingResponse:
+    """
+    Answer many prompts in one request, streamed back as NDJSON in completion order.
+
+    Each line is ``{"index": i, "result": {...}}`` or ``{"index": i, "error": {"status", "detail"}}``.
+    Prompts are embedded together and searched concurrently, each wallet's context is
+    fetched once, and completions run under the process-wide ``batch.llm_concurrency`` cap.
+    """
+    items = payload.items
+    wallets = list(dict.fromkeys(item.userWallet for item in items))
+    wallet_results, rag_results = await asyncio.gather(
+        asyncio.gather(*(context_builder.build_wallet_context(wallet) for wallet in wallets)),
+        rag_engine.retrieve_context_many([item.prompt for item in items]),
+    )
+    wallet_contexts = dict(zip(wallets, wallet_results))
+
+    async def answer(index: int) -> Dict[str, Any]:
+        item = items[index]
+        try:
+            async with batch_llm_slots:
+                response = await _answer_prompt(item, wallet_contexts[item.userWallet], rag_results[index])
+            return {"index": index, "result": response}
+        except HTTPException as exc:
+            return {"index": index, "error": {"status": exc.status_code, "detail": exc.detail}}
+        except DeadlineExceeded as exc:
+            return {"index": index, "error": {"status": 504, "detail": f"Request deadline exceeded: {exc}"}}
+        except Exception as exc:  # noqa: BLE001
+            return {"index": index, "error": {"status": 500, "detail": str(exc)}}
+
+    async def stream() -> AsyncIterator[bytes]:
+        tasks = [asyncio.create_task(answer(index)) for index in range(len(items))]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield dumps(await finished) + b"\n"
+        finally:
+            # Client disconnected mid-stream: stop the remaining completions
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 # =============================================================================
 # LangGraph Chat Endpoint (New Implementation)
 # =============================================================================
 
+class RetrievalOverrides(BaseModel):
+    top_k: Optional[int] = Field(None, ge=1, le=50, description="Documents passed to synthesis")
+    fetch_k: Optional[int] = Field(None, ge=1, le=200, description="Candidates fetched before filtering")
+    mmr: Optional[bool] = Field(None, description="Diversify results with Maximal Marginal Relevance")
+    lambda_mult: Optional[float] = Field(None, ge=0.0, le=1.0, description="MMR relevance/diversity trade-off")
+    min_score: Optional[float] = Field(None, description="Drop documents scoring below this value")
+    max_per_source: Optional[int] = Field(None, ge=1, description="Maximum documents from the same source")
+    rerank: Optional[bool] = Field(None, description="Reorder candidates with the cross-encoder reranker")
+
+
 class LangGraphChatRequest(BaseModel):
     query: str = Field(..., min_length=1, description="User's question or query")
     user_wallet: Optional[str] = Field(None, description="User's Solana wallet address")
     include_portfolio_context: bool = Field(True, description="Whether to include user's portfolio context")
+    retrieval_options: Optional[RetrievalOverrides] = Field(None, description="Per-request retrieval tuning")
+    profile: bool = Field(False, description="Sample the process while this request runs (requires profiling.per_request)")
+    session_id: Optional[str] = Field(
+        None, max_length=128, description="Conversation to continue (a new one is started if omitted)"
+    )
 
 
 class LangGraphChatResponse(BaseModel):
@@ -112,19 +400,70 @@ class LangGraphChatResponse(BaseModel):
     sources: List[str] = Field(default_factory=list, description="Source documents or URLs used")
     confidence: float = Field(..., description="Confidence score of the response")
     workflow_steps: List[Dict[str, Any]] = Field(default_factory=list, description="Track each workflow step")
+    profile: Optional[Dict[str, Any]] = Field(None, description="Sampling profile when requested")
+    session_id: Optional[str] = Field(None, description="Conversation id to send with follow-up queries")
 
 
 @app.post("/chat/langgraph", response_model=LangGraphChatResponse)
-async def chat_langgraph(payload: LangGraphChatRequest) -> LangGraphChatResponse:
+async def chat_langgraph(payload: LangGraphChatRequest) -> FastJSONResponse:
     """
     Process chat query using LangGraph workflow with intent detection and routing
     """
+    if session_memory.enabled and not payload.session_id:
+        # A new conversation gets its id before single-flight: concurrent first messages
+        # must not share (and then both continue) one session
+        payload = payload.model_copy(update={"session_id": uuid.uuid4().hex})
+    if not payload.profile:
+        key = flight_key(
+            payload.user_wallet,
+            normalize_text(payload.query),
+            payload.include_portfolio_context,
+            payload.retrieval_options.model_dump(exclude_none=True) if payload.retrieval_options else None,
+            payload.session_id,
+        )
+        return FastJSONResponse(await chat_flights.do(key, lambda: _run_chat_workflow(payload)))
+    if not profiling_service.per_request:
+        raise HTTPException(status_code=403, detail="Per-request profiling is disabled")
+    try:
+        profiler = profiling_service.start()
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    try:
+        response = await _run_chat_workflow(payload)
+    finally:
+        profiling_service.stop(profiler)
+    # Samples cover every thread in the process, not only this request
+    response.profile = {**profiler.summary(), "collapsed": profiler.collapsed()}
+    return FastJSONResponse(response)
+
+
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn(coro: Any) -> None:
+    """Run ``coro`` detached from the request, holding a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _run_chat_workflow(payload: LangGraphChatRequest) -> LangGraphChatResponse:
+    chat_workflow = await asyncio.to_thread(langgraph_workflow.get_chat_workflow)
     if not chat_workflow:
         raise HTTPException(
             status_code=503,
             detail="LangGraph workflow not available"
         )
     
+    # Session memory is keyed by wallet and session id
+    session_id = payload.session_id if session_memory.enabled else None
+    memory_key = payload.user_wallet or "anonymous"
+    provider = get_config()["llm_processor"]["provider"]
+    history_task = (
+        asyncio.create_task(session_memory.history(memory_key, session_id, payload.query, provider))
+        if session_id else None
+    )
+
     # Build context
     context_parts = []
     
@@ -134,6 +473,7 @@ async def chat_langgraph(payload: LangGraphChatRequest) -> LangGraphChatResponse
             context_parts.extend(wallet_context.text_blocks)
         except Exception as e:
             context_parts.append(f"Wallet context unavailable: {str(e)}")
+    conversation_history = await history_task if history_task else ""
     
     context_str = "\n---\n".join(context_parts) if context_parts else "No additional context"
     
@@ -141,6 +481,7 @@ async def chat_langgraph(payload: LangGraphChatRequest) -> LangGraphChatResponse
     workflow_input = {
         "query": payload.query,
         "context": context_str,
+        "conversation_history": conversation_history,
         # Initialize other state fields
         "intent": "",
         "intent_confidence": 0.0,
@@ -152,6 +493,7 @@ async def chat_langgraph(payload: LangGraphChatRequest) -> LangGraphChatResponse
         "rag_sources": [],
         "crawl_response": None,
         "crawl_url": None,
+        "retrieval_options": payload.retrieval_options.model_dump(exclude_none=True) if payload.retrieval_options else {},
         "final_response": "",
         "sources": [],
         "confidence": 0.0,
@@ -166,40 +508,26 @@ async def chat_langgraph(payload: LangGraphChatRequest) -> LangGraphChatResponse
         # Stream through workflow to track steps
         async for event in chat_workflow.astream(workflow_input):
             for node_name, node_state in event.items():
-                step = {
-                    "node": node_name,
-                    "status": "completed"
-                }
-                
-                # Add specific info based on node type
-                if node_name == "intent_detection":
-                    step["intent"] = node_state.get("intent")
-                    step["confidence"] = node_state.get("intent_confidence")
-                    step["reasoning"] = node_state.get("intent_reasoning")
-                elif node_name == "chat":
-                    step["response_preview"] = (node_state.get("chat_response") or "")[:200]
-                elif node_name == "retrieval":
-                    step["sources_count"] = len(node_state.get("rag_sources", []))
-                    step["confidence"] = node_state.get("confidence")
-                elif node_name == "crawl_web":
-                    step["url"] = node_state.get("crawl_url")
-                    step["success"] = node_state.get("metadata", {}).get("crawl_success")
-                elif node_name == "final_synthesis":
-                    step["final"] = True
-                
-                workflow_steps.append(step)
+                workflow_steps.append(describe_step(node_name, node_state))
                 final_result = node_state
         
         if not final_result:
             raise ValueError("Workflow did not produce final result")
         
+        if session_id:
+            # Stored after the response is sent: embedding and writing the turn add no latency
+            _spawn(session_memory.record(memory_key, session_id, payload.query, final_result["final_response"]))
+
         return LangGraphChatResponse(
             response_text=final_result["final_response"],
             intent_used=final_result.get("metadata", {}).get("intent", "unknown"),
             sources=final_result["sources"],
             confidence=final_result["confidence"],
-            workflow_steps=workflow_steps
+            workflow_steps=workflow_steps,
+            session_id=session_id,
         )
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -216,6 +544,7 @@ class CrawlResponse(BaseModel):
     documents_crawled: int
     chunks_prepared: int
     message: str
+    dedup: Dict[str, Any] = Field(default_factory=dict)
 
 
 @app.post("/admin/crawl", response_model=CrawlResponse)
@@ -224,13 +553,14 @@ async def trigger_crawl(payload: CrawlRequest) -> CrawlResponse:
     Admin endpoint to trigger Firecrawl crawling and indexing.
     Requires RAG to be enabled in config.
     """
-    if not config["llm_processor"]["rag"].get("enabled"):
+    if not get_config()["llm_processor"]["rag"].get("enabled"):
         raise HTTPException(status_code=400, detail="RAG is not enabled in config")
     
     try:
         from .data_ingestion.firecrawl_worker import FirecrawlWorker
         from .rag.embeddings import OllamaEmbeddingClient
-        from .rag.vector_store import PineconeVectorStore
+        from .rag.lexical_index import index_documents
+        from .rag.vector_store import PineconeVectorStore, document_id
         
         worker = FirecrawlWorker()
         
@@ -249,8 +579,9 @@ async def trigger_crawl(payload: CrawlRequest) -> CrawlResponse:
                 message="No documents were crawled"
             )
         
-        # Prepare chunks
+        # Prepare chunks (collapses duplicate boilerplate when enabled)
         chunks = worker.prepare_for_indexing(documents)
+        dedup_stats = worker.last_dedup_report.as_dict() if worker.last_dedup_report else {}
         
         # Generate embeddings
         embedding_client = OllamaEmbeddingClient()
@@ -263,11 +594,15 @@ async def trigger_crawl(payload: CrawlRequest) -> CrawlResponse:
         vector_store = PineconeVectorStore()
         result = await vector_store.upsert_documents(chunks, embeddings)
         
+        # Keep the BM25 index in step with the vector store (file lock, rebuild and save block)
+        await asyncio.to_thread(index_documents, [{**chunk, "id": document_id(chunk)} for chunk in chunks])
+        
         return CrawlResponse(
             status="success",
             documents_crawled=len(documents),
             chunks_prepared=result['upserted'],
-            message=f"Successfully indexed {result['upserted']} chunks from {len(documents)} documents"
+            message=f"Successfully indexed {result['upserted']} chunks from {len(documents)} documents",
+            dedup=dedup_stats,
         )
         
     except Exception as e:
@@ -276,9 +611,56 @@ async def trigger_crawl(payload: CrawlRequest) -> CrawlResponse:
 
 @app.get("/health")
 async def health() -> Dict[str, str]:
+    """Liveness: the process is up and serving"""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness: startup initialization has finished (503 until then)"""
+    startup = get_startup_state()
+    content = {**startup.as_dict(), "pid": os.getpid(), "startup_leader": get_leader_lock().is_leader}
+    return JSONResponse(status_code=200 if startup.ready else 503, content=content)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus metrics (stage latency histograms, cache hit counts, in-flight requests)"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/profile")
+async def profile_process(seconds: float = 10.0, format: str = "collapsed") -> Any:
+    """
+    Sample the live process for N seconds and return collapsed stacks
+    (flamegraph.pl / speedscope input), or a JSON summary with format=json
+    """
+    if not profiling_service.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    try:
+        profiler = await profiling_service.profile_for(seconds)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if format == "json":
+        return {**profiler.summary(), "collapsed": profiler.collapsed()}
+    return PlainTextResponse(profiler.collapsed())
+
+
+@app.get("/debug/prompts")
+async def debug_prompts() -> Dict[str, Any]:
+    """Prompt templates with their variables and static prefix/suffix token counts"""
+    return {"prompts": await asyncio.to_thread(prompt_stats)}
+
+
+@app.get("/debug/traces")
+async def debug_traces(limit: int = 20) -> Dict[str, Any]:
+    """Slowest recent request traces with their span trees"""
+    tracer = get_tracer()
+    if not tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    return {"traces": tracer.store.slowest(limit)}
+
+
 # ============================================================================
 # SHOWCASE ENDPOINTS - Mock data for demo purposes
 # ============================================================================
@@ -306,7 +688,7 @@ class WalletAnalysisResponse(BaseModel):
 
 
 @app.post("/api/wallet/analyze", response_model=WalletAnalysisResponse)
-async def analyze_wallet(payload: WalletAnalysisRequest) -> WalletAnalysisResponse:
+async def analyze_wallet(payload: WalletAnalysisRequest) -> FastJSONResponse:
     """Analyze wallet portfolio and provide insights"""
     
     # Get mock portfolio data
@@ -328,14 +710,14 @@ async def analyze_wallet(payload: WalletAnalysisRequest) -> WalletAnalysisRespon
         "Explore liquid staking options to earn passive income on SOL holdings"
     ]
     
-    return WalletAnalysisResponse(
+    return FastJSONResponse(WalletAnalysisResponse(
         wallet_address=payload.wallet_address,
         portfolio=portfolio,
         recent_transactions=transactions,
         total_value_usd=round(total_value, 2),
         risk_score=risk_score,
         recommendations=recommendations[:3]
-    )
+    ))
 
 
 @app.get("/api/market/overview")
@@ -416,6 +798,7 @@ async def get_user_account(wallet_address: str) -> Dict[str, Any]:
     
     account = MockUserAccountService.get_user_account(wallet_address)
     query_history = MockUserAccountService.get_query_history(wallet_address, limit=5)
+    observed = query_stats()
     
     return {
         "account": account,
@@ -423,20 +806,47 @@ async def get_user_account(wallet_address: str) -> Dict[str, Any]:
         "usage_stats": {
             "total_queries": account["total_queries"],
             "total_spent": round(account["total_queries"] * 0.5, 2),
-            "avg_response_time_ms": 1250,
-            "success_rate": 99.5
+            "avg_response_time_ms": observed["avg_response_time_ms"],
+            "success_rate": observed["success_rate"]
         }
     }
 
 
 @app.post("/api/rag/search")
-async def search_knowledge_base(query: str = "DeFi risks", top_k: int = 5) -> Dict[str, Any]:
-    """Search the RAG knowledge base"""
+async def search_knowledge_base(
+    query: str = "DeFi risks",
+    top_k: int = 5,
+    mode: str = "hybrid",
+) -> Dict[str, Any]:
+    """Search the RAG knowledge base (vector, lexical or hybrid)"""
+    
+    if mode not in RETRIEVAL_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(RETRIEVAL_MODES)}")
     
-    documents = MockRAGService.search_documents(query, top_k)
+    documents: List[Dict[str, Any]] = []
+    try:
+        options = rag_engine.default_options.override(top_k=top_k)
+        results = await rag_engine.search(query, options, mode=mode)
+        documents = [
+            {
+                "text": doc.get("text", ""),
+                "source": doc.get("source_url") or doc.get("source", "Unknown"),
+                "title": doc.get("source") or doc.get("title", ""),
+                "relevance": round(doc.get("score", 0.0), 4),
+            }
+            for doc in results
+        ]
+    except Exception:  # noqa: BLE001
+        documents = []
+    
+    if not documents:
+        # Nothing indexed yet (or backends down): fall back to the demo corpus
+        documents = MockRAGService.search_documents(query, top_k)
+        mode = "mock"
     
     return {
         "query": query,
+        "mode": mode,
         "results": documents,
         "count": len(documents),
         "sources": list(set(doc["source"] for doc in documents))
@@ -510,12 +920,15 @@ async def platform_stats() -> Dict[str, Any]:
     
     from datetime import datetime
     
+    observed = query_stats()
+    
     return {
         "total_users": 1247,
         "total_queries": 15832,
         "total_transactions": 8956,
         "total_volume_usd": 4523789.50,
-        "avg_response_time_ms": 1150,
+        "avg_response_time_ms": observed["avg_response_time_ms"],
+        "observed_queries": observed["count"],
         "uptime_pct": 99.97,
         "active_users_24h": 342,
         "queries_24h": 1891,
@@ -533,7 +946,7 @@ from datetime import datetime
 async def rag_status() -> Dict[str, Any]:
     """Get RAG system status and statistics"""
     
-    rag_config = config["llm_processor"]["rag"]
+    rag_config = get_config()["llm_processor"]["rag"]
     is_enabled = rag_config.get("enabled", False)
     
     return {
@@ -544,13 +957,13 @@ async def rag_status() -> Dict[str, Any]:
             "status": "ready" if is_enabled else "disabled"
         },
         "embedding_model": {
-            "provider": config["llm_processor"]["ollama_embedding"]["provider"],
-            "model": config["llm_processor"]["ollama_embedding"]["model"],
+            "provider": get_config()["llm_processor"]["ollama_embedding"]["provider"],
+            "model": get_config()["llm_processor"]["ollama_embedding"]["model"],
             "dimension": 1024
         },
         "indexed_documents": 156 if is_enabled else 0,
         "last_index_update": "2025-10-27T10:30:00Z" if is_enabled else None,
-        "sources": config["llm_processor"]["firecrawl"]["source_urls"]
+        "sources": get_config()["llm_processor"]["firecrawl"]["source_urls"]
     }
 
 
@@ -558,10 +971,10 @@ async def rag_status() -> Dict[str, Any]:
 async def get_configuration() -> Dict[str, Any]:
     """Get system configuration (sanitized)"""
     
-    llm_config = config["llm_processor"]
+    llm_config = get_config()["llm_processor"]
     
     return {
-        "environment": config["global"]["environment"],
+        "environment": get_config()["global"]["environment"],
         "llm_provider": llm_config["provider"],
         "models": {
             "cerebras": {
@@ -604,7 +1017,7 @@ async def llm_completion(payload: CompletionRequest) -> Dict[str, Any]:
     
     try:
         # Use configured LLM provider
-        provider = config["llm_processor"]["provider"]
+        provider = get_config()["llm_processor"]["provider"]
         
         if provider == "CEREBRAS":
             # Use the generate method with empty context for direct completion
@@ -622,7 +1035,7 @@ async def llm_completion(payload: CompletionRequest) -> Dict[str, Any]:
         
         return {
             "completion": response,
-            "model": config["llm_processor"][provider.lower()]["model_name"],
+            "model": get_config()["llm_processor"][provider.lower()]["model_name"],
             "provider": provider,
             "tokens_used": len(response.split()),  # Approximation
             "prompt_length": len(payload.prompt)
@@ -636,7 +1049,7 @@ async def llm_completion(payload: CompletionRequest) -> Dict[str, Any]:
 async def available_models() -> Dict[str, Any]:
     """Get list of available LLM models"""
     
-    llm_config = config["llm_processor"]
+    llm_config = get_config()["llm_processor"]
     
     return {
         "primary_provider": llm_config["provider"],
@@ -644,14 +1057,14 @@ async def available_models() -> Dict[str, Any]:
             "cerebras": {
                 "name": llm_config["cerebras"]["model_name"],
                 "description": "Cerebras LLaMA 3.3 70B - Ultra-fast inference",
-                "context_window": 8192,
+                "context_window": context_packer.context_window("CEREBRAS"),
                 "pricing": "Free tier available",
                 "status": "available"
             },
             "gemini": {
                 "name": llm_config["gemini"]["model_name"],
                 "description": "Google Gemini 2.0 Flash - Multimodal AI",
-                "context_window": 32768,
+                "context_window": context_packer.context_window("GEMINI"),
                 "pricing": "Free tier: 1500 requests/day",
                 "status": "available"
             }
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .spans import span
+
+# LLM-bound routes whose latency is reported as "response time" by the stats endpoints
+QUERY_ROUTES = ("/process_prompt", "/chat/langgraph")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, label_names)
+        self._buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        slot = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self._buckets) + 1))
+            counts[slot] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def summary(self, **labels: str) -> Tuple[int, float]:
+        """(count, sum) across label sets matching the given labels."""
+        count, total = 0, 0.0
+        with self._lock:
+            for key, counts in self._counts.items():
+                if all(key[self.label_names.index(name)] == str(value) for name, value in labels.items()):
+                    count += sum(counts)
+                    total += self._sums[key]
+        return count, total
+
+    def mean(self, **labels: str) -> Optional[float]:
+        count, total = self.summary(**labels)
+        return total / count if count else None
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self._buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+                    )
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "solai_stage_duration_seconds",
+    "Latency of pipeline stages (wallet context, embedding, vector search, nodes, LLM calls, crawl).",
+    ("stage", "outcome"),
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "solai_http_request_duration_seconds",
+    "End-to-end latency of HTTP requests by route.",
+    ("route", "method", "status"),
+))
+HTTP_ERRORS = REGISTRY.register(Counter(
+    "solai_http_request_errors_total",
+    "HTTP requests that ended with a 5xx status by route.",
+    ("route",),
+))
+INFLIGHT = REGISTRY.register(Gauge(
+    "solai_inflight_requests",
+    "Requests currently being processed by route.",
+    ("route",),
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "solai_cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss).",
+    ("cache", "result"),
+))
+ADMISSION_QUEUE = REGISTRY.register(Gauge(
+    "solai_admission_queued_requests",
+    "Requests waiting for an admission slot by route.",
+    ("route",),
+))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "solai_admission_rejected_total",
+    "Requests rejected by admission control by route and reason (queue_full, deadline).",
+    ("route", "reason"),
+))
+RATE_LIMIT_SPILLOVER = REGISTRY.register(Counter(
+    "solai_llm_spillover_total",
+    "LLM calls routed away from a saturated provider by source and target provider.",
+    ("source", "target"),
+))
+RETRIES = REGISTRY.register(Counter(
+    "solai_outbound_retries_total",
+    "Retried outbound calls by client and reason (429, 5xx, connect).",
+    ("client", "reason"),
+))
+SINGLE_FLIGHT = REGISTRY.register(Counter(
+    "solai_single_flight_calls_total",
+    "Deduplicated calls by flight and role (leader ran the work, shared awaited a leader).",
+    ("flight", "role"),
+))
+CONFIG_RELOADS = REGISTRY.register(Counter(
+    "solai_config_reloads_total",
+    "Config file changes by result (applied, unchanged, invalid).",
+    ("result",),
+))
+
+
+@contextmanager
+def time_stage(stage: str, **attributes: Any) -> Iterator[None]:
+    """Record the duration of the wrapped block in the stage histogram and as a trace span."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with span(stage, **attributes):
+            yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage, outcome=outcome)
+
+
+def record_request(route: str, method: str, status: int, seconds: float) -> None:
+    HTTP_LATENCY.observe(seconds, route=route, method=method, status=str(status))
+    if status >= 500:
+        HTTP_ERRORS.inc(route=route)
+
+
+def query_stats() -> Dict[str, Any]:
+    """Observed request count, mean latency and success rate of the query endpoints."""
+    count, total, errors = 0, 0.0, 0.0
+    for route in QUERY_ROUTES:
+        route_count, route_total = HTTP_LATENCY.summary(route=route)
+        count += route_count
+        total += route_total
+        errors += HTTP_ERRORS.value(route=route)
+    return {
+        "count": count,
+        "avg_response_time_ms": round(total / count * 1000, 1) if count else None,
+        "success_rate": round(100.0 * (1 - errors / count), 2) if count else None,
+    }
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result="miss")
+
+
+def cache_hit_ratio(cache: str) -> Optional[float]:
+    hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.value(cache=cache, result="miss")
+    return hits / (hits + misses) if hits + misses else None
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from ..settings import get_config
+
+# Leaf frames of threads parked in the event loop's selector, a lock/queue wait or an idle executor worker
+_IDLE_LEAF_FILES = ("selectors.py", "threading.py", "queue.py", "thread.py")
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profiling session is already running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples every thread's Python stack from a background thread.
+
+    Stacks are aggregated in collapsed form (``root;...;leaf count``), which
+    flamegraph.pl, speedscope and inferno read directly. Sampling never touches
+    the profiled threads, so overhead is one stack walk per thread per interval.
+    """
+
+    def __init__(self, interval_s: float = 0.005, include_idle: bool = False) -> None:
+        self._interval = interval_s
+        self._include_idle = include_idle
+        self._counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration_s = 0.0
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration_s = time.monotonic() - self.started_at
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if not self._include_idle and os.path.basename(frame.f_code.co_filename) in _IDLE_LEAF_FILES:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._counts.most_common())
+
+    def summary(self, top: int = 20) -> Dict[str, object]:
+        """Sample counts plus the hottest leaf functions by self time."""
+        leaves: Counter = Counter()
+        for stack, count in self._counts.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(self._counts.values())
+        return {
+            "duration_s": round(self.duration_s, 3),
+            "ticks": self.samples,
+            "stack_samples": total,
+            "hottest": [
+                {"frame": frame, "samples": count, "percent": round(100.0 * count / total, 2)}
+                for frame, count in leaves.most_common(top)
+            ],
+        }
+
+
+class ProfilingService:
+    """Config-guarded entry point that allows one profiling session at a time."""
+
+    def __init__(self) -> None:
+        cfg = get_config()["llm_processor"].get("profiling", {})
+        self.enabled = cfg.get("enabled", False)
+        self.per_request = self.enabled and cfg.get("per_request", False)
+        self.max_duration_s = cfg.get("max_duration_s", 60)
+        self._interval = cfg.get("interval_ms", 5) / 1000.0
+        self._include_idle = cfg.get("include_idle", False)
+        self._lock = threading.Lock()
+
+    def start(self) -> SamplingProfiler:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profiling session is already running")
+        profiler = SamplingProfiler(self._interval, self._include_idle)
+        profiler.start()
+        return profiler
+
+    def stop(self, profiler: SamplingProfiler) -> None:
+        try:
+            profiler.stop()
+        finally:
+            self._lock.release()
+
+    async def profile_for(self, seconds: float) -> SamplingProfiler:
+        """Sample the live process for ``seconds`` (capped at ``max_duration_s``)."""
+        profiler = self.start()
+        try:
+            await asyncio.sleep(min(seconds, self.max_duration_s))
+        finally:
+            self.stop(profiler)
+        return profiler
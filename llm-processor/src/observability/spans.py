@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_OTLP_PATH = Path(__file__).parent.parent.parent / "data" / "spans.otlp.jsonl"
+
+
+class Span:
+    """A timed operation inside a request trace."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace: "_Trace", parent_id: Optional[str]) -> None:
+        self.name = name
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class _Trace:
+    def __init__(self, max_spans: int) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._max_spans = max_spans
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < self._max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def as_dict(self, root: Span) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "duration_ms": round(root.duration_ms, 3),
+            "status": root.status,
+            "dropped_spans": self.dropped,
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "offset_ms": round((span.start_ns - root.start_ns) / 1e6, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                    "status": span.status,
+                    "attributes": span.attributes,
+                }
+                for span in sorted(self.spans, key=lambda span: span.start_ns)
+            ],
+        }
+
+
+class SlowTraceStore:
+    """Keeps the N slowest completed traces in a min-heap."""
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Dict[str, Any]) -> None:
+        item = (trace["duration_ms"], next(self._counter), trace)
+        with self._lock:
+            if len(self._heap) < self._capacity:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def slowest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._heap, key=lambda item: item[0], reverse=True)
+        return [trace for _, _, trace in ranked[:limit]]
+
+
+class OtlpFileExporter:
+    """Writes finished traces as OTLP/JSON ``ExportTraceServiceRequest`` lines from a writer thread."""
+
+    def __init__(self, path: Path, service_name: str) -> None:
+        self._path = path
+        self._service_name = service_name
+        self._queue: "queue.SimpleQueue[_Trace]" = queue.SimpleQueue()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        threading.Thread(target=self._drain, name="otlp-file-exporter", daemon=True).start()
+
+    def export(self, trace: _Trace) -> None:
+        self._queue.put(trace)
+
+    def _drain(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                with self._path.open("a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(self._encode(trace), default=str) + "\n")
+            except OSError as exc:
+                logger.warning(f"OTLP file export failed: {exc}")
+
+    def _encode(self, trace: _Trace) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self._service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "solai.llm_processor"},
+                    "spans": [
+                        {
+                            "traceId": trace.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_id or "",
+                            "name": span.name,
+                            "kind": 2 if span.parent_id is None else 1,  # SERVER / INTERNAL
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+                            "status": {"code": 2 if span.status == "error" else 1},
+                        }
+                        for span in trace.spans
+                    ],
+                }],
+            }],
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Tracer:
+    def __init__(self) -> None:
+        cfg = get_config()["global"].get("tracing", {})
+        self.enabled = cfg.get("enabled", True)
+        self._max_spans = cfg.get("max_spans_per_trace", 500)
+        self.store = SlowTraceStore(cfg.get("slowest_n", 50))
+        self._exporter: Optional[OtlpFileExporter] = None
+        otlp_cfg = cfg.get("otlp_file", {})
+        if self.enabled and otlp_cfg.get("enabled"):
+            self._exporter = OtlpFileExporter(
+                Path(otlp_cfg.get("path") or _DEFAULT_OTLP_PATH),
+                get_config()["global"].get("project_name", "SolAI"),
+            )
+
+    def new_trace(self) -> _Trace:
+        return _Trace(self._max_spans)
+
+    def finish(self, trace: _Trace, root: Span) -> None:
+        self.store.add(trace.as_dict(root))
+        if self._exporter is not None:
+            self._exporter.export(trace)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("solai_current_span", default=None)
+
+
+@lru_cache(maxsize=1)
+def get_tracer() -> Tracer:
+    return Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Open a span as a child of the current one, or as the root of a new trace.
+
+    The current span travels in a context variable, so spans opened in awaited
+    coroutines and spawned tasks nest under the request's root span. When the
+    root span closes, the whole trace goes to the slow-trace store and the
+    OTLP file exporter.
+    """
+    tracer = get_tracer()
+    if not tracer.enabled:
+        yield None
+        return
+    parent = _current_span.get()
+    trace = parent.trace if parent is not None else tracer.new_trace()
+    current = Span(name, trace, parent.span_id if parent is not None else None)
+    current.attributes.update(attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "error"
+        current.attributes["error"] = repr(exc)
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add(current)
+        if parent is None:
+            tracer.finish(trace, current)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_FILE_SINK = Path(__file__).parent.parent.parent / "data" / "traces.jsonl"
+
+
+class LangsmithSink:
+    """Ships run batches to LangSmith with the batch ingest API."""
+
+    def __init__(self, cfg: Dict[str, Any]) -> None:
+        from langsmith import Client as LangsmithClient
+
+        self._client = LangsmithClient(api_key=cfg["api_key"], api_url=cfg["endpoint"])
+        self._project = cfg["project_name"]
+
+    def write(self, runs: List[Dict[str, Any]]) -> None:
+        for run in runs:
+            run["session_name"] = self._project
+        self._client.batch_ingest_runs(create=runs)
+
+
+class FileSink:
+    """Appends runs as JSON lines, for offline use or later replay."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, runs: List[Dict[str, Any]]) -> None:
+        with self._path.open("a", encoding="utf-8") as fh:
+            for run in runs:
+                fh.write(json.dumps(run, ensure_ascii=False, default=str) + "\n")
+
+
+class TraceExporter:
+    """Buffers run records in memory and exports them in batches off the request path.
+
+    ``record`` never blocks: it samples, then enqueues into a bounded queue and
+    counts a drop if the queue is full. A background task flushes batches to
+    the configured sinks from a worker thread.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()["global"].get("langsmith", {})
+        exporter_cfg = cfg.get("exporter", {})
+        self._sample_rate = exporter_cfg.get("sample_rate", 1.0)
+        self._batch_size = exporter_cfg.get("batch_size", 50)
+        self._flush_interval = exporter_cfg.get("flush_interval_s", 2.0)
+        self._max_queue = exporter_cfg.get("max_queue", 1000)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch: List[Dict[str, Any]] = []
+        self._sinks: List[Any] = []
+        self.stats = {"recorded": 0, "sampled_out": 0, "dropped": 0, "exported": 0, "export_errors": 0}
+
+        if cfg.get("enabled"):
+            try:
+                self._sinks.append(LangsmithSink(cfg))
+            except Exception as exc:
+                # LangSmith import failed (Pydantic v1/v2 conflict), keep other sinks
+                logger.warning(f"LangSmith sink disabled: {exc}")
+        file_cfg = exporter_cfg.get("file_sink", {})
+        if file_cfg.get("enabled"):
+            self._sinks.append(FileSink(Path(file_cfg.get("path") or _DEFAULT_FILE_SINK)))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._sinks)
+
+    def record(
+        self,
+        name: str,
+        run_type: str,
+        inputs: Dict[str, Any],
+        outputs: Optional[Dict[str, Any]] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queue a run for export; never blocks the caller."""
+        if not self._sinks:
+            return
+        if self._sample_rate < 1.0 and random.random() >= self._sample_rate:
+            self.stats["sampled_out"] += 1
+            return
+        if not self._ensure_started():
+            return
+
+        now = datetime.now(timezone.utc)
+        start_time = start_time or now
+        run_id = uuid.uuid4()
+        run = {
+            "id": str(run_id),
+            "trace_id": str(run_id),
+            "dotted_order": f"{start_time.strftime('%Y%m%dT%H%M%S%fZ')}{run_id}",
+            "name": name,
+            "run_type": run_type,
+            "inputs": inputs,
+            "outputs": outputs or {},
+            "start_time": start_time.isoformat(),
+            "end_time": (end_time or now).isoformat(),
+            "extra": extra or {},
+        }
+        try:
+            self._queue.put_nowait(run)
+            self.stats["recorded"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    def _ensure_started(self) -> bool:
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. a sync script): nothing to flush from, drop
+            self.stats["dropped"] += 1
+            return False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._task = loop.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch.append(await self._queue.get())
+            deadline = loop.time() + self._flush_interval
+            while len(self._batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Hand the batch off before exporting so shutdown never sends it twice
+            batch, self._batch = self._batch, []
+            await self._export(batch)
+
+    async def _export(self, batch: List[Dict[str, Any]]) -> None:
+        for sink in self._sinks:
+            try:
+                await asyncio.to_thread(sink.write, [dict(run) for run in batch])
+            except Exception as exc:  # noqa: BLE001
+                self.stats["export_errors"] += 1
+                logger.warning(f"Trace export to {type(sink).__name__} failed: {exc}")
+        self.stats["exported"] += len(batch)
+
+    async def shutdown(self) -> None:
+        """Stop the flush task and export whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            pending, self._batch = self._batch, []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for start in range(0, len(pending), self._batch_size):
+                await self._export(pending[start:start + self._batch_size])
+
+
+@lru_cache(maxsize=1)
+def get_trace_exporter() -> TraceExporter:
+    return TraceExporter()
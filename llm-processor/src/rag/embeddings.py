@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List
-
-import httpx
+from functools import partial
+from typing import Dict, List
 
+from ..observability.metrics import time_stage
+from ..serving.http import get_http_client, prewarm_connections
+from ..serving.resilience import get_retry_policy
+from ..serving.shared_cache import get_shared_cache
+from ..serving.single_flight import get_single_flight
 from ..settings import get_config
 
 
@@ -15,23 +19,84 @@ class OllamaEmbeddings:
         cfg = get_config()["llm_processor"]["ollama_embedding"]
         self._base_url = cfg["base_url"].rstrip("/")
         self._model = cfg["model"]
+        self._batch_size = cfg.get("batch_size", 32)
+        self._retry = get_retry_policy("ollama", 30.0)
+        # Shared by all worker processes, so a text is embedded once per host
+        self._cache = get_shared_cache("embedding")
+        # Per text: concurrent requests for a text already being embedded wait for it
+        self._flights = get_single_flight("embedding")
+
+    async def prewarm(self, connections: int = 1) -> None:
+        """Open pooled connections to Ollama; the pool belongs to this process."""
+        await prewarm_connections("ollama", self._base_url, connections)
+
+    async def warm_up(self, connections: int = 1) -> List[float]:
+        """Open pooled connections and embed a dummy text (makes Ollama load the model)."""
+        await self.prewarm(connections)
+        # Bypass the cache: the point is to reach Ollama
+        return (await self._embed(["warm-up"]))[0]
 
     async def embed_query(self, text: str) -> List[float]:
         """Generate embedding for a single query text."""
-        payload = {"model": self._model, "input": text}
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(f"{self._base_url}/api/embed", json=payload)
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed ``texts``, serving cached vectors, joining embeddings already in flight
+        and sending the rest to Ollama in requests of up to ``batch_size`` distinct texts.
+        """
+        results: Dict[str, List[float]] = {}
+        missing: List[str] = []
+        for text in dict.fromkeys(texts):
+            cached = self._cache.get(f"{self._model}\n{text}")
+            if cached is not None:
+                results[text] = cached
+            else:
+                missing.append(text)
+
+        # Texts already being embedded are joined; no await until every text has a task,
+        # so each one is claimed by exactly one batch
+        tasks: Dict[str, "asyncio.Future[List[float]]"] = {}
+        own: List[str] = []
+        for text in missing:
+            task = self._flights.join(f"{self._model}\n{text}")
+            if task is not None:
+                tasks[text] = task
+            else:
+                own.append(text)
+        for start in range(0, len(own), self._batch_size):
+            batch = own[start:start + self._batch_size]
+            batch_task = asyncio.ensure_future(self._embed(batch))
+            for idx, text in enumerate(batch):
+                tasks[text] = self._flights.start(f"{self._model}\n{text}", partial(self._take, batch_task, idx, text))
+        embeddings = await asyncio.gather(*(self._flights.wait(tasks[text]) for text in missing))
+        results.update(zip(missing, embeddings))
+        return [results[text] for text in texts]
+
+    async def _take(self, batch_task: "asyncio.Future[List[List[float]]]", idx: int, text: str) -> List[float]:
+        embedding = (await batch_task)[idx]
+        if embedding:
+            self._cache.set(f"{self._model}\n{text}", embedding)
+        return embedding
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        # /api/embed takes a list of inputs and returns one vector per input, in order
+        payload = {"model": self._model, "input": texts}
+
+        async def request(timeout: float) -> dict:
+            client = get_http_client("ollama")
+            response = await client.post(f"{self._base_url}/api/embed", json=payload, timeout=timeout)
             response.raise_for_status()
-            data = response.json()
-        # Ollama returns {"embeddings": [[...]]} - take first element
-        embeddings = data.get("embeddings", [[]])
-        return embeddings[0] if embeddings else []
-    
+            return response.json()
+
+        with time_stage("embedding", model=self._model, batch=len(texts)):
+            data = await self._retry.call(request)
+        embeddings = data.get("embeddings") or []
+        return [embeddings[i] if i < len(embeddings) else [] for i in range(len(texts))]
+
     async def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple documents in batch."""
-        tasks = [self.embed_query(text) for text in texts]
-        embeddings = await asyncio.gather(*tasks)
-        return embeddings
+        return await self.embed_many(texts)
 
 
 # Legacy alias for backward compatibility
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..serving.shared_cache import state_dir
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, concurrent index writers are not serialized
+    fcntl = None
+
+_DEFAULT_INDEX_PATH = Path(__file__).parent.parent.parent / "data" / "bm25_index.json"
+# Keeps symbols like "JitoSOL", "CLMM" and base58 mint addresses as single terms
+_TERM_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [term.lower() for term in _TERM_RE.findall(text)]
+
+
+class BM25Index:
+    """In-memory BM25 inverted index persisted as JSON next to the vector store."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._documents: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or replace documents in the index.
+
+        Args:
+            documents: Dicts with 'id', 'text' and optional 'metadata'
+
+        Returns:
+            Number of documents indexed
+        """
+        added = 0
+        for doc in documents:
+            doc_id = doc["id"]
+            if doc_id in self._positions:
+                self._remove(self._positions[doc_id])
+            position = len(self._documents)
+            terms = Counter(tokenize(doc["text"]))
+            for term, freq in terms.items():
+                self._postings.setdefault(term, {})[position] = freq
+            length = sum(terms.values())
+            self._documents.append({
+                "id": doc_id,
+                "text": doc["text"],
+                **doc.get("metadata", {}),
+            })
+            self._lengths.append(length)
+            self._total_length += length
+            self._positions[doc_id] = position
+            added += 1
+        return added
+
+    def _remove(self, position: int) -> None:
+        # Tombstone the slot and drop its postings; save() leaves tombstones out
+        doc = self._documents[position]
+        del self._positions[doc["id"]]
+        self._total_length -= self._lengths[position]
+        self._lengths[position] = 0
+        for term in tokenize(doc["text"]):
+            self._postings.get(term, {}).pop(position, None)
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Return the ``top_k`` documents by BM25 score, each with a ``bm25_score``."""
+        if not self._positions:
+            return []
+        doc_count = len(self._positions)
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, freq in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._lengths[position] / avg_length)
+                scores[position] = scores.get(position, 0.0) + idf * freq * (self.k1 + 1.0) / (freq + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [{**self._documents[position], "bm25_score": score} for position, score in ranked]
+
+    def save(self, path: Path) -> None:
+        live = [self._documents[position] for position in sorted(self._positions.values())]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Per-process temp name: two workers saving at once must not write into the same file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump({"k1": self.k1, "b": self.b, "documents": live}, fh, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with path.open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        index.add_documents(
+            {
+                "id": doc["id"],
+                "text": doc["text"],
+                "metadata": {key: value for key, value in doc.items() if key not in ("id", "text")},
+            }
+            for doc in data.get("documents", [])
+        )
+        return index
+
+
+def lexical_index_path() -> Path:
+    cfg = get_config()["llm_processor"]["rag"].get("lexical", {})
+    return Path(cfg.get("index_path") or _DEFAULT_INDEX_PATH)
+
+
+def _file_version(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load(path: Path) -> BM25Index:
+    if path.exists():
+        try:
+            index = BM25Index.load(path)
+            logger.info(f"Loaded BM25 index with {len(index)} documents from {path}")
+            return index
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Failed to load BM25 index from {path}: {exc}")
+    return BM25Index()
+
+
+# This process's copy of the index file, swapped whole when the file changes
+_index: Optional[BM25Index] = None
+_index_version: Optional[Tuple[int, int]] = None
+_index_checked = 0.0
+_index_lock = threading.Lock()
+_RELOAD_CHECK_S = 1.0
+
+
+def get_lexical_index() -> BM25Index:
+    """
+    Process-wide lexical index, loaded from disk on first use.
+
+    Every worker process keeps its own copy; it is reloaded (at most once per
+    ``_RELOAD_CHECK_S``) when another worker has saved a newer file.
+    """
+    global _index, _index_version, _index_checked
+    if _index is not None and time.monotonic() - _index_checked < _RELOAD_CHECK_S:
+        return _index
+    with _index_lock:
+        path = lexical_index_path()
+        version = _file_version(path)
+        if _index is None or version != _index_version:
+            _index, _index_version = _load(path), version
+        _index_checked = time.monotonic()
+        return _index
+
+
+@contextmanager
+def _index_file_lock() -> Iterator[None]:
+    """Serialize read-modify-write of the index file across worker processes."""
+    if fcntl is None:
+        yield
+        return
+    with (state_dir() / "bm25_index.lock").open("a+") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def index_documents(documents: List[Dict[str, Any]]) -> int:
+    """Add ingested chunks to the lexical index file shared by all workers (blocking)."""
+    global _index, _index_version, _index_checked
+    path = lexical_index_path()
+    with _index_file_lock():
+        # Start from the file, not this process's copy: other workers may have indexed since
+        index = _load(path)
+        added = index.add_documents(documents)
+        index.save(path)
+        with _index_lock:
+            _index, _index_version, _index_checked = index, _file_version(path), time.monotonic()
+    return added
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    key: Callable[[Dict[str, Any]], str],
+    k: int = 60,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists with Reciprocal Rank Fusion.
+
+    Each document scores ``sum(1 / (k + rank))`` over the lists it appears in.
+    The first occurrence of a document supplies its fields; the fused score is
+    stored under ``rrf_score``.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    totals: Dict[str, float] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            doc_key = key(doc)
+            fused.setdefault(doc_key, doc)
+            totals[doc_key] = totals.get(doc_key, 0.0) + 1.0 / (k + rank)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    if limit is not None:
+        ranked = ranked[:limit]
+    return [{**fused[doc_key], "rrf_score": score} for doc_key, score in ranked]
@@ -1,56 +1,312 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+import asyncio
+import json
+import logging
+from dataclasses import asdict
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
 
-if TYPE_CHECKING:
-    from langsmith import Client as LangsmithClient
-
-from ..settings import get_config
+from ..observability.trace_exporter import get_trace_exporter
+from ..serving.shared_cache import get_shared_cache
+from ..serving.single_flight import get_single_flight, normalize_text
+from ..settings import get_config, subscribe
 from .embeddings import OllamaEmbeddings
+from .lexical_index import get_lexical_index, reciprocal_rank_fusion
+from .reranker import CrossEncoderReranker
+from .selection import RetrievalOptions, search_documents
 from .vector_store import PineconeVectorStore
 
+logger = logging.getLogger(__name__)
+
+# Document texts, their scores in the same order, and the scores by document id (response meta)
+RetrievedContext = Tuple[List[str], List[float], Dict[str, float]]
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
 
 class RagEngine:
     """RAG pipeline orchestrator for SolAI MVP."""
 
     def __init__(self) -> None:
-        cfg = get_config()
-        rag_cfg = cfg["llm_processor"]["rag"]
-        self._enabled = rag_cfg.get("enabled", False)
-        self._embedding_client = OllamaEmbeddings() if self._enabled else None
+        self._reload_clients()
+        self._reload_lexical()
+        self._retrieval_options = RetrievalOptions.from_config()
+        self._reranker = CrossEncoderReranker()
+        # Runs are buffered and shipped in batches by a background task
+        self._tracer = get_trace_exporter()
+        # Final search results per (normalized query, mode, options), shared across workers
+        self._semantic_cache = get_shared_cache("semantic")
+        # Concurrent identical searches (same key as the cache) run once
+        self._flights = get_single_flight("search")
+        # On config reload rebuild only the parts whose section changed (the BM25 index,
+        # reranker model and score cache survive unrelated changes)
+        subscribe("llm_processor.rag.enabled", self._reload_clients)
+        subscribe("llm_processor.rag.vector_db", self._reload_vector_store)
+        subscribe("llm_processor.ollama_embedding", self._reload_clients)
+        subscribe("llm_processor.rag.retrieval", self._reload_options)
+        subscribe("llm_processor.rag.lexical", self._reload_lexical)
+        subscribe("llm_processor.rag.rerank", self._reload_reranker)
+
+    def _reload_clients(self, _: Optional[dict] = None) -> None:
+        # Build the replacements first and swap them in together: a search never sees
+        # ``_enabled`` set while the clients are still missing
+        enabled = get_config()["llm_processor"]["rag"].get("enabled", False)
+        embedding_client = OllamaEmbeddings() if enabled else None
+        vector_store = PineconeVectorStore() if enabled else None
+        self._enabled, self._embedding_client, self._vector_store = enabled, embedding_client, vector_store
+
+    def _reload_vector_store(self, _: Optional[dict] = None) -> None:
+        # Connects lazily on the next query
         self._vector_store = PineconeVectorStore() if self._enabled else None
-        langsmith_cfg = cfg["global"]["langsmith"]
-        self._langsmith: Any = None
-        if langsmith_cfg.get("enabled"):
+        self._reload_options()
+
+    def _reload_options(self, _: Optional[dict] = None) -> None:
+        self._retrieval_options = RetrievalOptions.from_config()
+
+    def _reload_lexical(self, _: Optional[dict] = None) -> None:
+        lexical_cfg = get_config()["llm_processor"]["rag"].get("lexical", {})
+        lexical_enabled = lexical_cfg.get("enabled", True)
+        self._lexical_enabled, self._mode, self._embed_timeout, self._rrf_k = (
+            lexical_enabled,
+            lexical_cfg.get("mode", "hybrid") if lexical_enabled else "vector",
+            lexical_cfg.get("embed_timeout_s", 5.0),
+            lexical_cfg.get("rrf_k", 60),
+        )
+
+    def _reload_reranker(self, _: Optional[dict] = None) -> None:
+        reranker = CrossEncoderReranker()
+        try:
+            # Reranking is skipped until the new model has loaded in the background
+            asyncio.get_running_loop().run_in_executor(None, reranker.load)
+        except RuntimeError:
+            reranker.load()
+        self._reranker = reranker
+        self._reload_options()
+
+    def initialize(self) -> None:
+        """Connect to the vector index and load the BM25 index and reranker ahead of the first query (blocking)."""
+        if self._vector_store is not None:
+            self._vector_store.connect()
+        if self._lexical_enabled:
+            get_lexical_index()
+        self._reranker.load()
+
+    async def prewarm(self, connections: int = 1) -> None:
+        """Open this process's pooled connections to the embedder (no model load, no query)."""
+        if self._enabled and self._embedding_client:
+            await self._embedding_client.prewarm(connections)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Dummy embedding (loads the Ollama model) followed by a one-result vector query."""
+        if not self._enabled or not self._embedding_client or not self._vector_store:
+            return
+        embedding = await self._embedding_client.warm_up(connections)
+        await asyncio.to_thread(self._vector_store.similarity_search, embedding, 1)
+
+    @property
+    def default_options(self) -> RetrievalOptions:
+        return self._retrieval_options
+
+    async def retrieve_context(
+        self,
+        prompt: str,
+        options: Optional[RetrievalOptions] = None,
+    ) -> RetrievedContext:
+        if not self._enabled or not self._embedding_client or not self._vector_store:
+            return [], [], {}
+        return self._as_context(await self.search(prompt, options))
+
+    async def retrieve_context_many(
+        self,
+        prompts: List[str],
+        options: Optional[RetrievalOptions] = None,
+    ) -> List[Union[RetrievedContext, BaseException]]:
+        """``retrieve_context`` for each prompt (see ``search_many``); failures are returned in place."""
+        if not self._enabled or not self._embedding_client or not self._vector_store:
+            return [([], [], {}) for _ in prompts]
+        results = await self.search_many(prompts, options)
+        return [result if isinstance(result, BaseException) else self._as_context(result) for result in results]
+
+    @staticmethod
+    def _as_context(documents: List[dict]) -> RetrievedContext:
+        scores = [doc.get("score", 0.0) for doc in documents]
+        # Chunks may share an id; the positional list stays aligned, the meta dict may not
+        score_meta = {doc.get("id", f"doc-{idx}"): score for idx, (doc, score) in enumerate(zip(documents, scores))}
+        return [doc.get("text", doc.get("content", "")) for doc in documents], scores, score_meta
+
+    @staticmethod
+    def _cache_key(query: str, mode: str, options: RetrievalOptions) -> str:
+        return json.dumps([normalize_text(query), mode, asdict(options)], sort_keys=True)
+
+    async def search(
+        self,
+        query: str,
+        options: Optional[RetrievalOptions] = None,
+        mode: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Retrieve documents for ``query`` by vector, lexical or hybrid search.
+
+        Hybrid mode fuses the vector results with BM25 results using reciprocal
+        rank fusion. If the embedder is down or slower than ``embed_timeout_s``,
+        the lexical results are served on their own. With ``options.rerank``
+        the candidate pool is widened to ``rerank.fetch_k`` and cut back down
+        by the cross-encoder.
+
+        Args:
+            query: Search text
+            options: Retrieval options (defaults from config)
+            mode: "vector", "lexical" or "hybrid" (defaults from config)
+
+        Returns:
+            Document metadata dicts with 'id', 'text' and 'score'
+        """
+        options = options or self._retrieval_options
+        mode = mode or self._mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        cache_key = self._cache_key(query, mode, options)
+        cached = self._semantic_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        return await self._flights.do(cache_key, lambda: self._search_and_cache(cache_key, query, options, mode))
+
+    async def _search_and_cache(
+        self,
+        cache_key: str,
+        query: str,
+        options: RetrievalOptions,
+        mode: str,
+        embedding: Optional[List[float]] = None,
+    ) -> List[dict]:
+        documents, degraded = await self._search(query, options, mode, embedding)
+        # A lexical-only or unreranked fallback is served once, never cached for everyone
+        if documents and not degraded:
+            self._semantic_cache.set(cache_key, documents)
+        return documents
+
+    async def search_many(
+        self,
+        queries: List[str],
+        options: Optional[RetrievalOptions] = None,
+        mode: Optional[str] = None,
+    ) -> List[Union[List[dict], BaseException]]:
+        """
+        ``search`` for many queries at once.
+
+        Uncached queries are embedded together (one Ollama request per
+        ``ollama_embedding.batch_size`` texts) and their vector queries run
+        concurrently. Each position holds the documents, or the exception that
+        query raised.
+        """
+        options = options or self._retrieval_options
+        mode = mode or self._mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+
+        results: Dict[str, Union[List[dict], BaseException]] = {}
+        flights: Dict[str, "asyncio.Future[List[dict]]"] = {}
+        for query in dict.fromkeys(queries):
+            cache_key = self._cache_key(query, mode, options)
+            cached = self._semantic_cache.get(cache_key)
+            if cached is not None:
+                results[query] = cached
+            elif (flight := self._flights.join(cache_key)) is not None:
+                flights[query] = flight
+        pending = [query for query in dict.fromkeys(queries) if query not in results and query not in flights]
+
+        embeddings: List[Optional[List[float]]] = [None] * len(pending)
+        embedding_client = self._embedding_client if self._enabled else None
+        if pending and mode != "lexical" and embedding_client is not None:
             try:
-                from langsmith import Client as LangsmithClient
-                self._langsmith = LangsmithClient(
-                    api_key=langsmith_cfg["api_key"],
-                    api_url=langsmith_cfg["endpoint"],
+                embeddings = await asyncio.wait_for(
+                    embedding_client.embed_many(pending), timeout=self._embed_timeout
                 )
-                self._project = langsmith_cfg["project_name"]
-            except Exception:
-                # LangSmith import failed (Pydantic v1/v2 conflict), disable tracing
-                self._langsmith = None
-                self._project = None
-        else:
-            self._project = None
-
-    async def retrieve_context(self, prompt: str) -> Tuple[List[str], Dict[str, float]]:
-        if not self._enabled or not self._embedding_client or not self._vector_store:
-            return [], {}
-        embedding = await self._embedding_client.embed_query(prompt)
-        documents = self._vector_store.similarity_search(embedding)
-        scores = {doc.get("id", f"doc-{idx}"): doc.get("score", 0.0) for idx, doc in enumerate(documents)}
-        return [doc.get("text", doc.get("content", "")) for doc in documents], scores
+            except Exception as exc:  # noqa: BLE001
+                # Each query retries on its own and falls back to lexical results if that fails too
+                logger.warning(f"Batch embedding failed ({exc!r}), embedding queries one by one")
+
+        for query, embedding in zip(pending, embeddings):
+            cache_key = self._cache_key(query, mode, options)
+            flights[query] = self._flights.start(
+                cache_key, partial(self._search_and_cache, cache_key, query, options, mode, embedding)
+            )
+        searched = await asyncio.gather(
+            *(self._flights.wait(flight) for flight in flights.values()), return_exceptions=True
+        )
+        results.update(zip(flights, searched))
+        return [results[query] for query in queries]
+
+    async def _search(
+        self,
+        query: str,
+        options: RetrievalOptions,
+        mode: str,
+        embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[dict], bool]:
+        """Documents for ``query`` and whether a fallback (no embedding, rerank over budget) degraded them."""
+        if not (options.rerank and self._reranker.available):
+            documents, degraded = await self._retrieve(query, options, mode, embedding)
+            # Unranked while the model loads: serve them, but keep them out of the cache
+            return documents, degraded or (options.rerank and self._reranker.loading)
+        candidates, degraded = await self._retrieve(
+            query, options.override(top_k=max(options.top_k, self._reranker.fetch_k)), mode, embedding
+        )
+        documents, fell_back = await self._reranker.rerank_with_fallback(
+            query, candidates, top_n=min(self._reranker.top_n, options.top_k)
+        )
+        return documents, degraded or fell_back
+
+    async def _retrieve(
+        self,
+        query: str,
+        options: RetrievalOptions,
+        mode: str,
+        embedding: Optional[List[float]] = None,
+    ) -> Tuple[List[dict], bool]:
+        # Snapshot the clients: a config reload may swap them while this query awaits
+        embedding_client, vector_store = (
+            (self._embedding_client, self._vector_store) if self._enabled else (None, None)
+        )
+        lexical_results: List[dict] = []
+        if mode != "vector" and self._lexical_enabled:
+            # BM25 scoring (and a reload of a changed index file) is CPU and disk work
+            lexical_results = await asyncio.to_thread(self._lexical_search, query, options.fetch_k)
+        if mode == "lexical" or embedding_client is None or vector_store is None:
+            return lexical_results[:options.top_k], False
+
+        if not embedding:
+            try:
+                embedding = await asyncio.wait_for(
+                    embedding_client.embed_query(query), timeout=self._embed_timeout
+                )
+            except Exception as exc:  # noqa: BLE001
+                if not lexical_results:
+                    raise
+                logger.warning(f"Embedding unavailable ({exc!r}), serving lexical results only")
+                return lexical_results[:options.top_k], True
+
+        # The index client blocks on HTTP; a thread lets concurrent queries overlap
+        vector_results = await asyncio.to_thread(search_documents, vector_store, embedding, options)
+        if not lexical_results:
+            return vector_results, False
+        return reciprocal_rank_fusion(
+            [vector_results, lexical_results[:options.top_k]],
+            key=lambda doc: doc.get("id") or doc.get("text", ""),
+            k=self._rrf_k,
+            limit=options.top_k,
+        ), False
+
+    @staticmethod
+    def _lexical_search(query: str, top_k: int) -> List[dict]:
+        results = get_lexical_index().search(query, top_k)
+        if not results:
+            return []
+        # Scale BM25 into [0, 1] so it can sit next to cosine scores downstream
+        best = results[0]["bm25_score"] or 1.0
+        return [{**doc, "score": doc["bm25_score"] / best} for doc in results]
 
     def trace(self, prompt: str, context: List[str]) -> None:
-        if not self._langsmith:
-            return
         metadata = {"prompt": prompt, "context_count": len(context)}
-        self._langsmith.create_run(
-            name="rag-context",
-            run_type="tool",
-            inputs=metadata,
-            project_name=self._project,
-        )
+        self._tracer.record(name="rag-context", run_type="tool", inputs=metadata)
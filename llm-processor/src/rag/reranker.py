@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..observability.metrics import record_cache, time_stage
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+
+def _doc_key(doc: Dict[str, Any]) -> str:
+    return doc.get("id") or hashlib.md5(doc.get("text", "").encode()).hexdigest()
+
+
+class CrossEncoderReranker:
+    """Optional CPU cross-encoder stage that reorders retrieved documents.
+
+    Scores are cached per (query, document id). Scoring runs in a worker
+    thread under a latency budget; when the budget runs out the caller gets
+    the documents in their original vector order. The model is loaded by
+    ``load()`` ahead of traffic; until it is, documents pass through unranked.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()["llm_processor"]["rag"].get("rerank", {})
+        self.enabled = cfg.get("enabled", False)
+        self.fetch_k = cfg.get("fetch_k", 20)
+        self.top_n = cfg.get("top_n", 3)
+        self._model_name = cfg.get("model", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+        self._backend = cfg.get("backend", "onnx")
+        self._batch_size = cfg.get("batch_size", 16)
+        self._max_length = cfg.get("max_length", 512)
+        self._latency_budget = cfg.get("latency_budget_ms", 300) / 1000.0
+        self._cache_size = cfg.get("cache_size", 4096)
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._model: Any = None
+        self._load_lock = threading.Lock()
+        self._load_failed = False
+        self.stats = {"hits": 0, "misses": 0, "fallbacks": 0}
+
+    @property
+    def available(self) -> bool:
+        """Enabled and loaded: a model still loading is never waited for on a request."""
+        return self.enabled and self._model is not None
+
+    @property
+    def loading(self) -> bool:
+        """Enabled, but the model is not loaded yet (and has not failed to load)."""
+        return self.enabled and self._model is None and not self._load_failed
+
+    def load(self) -> None:
+        """Load the cross-encoder if reranking is enabled (blocking; failures disable reranking)."""
+        if self.enabled:
+            self._get_model()
+
+    def _get_model(self) -> Any:
+        with self._load_lock:
+            if self._model is None and not self._load_failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+
+                    kwargs: Dict[str, Any] = {"device": "cpu", "max_length": self._max_length}
+                    if self._backend != "torch":
+                        kwargs["backend"] = self._backend
+                    self._model = CrossEncoder(self._model_name, **kwargs)
+                except Exception as exc:
+                    # sentence-transformers / onnxruntime not installed or model missing
+                    logger.warning(f"Reranker disabled, failed to load {self._model_name}: {exc}")
+                    self._load_failed = True
+            return self._model
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key: Tuple[str, str], score: float) -> None:
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _score_batches(self, query: str, pending: List[Tuple[str, str]], deadline: float) -> None:
+        model = self._model
+        if model is None:
+            return
+        for start in range(0, len(pending), self._batch_size):
+            if time.monotonic() > deadline:
+                return
+            batch = pending[start:start + self._batch_size]
+            scores = model.predict([(query, text) for _, text in batch], batch_size=self._batch_size)
+            for (key, _), score in zip(batch, scores):
+                self._cache_put((query, key), float(score))
+
+    async def rerank(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        top_n: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Reranked documents (see ``rerank_with_fallback``)."""
+        return (await self.rerank_with_fallback(query, documents, top_n))[0]
+
+    async def rerank_with_fallback(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        top_n: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Reorder ``documents`` by cross-encoder relevance and keep the best ``top_n``.
+
+        Args:
+            query: The search query
+            documents: Candidates in vector order
+            top_n: Documents to keep (defaults to ``rerank.top_n``)
+
+        Returns:
+            Top documents with a ``rerank_score``, or the first ``top_n`` in
+            vector order if scoring did not finish within the latency budget,
+            and whether that fallback happened
+        """
+        top_n = top_n or self.top_n
+        if not self.available or not documents:
+            return documents[:top_n], False
+
+        keys = [_doc_key(doc) for doc in documents]
+        pending = []
+        for key, doc in zip(keys, documents):
+            if self._cache_get((query, key)) is None:
+                pending.append((key, doc.get("text", "")))
+        self.stats["hits"] += len(documents) - len(pending)
+        self.stats["misses"] += len(pending)
+        record_cache("rerank", hits=len(documents) - len(pending), misses=len(pending))
+
+        if pending:
+            deadline = time.monotonic() + self._latency_budget
+            try:
+                # A batch still running past the budget lands in the cache for the next call
+                with time_stage("rerank"):
+                    await asyncio.wait_for(
+                        asyncio.to_thread(self._score_batches, query, pending, deadline),
+                        timeout=self._latency_budget,
+                    )
+            except asyncio.TimeoutError:
+                pass
+
+        scores = [self._cache_get((query, key)) for key in keys]
+        if any(score is None for score in scores):
+            self.stats["fallbacks"] += 1
+            return documents[:top_n], True
+
+        ranked = sorted(zip(scores, range(len(documents))), key=lambda item: item[0], reverse=True)
+        return [{**documents[idx], "rerank_score": score} for score, idx in ranked[:top_n]], False
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..settings import get_config
+
+if TYPE_CHECKING:
+    from .vector_store import PineconeVectorStore
+
+
+@dataclass
+class RetrievalOptions:
+    """Post-retrieval filtering and diversification settings."""
+
+    top_k: int = 5
+    fetch_k: int = 20  # candidates fetched from the vector store before selection
+    mmr: bool = True
+    lambda_mult: float = 0.5  # 1.0 = pure relevance, 0.0 = pure diversity
+    min_score: Optional[float] = None
+    max_per_source: Optional[int] = None
+    rerank: bool = False  # over-fetch and reorder with the cross-encoder
+
+    @classmethod
+    def from_config(cls) -> "RetrievalOptions":
+        rag_cfg = get_config()["llm_processor"]["rag"]
+        cfg = rag_cfg.get("retrieval", {})
+        top_k = rag_cfg["vector_db"]["top_k_results"]
+        return cls(
+            top_k=top_k,
+            fetch_k=max(cfg.get("fetch_k", top_k * 4), top_k),
+            mmr=cfg.get("mmr", True),
+            lambda_mult=cfg.get("lambda_mult", 0.5),
+            min_score=cfg.get("min_score"),
+            max_per_source=cfg.get("max_per_source"),
+            rerank=rag_cfg.get("rerank", {}).get("enabled", False),
+        )
+
+    def override(self, **changes: Any) -> "RetrievalOptions":
+        """Return a copy with the non-None ``changes`` applied."""
+        updated = replace(self, **{key: value for key, value in changes.items() if value is not None})
+        updated.fetch_k = max(updated.fetch_k, updated.top_k)
+        return updated
+
+
+def document_source(doc: Dict[str, Any]) -> str:
+    return doc.get("source_url") or doc.get("source") or "Unknown"
+
+
+def mmr_select(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+    groups: Optional[Sequence[str]] = None,
+    max_per_group: Optional[int] = None,
+) -> List[int]:
+    """
+    Pick ``k`` candidate indices by Maximal Marginal Relevance.
+
+    Similarities are computed once as matrix products over the normalized
+    embeddings; each step only updates the running max-similarity vector.
+
+    Args:
+        query_embedding: Query vector
+        candidate_embeddings: Candidate vectors, one row per document
+        k: Number of documents to select
+        lambda_mult: Trade-off between relevance and diversity
+        groups: Optional group key per candidate (e.g. source URL)
+        max_per_group: Cap on selections sharing a group key
+
+    Returns:
+        Selected candidate indices in selection order
+    """
+    if not len(candidate_embeddings) or k <= 0:
+        return []
+    matrix = np.asarray(candidate_embeddings, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    pairwise = matrix @ matrix.T
+    redundancy = np.zeros(len(matrix), dtype=np.float32)
+    available = np.ones(len(matrix), dtype=bool)
+    group_keys = np.asarray(groups, dtype=object) if groups is not None else None
+    group_counts: Dict[str, int] = {}
+    selected: List[int] = []
+
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        available[pick] = False
+        selected.append(pick)
+        redundancy = np.maximum(redundancy, pairwise[pick])
+        if group_keys is not None and max_per_group:
+            group = group_keys[pick]
+            group_counts[group] = group_counts.get(group, 0) + 1
+            if group_counts[group] >= max_per_group:
+                available &= group_keys != group
+    return selected
+
+
+def select_documents(
+    query_embedding: Sequence[float],
+    documents: List[Dict[str, Any]],
+    options: RetrievalOptions,
+    embeddings: Optional[Sequence[Sequence[float]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Apply the score cut-off, per-source caps and MMR to vector search results.
+
+    Args:
+        query_embedding: Query vector used for the search
+        documents: Metadata dicts from ``similarity_search`` (with ``score``)
+        options: Retrieval options
+        embeddings: Candidate vectors aligned with ``documents``; MMR is
+            skipped when they are not available
+
+    Returns:
+        The selected documents, at most ``options.top_k``
+    """
+    keep = [
+        idx for idx, doc in enumerate(documents)
+        if options.min_score is None or doc.get("score", 0.0) >= options.min_score
+    ]
+    if options.mmr and embeddings is not None and keep:
+        picks = mmr_select(
+            query_embedding,
+            [embeddings[idx] for idx in keep],
+            options.top_k,
+            options.lambda_mult,
+            groups=[document_source(documents[idx]) for idx in keep],
+            max_per_group=options.max_per_source,
+        )
+        return [documents[keep[pick]] for pick in picks]
+
+    selected: List[Dict[str, Any]] = []
+    per_source: Dict[str, int] = {}
+    for idx in keep:
+        source = document_source(documents[idx])
+        if options.max_per_source and per_source.get(source, 0) >= options.max_per_source:
+            continue
+        per_source[source] = per_source.get(source, 0) + 1
+        selected.append(documents[idx])
+        if len(selected) >= options.top_k:
+            break
+    return selected
+
+
+def search_documents(
+    vector_store: "PineconeVectorStore",
+    query_embedding: Sequence[float],
+    options: RetrievalOptions,
+) -> List[Dict[str, Any]]:
+    """Over-fetch ``fetch_k`` candidates and narrow them down with ``select_documents``."""
+    if options.mmr:
+        candidates, vectors = vector_store.similarity_search_with_vectors(query_embedding, options.fetch_k)
+        return select_documents(query_embedding, candidates, options, vectors)
+    candidates = vector_store.similarity_search(query_embedding, options.fetch_k)
+    return select_documents(query_embedding, candidates, options)
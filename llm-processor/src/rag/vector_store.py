@@ -1,13 +1,39 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Any, Dict, List, Sequence
-
-from pinecone import Pinecone
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from ..observability.metrics import time_stage
 from ..settings import get_config
 
 
+def document_id(doc: Dict[str, Any]) -> str:
+    """Stable vector ID for a chunk: its own 'id', else a hash of its text."""
+    return doc.get('id') or hashlib.md5(doc['text'].encode()).hexdigest()
+
+
+def build_upsert_vectors(
+    documents: List[Dict[str, Any]],
+    embeddings: List[List[float]],
+) -> List[Dict[str, Any]]:
+    """Pinecone upsert payload: one {'id', 'values', 'metadata'} record per document."""
+    vectors = []
+    for doc, embedding in zip(documents, embeddings):
+        # Generate stable ID from content if not provided
+        doc_id = document_id(doc)
+        
+        vectors.append({
+            'id': doc_id,
+            'values': embedding,
+            'metadata': {
+                'text': doc['text'][:1000],  # Pinecone metadata size limit
+                **doc.get('metadata', {})
+            }
+        })
+    return vectors
+
+
 class PineconeVectorStore:
     """Thin wrapper around Pinecone similarity search."""
 
@@ -15,19 +41,61 @@ class PineconeVectorStore:
         cfg = get_config()["llm_processor"]["rag"]["vector_db"]
         self._index_name = cfg["index_name"]
         self._top_k = cfg["top_k_results"]
-        self._client = Pinecone(api_key=cfg["api_key"], environment=cfg["environment"])
-        self._index = self._client.Index(self._index_name)
+        self._cfg = cfg
+        self._index: Any = None
+        self._connect_lock = threading.Lock()
+
+    def connect(self) -> Any:
+        """Import the SDK and open the index (slow: done on first use or by the startup task)."""
+        with self._connect_lock:
+            if self._index is None:
+                from pinecone import Pinecone
+
+                client = Pinecone(api_key=self._cfg["api_key"], environment=self._cfg["environment"])
+                # An explicit data-plane host skips the index lookup (also used to point at a local stand-in)
+                host = self._cfg.get("host")
+                self._index = client.Index(self._index_name, host=host) if host else client.Index(self._index_name)
+        return self._index
+
+    @property
+    def index(self) -> Any:
+        return self._index if self._index is not None else self.connect()
 
-    def similarity_search(self, embedding: Sequence[float]) -> List[dict]:
+    def similarity_search(self, embedding: Sequence[float], top_k: Optional[int] = None) -> List[dict]:
         """Retrieve top documents by vector similarity."""
-        results = self._index.query(vector=embedding, top_k=self._top_k, include_metadata=True)
+        with time_stage("vector_search", index=self._index_name, top_k=top_k or self._top_k):
+            results = self.index.query(vector=embedding, top_k=top_k or self._top_k, include_metadata=True)
         payload: List[dict] = []
         for match in results.matches:
             metadata = match.metadata or {}
             metadata["score"] = getattr(match, "score", 0.0)
+            metadata.setdefault("id", match.id)
             payload.append(metadata)
         return payload
 
+    def similarity_search_with_vectors(
+        self,
+        embedding: Sequence[float],
+        top_k: Optional[int] = None,
+    ) -> Tuple[List[dict], List[List[float]]]:
+        """Retrieve top documents along with their stored vectors (used for MMR)."""
+        with time_stage("vector_search", index=self._index_name, top_k=top_k or self._top_k):
+            results = self.index.query(
+                vector=embedding,
+                top_k=top_k or self._top_k,
+                include_metadata=True,
+                include_values=True,
+            )
+        payload: List[dict] = []
+        vectors: List[List[float]] = []
+        for match in results.matches:
+            metadata = match.metadata or {}
+            metadata["score"] = getattr(match, "score", 0.0)
+            metadata.setdefault("id", match.id)
+            payload.append(metadata)
+            vectors.append(list(match.values or []))
+        return payload, vectors
+
     async def upsert_documents(
         self,
         documents: List[Dict[str, Any]],
@@ -46,19 +114,7 @@ class PineconeVectorStore:
         if len(documents) != len(embeddings):
             raise ValueError(f"Mismatch: {len(documents)} docs vs {len(embeddings)} embeddings")
         
-        vectors = []
-        for doc, embedding in zip(documents, embeddings):
-            # Generate stable ID from content if not provided
-            doc_id = doc.get('id') or hashlib.md5(doc['text'].encode()).hexdigest()
-            
-            vectors.append({
-                'id': doc_id,
-                'values': embedding,
-                'metadata': {
-                    'text': doc['text'][:1000],  # Pinecone metadata size limit
-                    **doc.get('metadata', {})
-                }
-            })
+        vectors = build_upsert_vectors(documents, embeddings)
         
         # Batch upsert (Pinecone supports up to 100 vectors per request)
         batch_size = 100
@@ -66,7 +122,8 @@ class PineconeVectorStore:
         
         for i in range(0, len(vectors), batch_size):
             batch = vectors[i:i + batch_size]
-            self._index.upsert(vectors=batch)
+            with time_stage("vector_upsert", index=self._index_name, vectors=len(batch)):
+                self.index.upsert(vectors=batch)
             upserted_count += len(batch)
         
         return {
@@ -77,6 +134,6 @@ class PineconeVectorStore:
     def delete_by_source(self, source_url: str) -> None:
         """Delete all documents from a specific source URL."""
         # Pinecone supports filtering by metadata
-        self._index.delete(
+        self.index.delete(
             filter={'source_url': {'$eq': source_url}}
         )
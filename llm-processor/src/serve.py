@@ -0,0 +1,32 @@
+"""
+Run the LLM processor under uvicorn with ``llm_processor.workers.count`` processes.
+
+Usage:
+    python -m src.serve
+    python -m src.serve --workers 4 --port 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from .settings import get_config
+from .serving.workers import worker_count
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=get_config()["llm_processor"].get("port", 8000))
+    parser.add_argument("--workers", type=int, default=worker_count(), help="Worker processes (default from config)")
+    args = parser.parse_args()
+
+    # Workers share the listening socket; each imports src.main on its own, so the
+    # caches that matter live in the shared store and only one of them runs warm-up
+    uvicorn.run("src.main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
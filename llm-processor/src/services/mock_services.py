@@ -3,9 +3,11 @@ Mock services for demo/showcase purposes.
 These services provide realistic data when external services are unavailable.
 """
 import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 
+from ..rag.lexical_index import BM25Index
+
 class MockIndexerService:
     """Mock Helius Indexer for transaction history"""
     
@@ -144,57 +146,65 @@ class MockMarketDataService:
 class MockRAGService:
     """Mock RAG service when Pinecone is unavailable"""
     
-    @staticmethod
-    def search_documents(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    # Mock document database
+    DOCUMENTS = [
+        {
+            "text": "Solana is a high-performance blockchain supporting up to 65,000 transactions per second with sub-second finality. It uses Proof of History (PoH) combined with Proof of Stake (PoS) for consensus.",
+            "source": "https://solana.com/docs",
+            "title": "Solana Overview",
+            "relevance": 0.92
+        },
+        {
+            "text": "Jupiter is the key liquidity aggregator for Solana, offering the best token swap rates by routing through multiple DEXs. It supports limit orders, DCA, and perpetual trading.",
+            "source": "https://docs.jup.ag",
+            "title": "Jupiter Aggregator",
+            "relevance": 0.88
+        },
+        {
+            "text": "DeFi risk management involves monitoring smart contract audits, protocol TVL changes, impermanent loss in liquidity pools, and diversification across multiple protocols.",
+            "source": "https://station.jup.ag/docs",
+            "title": "DeFi Risk Management",
+            "relevance": 0.85
+        },
+        {
+            "text": "Liquid staking on Solana allows users to stake SOL while maintaining liquidity through derivative tokens like mSOL or JitoSOL, enabling participation in DeFi while earning staking rewards.",
+            "source": "https://docs.marinade.finance",
+            "title": "Liquid Staking",
+            "relevance": 0.82
+        },
+        {
+            "text": "Token swaps on Solana are optimized through aggregators that split orders across multiple liquidity sources. Best practices include checking slippage tolerance and using versioned transactions.",
+            "source": "https://docs.jup.ag/swap-api",
+            "title": "Swap Optimization",
+            "relevance": 0.78
+        }
+    ]
+    
+    _index: Optional[BM25Index] = None
+    
+    @classmethod
+    def _get_index(cls) -> BM25Index:
+        if cls._index is None:
+            cls._index = BM25Index()
+            cls._index.add_documents(
+                {"id": str(idx), "text": f"{doc['title']} {doc['text']}"}
+                for idx, doc in enumerate(cls.DOCUMENTS)
+            )
+        return cls._index
+    
+    @classmethod
+    def search_documents(cls, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Return mock relevant documents"""
         
-        # Mock document database
-        documents = [
-            {
-                "text": "Solana is a high-performance blockchain supporting up to 65,000 transactions per second with sub-second finality. It uses Proof of History (PoH) combined with Proof of Stake (PoS) for consensus.",
-                "source": "https://solana.com/docs",
-                "title": "Solana Overview",
-                "relevance": 0.92
-            },
-            {
-                "text": "Jupiter is the key liquidity aggregator for Solana, offering the best token swap rates by routing through multiple DEXs. It supports limit orders, DCA, and perpetual trading.",
-                "source": "https://docs.jup.ag",
-                "title": "Jupiter Aggregator",
-                "relevance": 0.88
-            },
-            {
-                "text": "DeFi risk management involves monitoring smart contract audits, protocol TVL changes, impermanent loss in liquidity pools, and diversification across multiple protocols.",
-                "source": "https://station.jup.ag/docs",
-                "title": "DeFi Risk Management",
-                "relevance": 0.85
-            },
-            {
-                "text": "Liquid staking on Solana allows users to stake SOL while maintaining liquidity through derivative tokens like mSOL or JitoSOL, enabling participation in DeFi while earning staking rewards.",
-                "source": "https://docs.marinade.finance",
-                "title": "Liquid Staking",
-                "relevance": 0.82
-            },
-            {
-                "text": "Token swaps on Solana are optimized through aggregators that split orders across multiple liquidity sources. Best practices include checking slippage tolerance and using versioned transactions.",
-                "source": "https://docs.jup.ag/swap-api",
-                "title": "Swap Optimization",
-                "relevance": 0.78
-            }
-        ]
-        
-        # Simple keyword matching to make it more realistic
-        query_lower = query.lower()
-        scored_docs = []
+        # Boost documents by their BM25 match against the query
+        matches = cls._get_index().search(query, top_k=len(cls.DOCUMENTS))
+        best = matches[0]["bm25_score"] if matches else 1.0
+        boosts = {int(match["id"]): 0.1 * match["bm25_score"] / best for match in matches}
         
-        for doc in documents:
-            score = doc["relevance"]
-            # Boost score if keywords match
-            keywords = ["defi", "risk", "swap", "stake", "jupiter", "solana", "trade"]
-            for keyword in keywords:
-                if keyword in query_lower and keyword in doc["text"].lower():
-                    score += 0.05
-            
-            scored_docs.append({**doc, "relevance": min(score, 0.99)})
+        scored_docs = [
+            {**doc, "relevance": round(min(doc["relevance"] + boosts.get(idx, 0.0), 0.99), 4)}
+            for idx, doc in enumerate(cls.DOCUMENTS)
+        ]
         
         # Sort by relevance and return top_k
         scored_docs.sort(key=lambda x: x["relevance"], reverse=True)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional
+
+from ..observability.metrics import ADMISSION_QUEUE, ADMISSION_REJECTED
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+# Lower value is served first when requests compete for the shared pool
+PRIORITY_CLASSES = {"interactive": 0, "standard": 1, "batch": 2}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is turned away instead of being queued."""
+
+    def __init__(self, reason: str, retry_after_s: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+    @property
+    def retry_after(self) -> str:
+        return str(max(1, math.ceil(self.retry_after_s)))
+
+
+@dataclass
+class EndpointPolicy:
+    route: str
+    concurrency: int
+    max_queue: int
+    priority: int
+    expected_service_s: float
+
+
+class _Waiter:
+    __slots__ = ("policy", "priority", "seq", "future")
+
+    def __init__(self, policy: EndpointPolicy, seq: int, future: asyncio.Future) -> None:
+        self.policy = policy
+        self.priority = policy.priority
+        self.seq = seq
+        self.future = future
+
+
+class AdmissionController:
+    """Per-endpoint concurrency limits with a shared, priority-ordered, deadline-aware wait queue.
+
+    Each configured endpoint gets its own concurrency cap and queue bound, and
+    all of them draw from one global pool. When a slot frees up, the waiter
+    with the best priority class (then FIFO) whose endpoint is under its cap
+    gets it. An arrival whose predicted queue wait plus service time would
+    overrun its deadline is rejected immediately with a Retry-After hint,
+    instead of waiting only to time out at the gateway.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()
+        admission_cfg = cfg["llm_processor"].get("admission", {})
+        self.enabled = admission_cfg.get("enabled", False)
+        self._max_concurrency = admission_cfg.get("max_concurrency", 32)
+        self._ewma_alpha = admission_cfg.get("ewma_alpha", 0.2)
+        gateway_timeout_ms = cfg["api_gateway"].get("llm_processor", {}).get("timeout_ms", 30000)
+        self.default_timeout_s = admission_cfg.get("timeout_ms", gateway_timeout_ms) / 1000.0
+        self._policies: Dict[str, EndpointPolicy] = {}
+        for route, endpoint_cfg in admission_cfg.get("endpoints", {}).items():
+            self._policies[route] = EndpointPolicy(
+                route=route,
+                concurrency=endpoint_cfg.get("concurrency", 8),
+                max_queue=endpoint_cfg.get("max_queue", 32),
+                priority=PRIORITY_CLASSES[endpoint_cfg.get("priority", "standard")],
+                expected_service_s=endpoint_cfg.get("expected_service_ms", 2000) / 1000.0,
+            )
+        self._service_time = {route: policy.expected_service_s for route, policy in self._policies.items()}
+        self._active: Dict[str, int] = {route: 0 for route in self._policies}
+        self._total_active = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def policy_for(self, route: str) -> Optional[EndpointPolicy]:
+        return self._policies.get(route) if self.enabled else None
+
+    def _has_capacity(self, policy: EndpointPolicy) -> bool:
+        return self._active[policy.route] < policy.concurrency and self._total_active < self._max_concurrency
+
+    def _waiting_ahead(self, policy: EndpointPolicy) -> bool:
+        """Whether a queued request of equal or better priority could take the next free slot.
+
+        Waiters held back only by their own endpoint cap do not count: a free slot
+        in the shared pool is no use to them.
+        """
+        return any(
+            waiter.priority <= policy.priority
+            and not waiter.future.done()
+            and self._active[waiter.policy.route] < waiter.policy.concurrency
+            for waiter in self._waiters
+        )
+
+    def _predicted_wait(self, policy: EndpointPolicy) -> float:
+        """Seconds until a new arrival would start, from the queue ahead of it and observed service times."""
+        ahead = [waiter for waiter in self._waiters if waiter.priority <= policy.priority]
+        if not ahead and self._has_capacity(policy):
+            return 0.0
+        same_route = sum(1 for waiter in ahead if waiter.policy.route == policy.route)
+        route_rounds = (same_route + 1) / policy.concurrency
+        pool_rounds = (len(ahead) + 1) / self._max_concurrency
+        return max(route_rounds, pool_rounds) * self._service_time[policy.route]
+
+    def _grant(self, policy: EndpointPolicy) -> None:
+        self._active[policy.route] += 1
+        self._total_active += 1
+
+    def _dispatch(self) -> None:
+        self._waiters.sort(key=lambda waiter: (waiter.priority, waiter.seq))
+        for waiter in list(self._waiters):
+            if self._total_active >= self._max_concurrency:
+                break
+            if waiter.future.done() or not self._has_capacity(waiter.policy):
+                continue
+            self._waiters.remove(waiter)
+            self._grant(waiter.policy)
+            waiter.future.set_result(None)
+            ADMISSION_QUEUE.dec(route=waiter.policy.route)
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            ADMISSION_QUEUE.dec(route=waiter.policy.route)
+
+    async def acquire(self, policy: EndpointPolicy, timeout_s: float) -> None:
+        """
+        Wait for a slot on ``policy.route`` or raise AdmissionRejected.
+
+        Args:
+            policy: The endpoint's policy
+            timeout_s: Time left before the caller gives up on the request
+        """
+        if self._has_capacity(policy) and not self._waiting_ahead(policy):
+            self._grant(policy)
+            return
+
+        queued = sum(1 for waiter in self._waiters if waiter.policy.route == policy.route)
+        wait = self._predicted_wait(policy)
+        if queued >= policy.max_queue:
+            ADMISSION_REJECTED.inc(route=policy.route, reason="queue_full")
+            raise AdmissionRejected("queue_full", wait)
+        if wait + self._service_time[policy.route] > timeout_s:
+            ADMISSION_REJECTED.inc(route=policy.route, reason="deadline")
+            raise AdmissionRejected("deadline", wait)
+
+        waiter = _Waiter(policy, next(self._seq), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE.inc(route=policy.route)
+        try:
+            # Leave time for the request to actually run once admitted
+            await asyncio.wait_for(
+                asyncio.shield(waiter.future),
+                timeout=max(timeout_s - self._service_time[policy.route], 0.0),
+            )
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                return  # granted just as the wait timed out
+            self._remove_waiter(waiter)
+            waiter.future.cancel()
+            ADMISSION_REJECTED.inc(route=policy.route, reason="deadline")
+            raise AdmissionRejected("deadline", self._predicted_wait(policy))
+        except asyncio.CancelledError:
+            # Client went away: give back a slot granted in the meantime
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(policy, None)
+            else:
+                self._remove_waiter(waiter)
+                waiter.future.cancel()
+            raise
+
+    def release(self, policy: EndpointPolicy, service_s: Optional[float]) -> None:
+        self._active[policy.route] -= 1
+        self._total_active -= 1
+        if service_s is not None:
+            previous = self._service_time[policy.route]
+            self._service_time[policy.route] = previous + self._ewma_alpha * (service_s - previous)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, route: str, timeout_s: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot for ``route`` for the duration of the block (no-op for unmanaged routes)."""
+        policy = self.policy_for(route)
+        if policy is None:
+            yield
+            return
+        await self.acquire(policy, timeout_s if timeout_s is not None else self.default_timeout_s)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(policy, time.monotonic() - start)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from ..observability.metrics import CONFIG_RELOADS
+from ..settings import changed_sections, config_path, get_config, publish_config, read_config
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigWatcher:
+    """
+    Polls SOLAI_CONFIG_PATH and publishes a new config snapshot when the file changes.
+
+    An invalid file is logged and ignored: the running snapshot stays in place
+    until a valid version is saved.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()["global"].get("config_reload", {})
+        self.enabled = cfg.get("enabled", False)
+        self._interval_s = cfg.get("poll_interval_s", 2.0)
+        self._path = config_path()
+        self._task: Optional[asyncio.Task] = None
+        self._last_seen = self._fingerprint()
+
+    def _fingerprint(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self._path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_if_changed(self) -> Optional[Dict[str, Any]]:
+        """Read, validate and diff the file if it changed (blocking, runs in a worker thread)."""
+        fingerprint = self._fingerprint()
+        if fingerprint is None or fingerprint == self._last_seen:
+            return None
+        self._last_seen = fingerprint
+        try:
+            new = read_config()
+        except Exception as exc:  # noqa: BLE001
+            CONFIG_RELOADS.inc(result="invalid")
+            logger.error(f"Ignoring config change in {self._path}: {exc}")
+            return None
+        if not changed_sections(get_config(), new):
+            CONFIG_RELOADS.inc(result="unchanged")
+            return None
+        return new
+
+    def _publish(self, new: Dict[str, Any]) -> None:
+        """Swap in the validated snapshot and run the subscribers (on the event loop)."""
+        changed = publish_config(new, validate=False)
+        CONFIG_RELOADS.inc(result="applied" if changed else "unchanged")
+        if changed:
+            logger.info(f"Config reloaded, changed: {', '.join(changed)}")
+
+    def check(self) -> None:
+        """Reload if the file changed since the last check (outside a running event loop)."""
+        new = self._read_if_changed()
+        if new is not None:
+            self._publish(new)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._interval_s)
+            # File I/O, validation and the diff run in a thread; subscribers swap live
+            # components, so they run on the loop, between handler steps
+            new = await asyncio.to_thread(self._read_if_changed)
+            if new is not None:
+                loop.call_soon(self._publish, new)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
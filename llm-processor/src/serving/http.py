@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import Dict
+
+import httpx
+
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per upstream and event loop (pooled connections cannot cross loops)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Shared keep-alive client for the ``name`` upstream (pass per-request timeouts to its calls)."""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(name)
+    if client is None or client.is_closed:
+        cfg = get_config()["llm_processor"].get("http_pool", {})
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=cfg.get("max_connections", 100),
+                max_keepalive_connections=cfg.get("max_keepalive_connections", 20),
+                keepalive_expiry=cfg.get("keepalive_expiry_s", 30.0),
+            ),
+            timeout=cfg.get("default_timeout_s", 30.0),
+        )
+        clients[name] = client
+    return client
+
+
+async def prewarm_connections(name: str, url: str, connections: int, timeout_s: float = 10.0) -> int:
+    """
+    Open ``connections`` keep-alive connections (TCP + TLS) to ``url`` in the ``name`` pool.
+
+    Any HTTP response counts: only the handshake matters. Returns the number of connections opened.
+    """
+    client = get_http_client(name)
+
+    async def touch() -> bool:
+        try:
+            await client.head(url, timeout=timeout_s)
+            return True
+        except httpx.HTTPError as exc:
+            logger.debug(f"Pre-warming {name} connection to {url} failed: {exc!r}")
+            return False
+
+    results = await asyncio.gather(*(touch() for _ in range(connections)))
+    return sum(results)
+
+
+async def close_http_clients() -> None:
+    """Close the pooled clients of the running loop (application shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(client.aclose() for client in clients.values()), return_exceptions=True)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+from ..observability.metrics import RETRIES
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+_CONNECT_ERRORS = ("ConnectError", "ConnectTimeout", "PoolTimeout", "RemoteProtocolError", "ConnectionError")
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("solai_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's remaining time budget is too small to make (or retry) an outbound call."""
+
+
+@contextmanager
+def deadline_scope(timeout_s: Optional[float]) -> Iterator[None]:
+    """Bound everything inside the block by ``timeout_s`` (never extends an outer deadline)."""
+    if timeout_s is None:
+        yield
+        return
+    deadline = time.monotonic() + timeout_s
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_s() -> Optional[float]:
+    """Seconds left before the current deadline, or None outside a deadline scope."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify(exc: BaseException) -> Optional[str]:
+    """Retry reason for a transient failure (``429``, ``5xx``, ``connect``), or None if it should not be retried."""
+    status = _status_code(exc)
+    if status is not None:
+        if status == 429:
+            return "429"
+        return "5xx" if status in _RETRYABLE_STATUS else None
+    if any(name in type(exc).__name__ for name in _CONNECT_ERRORS):
+        return "connect"
+    return None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    name: str
+    max_attempts: int = 3
+    base_delay_s: float = 0.2
+    max_delay_s: float = 2.0
+    timeout_s: float = 30.0
+    min_timeout_s: float = 0.25
+
+    def timeout(self) -> float:
+        """Per-attempt timeout: the client default, shrunk to what is left of the request deadline."""
+        remaining = remaining_s()
+        if remaining is None:
+            return self.timeout_s
+        if remaining < self.min_timeout_s:
+            raise DeadlineExceeded(f"{self.name}: {max(remaining, 0.0) * 1000:.0f}ms left of the request budget")
+        return min(self.timeout_s, remaining)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+        return random.uniform(0.0, min(self.max_delay_s, self.base_delay_s * (2 ** (attempt - 1))))
+
+    async def call(self, operation: Callable[[float], Awaitable[T]]) -> T:
+        """
+        Run ``operation(timeout_s)`` and retry transient failures with jittered backoff.
+
+        A retry is skipped (the last error is raised) when the backoff would not
+        leave at least ``min_timeout_s`` of the request deadline for the next attempt.
+        """
+        attempt = 1
+        while True:
+            timeout = self.timeout()
+            try:
+                return await asyncio.wait_for(operation(timeout), timeout=timeout)
+            except asyncio.TimeoutError as exc:
+                # A slow attempt is not retried: it already used the time a retry would need
+                remaining = remaining_s()
+                if remaining is not None and remaining < self.min_timeout_s:
+                    raise DeadlineExceeded(f"{self.name}: request budget spent") from exc
+                raise
+            except Exception as exc:  # noqa: BLE001
+                reason = classify(exc)
+                if reason is None or attempt >= self.max_attempts:
+                    raise
+                delay = max(self.backoff(attempt), _retry_after(exc) or 0.0)
+                remaining = remaining_s()
+                if remaining is not None and remaining - delay < self.min_timeout_s:
+                    raise
+            RETRIES.inc(client=self.name, reason=reason)
+            logger.info(f"{self.name}: retry {attempt}/{self.max_attempts - 1} after {reason} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+@lru_cache(maxsize=None)
+def get_retry_policy(name: str, timeout_s: float = 30.0) -> RetryPolicy:
+    """Retry policy for an outbound client, from ``llm_processor.resilience`` with per-client overrides."""
+    cfg = get_config()["llm_processor"].get("resilience", {})
+    client_cfg = {**cfg, **cfg.get("clients", {}).get(name, {})}
+    enabled = cfg.get("enabled", True)
+    return RetryPolicy(
+        name=name,
+        max_attempts=client_cfg.get("max_attempts", 3) if enabled else 1,
+        base_delay_s=client_cfg.get("base_delay_ms", 200) / 1000.0,
+        max_delay_s=client_cfg.get("max_delay_ms", 2000) / 1000.0,
+        timeout_s=client_cfg.get("timeout_ms", timeout_s * 1000) / 1000.0,
+        min_timeout_s=client_cfg.get("min_timeout_ms", 250) / 1000.0,
+    )
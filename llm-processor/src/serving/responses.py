@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any, List, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..settings import get_config
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON (orjson when installed)."""
+    if isinstance(content, BaseModel):
+        # pydantic-core serializes straight to bytes, without a dict round trip or re-validation
+        return type(content).__pydantic_serializer__.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, or pydantic-core for models.
+
+    Returned from a handler, it bypasses FastAPI's response_model pass (model ->
+    dict -> validate -> jsonable_encoder), which re-checks data the handler just
+    built from validated models. Keep ``response_model`` on the route for the
+    OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class CompressionMiddleware:
+    """
+    Compress complete responses above ``minimum_size`` with brotli or gzip.
+
+    Only responses that declare a Content-Length (complete bodies) are compressed.
+    Their body may still arrive in several messages, e.g. re-streamed by an
+    ``@app.middleware("http")`` layer, so it is buffered up to its declared length.
+    Streamed responses (NDJSON batch results) have no Content-Length and pass
+    through untouched, so each line still reaches the client as it is produced.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        cfg = get_config()["llm_processor"].get("responses", {}).get("compression", {})
+        self.app = app
+        self.enabled = cfg.get("enabled", False)
+        self.minimum_size = cfg.get("minimum_size", 1024)
+        self.gzip_level = cfg.get("gzip_level", 5)
+        self.brotli_quality = cfg.get("brotli_quality", 4)
+
+    def _encoding(self, scope: Scope) -> Optional[str]:
+        accepted = {
+            item.split(";")[0].strip()
+            for item in Headers(scope=scope).get("accept-encoding", "").lower().split(",")
+        }
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self._encoding(scope) if self.enabled and scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                length = headers.get("content-length")
+                if (
+                    length is None
+                    or int(length) < self.minimum_size
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(_COMPRESSIBLE_TYPES)
+                ):
+                    await send(message)
+                else:
+                    # Hold the headers until the whole body is in
+                    start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            pending, start = start, None
+            body = self._compress(b"".join(chunks), encoding)
+            chunks.clear()
+            headers = MutableHeaders(raw=pending["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(pending)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
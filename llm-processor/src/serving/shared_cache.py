@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from ..observability.metrics import record_cache
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_STATE_DIR = Path(__file__).parent.parent.parent / "data"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS cache (
+        namespace TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS cache_expiry ON cache (namespace, expires_at)",
+)
+
+_writer: Optional[ThreadPoolExecutor] = None
+_writer_pid = 0
+_writer_lock = threading.Lock()
+
+
+def _write_executor() -> ThreadPoolExecutor:
+    """One writer thread per process: writes queue up there instead of blocking the event loop."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache-writer")
+            _writer_pid = os.getpid()
+        return _writer
+
+
+def state_dir() -> Path:
+    """Directory for state shared by the worker processes of one host (cache DB, startup lock)."""
+    cfg = get_config()["llm_processor"].get("workers", {})
+    path = Path(cfg.get("state_dir") or _DEFAULT_STATE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class SharedCache:
+    """
+    Key/value cache shared by every worker process on the host, stored in one SQLite file.
+
+    Values are JSON and expire after the namespace TTL. SQLite runs in WAL mode, so
+    readers never block on the writer; lookups are small indexed reads served from the
+    OS page cache and are done inline rather than through a thread hop. Writes can wait
+    on other workers' write locks, so they go through a per-process writer thread.
+    """
+
+    def __init__(self, namespace: str, ttl_s: Optional[float] = None) -> None:
+        cfg = get_config()["llm_processor"].get("workers", {}).get("shared_cache", {})
+        self.namespace = namespace
+        self.enabled = cfg.get("enabled", True)
+        self._ttl_s = ttl_s if ttl_s is not None else cfg.get("ttl_s", {}).get(namespace, 600)
+        self._max_entries = cfg.get("max_entries", 50000)
+        self._path = Path(cfg.get("path") or state_dir() / "shared_cache.sqlite3")
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections belong to one thread; a forked child must not reuse the parent's
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, self._hash(key), time.time()),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning(f"Shared cache {self.namespace} read failed: {exc!r}")
+            row = None
+        record_cache(self.namespace, hits=int(row is not None), misses=int(row is None))
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        """Queue the write on the writer thread and return at once (lock waits and eviction happen there)."""
+        if not self.enabled:
+            return
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        _write_executor().submit(self._write, self._hash(key), encoded, time.time() + self._ttl_s)
+
+    def _write(self, hashed_key: str, encoded: str, expires_at: float) -> None:
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, hashed_key, encoded, expires_at),
+            )
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._evict(conn)
+        except sqlite3.Error as exc:
+            logger.warning(f"Shared cache {self.namespace} write failed: {exc!r}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries, then the soonest-expiring ones beyond ``max_entries``."""
+        conn.execute("DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time()))
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self._max_entries),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_shared_cache(namespace: str) -> SharedCache:
+    return SharedCache(namespace)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from ..observability.metrics import SINGLE_FLIGHT
+from ..settings import get_config
+from .resilience import DeadlineExceeded, remaining_s
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query, for flight and cache keys."""
+    return " ".join(text.lower().split())
+
+
+def flight_key(*parts: Any) -> str:
+    return json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution (per worker process).
+
+    The first caller (the leader) starts the work as a task; callers arriving while
+    it runs await that task and receive the same result or exception. The task is
+    shielded, so a caller that disconnects or times out does not cancel it for the
+    others. It inherits the leader's deadline; each follower still stops waiting at
+    its own. Results are shared objects and must be treated as read-only.
+    """
+
+    def __init__(self, name: str) -> None:
+        cfg = get_config()["llm_processor"].get("single_flight", {})
+        self.name = name
+        self.enabled = cfg.get("enabled", True) and name not in cfg.get("disabled", [])
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    def join(self, key: str) -> "Optional[asyncio.Future[Any]]":
+        """The task already running for ``key``, if any."""
+        task = self._flights.get(key) if self.enabled else None
+        if task is not None:
+            SINGLE_FLIGHT.inc(flight=self.name, role="shared")
+        return task
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+        """The running task for ``key``, or a new one running ``fn()``."""
+        task = self.join(key)
+        if task is not None:
+            return task
+        task = asyncio.ensure_future(fn())
+        if self.enabled:
+            SINGLE_FLIGHT.inc(flight=self.name, role="leader")
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the exception retrieved: every waiter may have given up already
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single flight {self.name} failed: {task.exception()!r}")
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn()``, or join the identical call already in flight."""
+        if not self.enabled:
+            return await fn()
+        return await self.wait(self.start(key, fn))
+
+    @staticmethod
+    async def wait(task: "asyncio.Future[T]") -> T:
+        """Await a shared task without cancelling it, bounded by the caller's deadline."""
+        timeout: Optional[float] = remaining_s()
+        if timeout is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=max(timeout, 0.0))
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            raise DeadlineExceeded("Deadline passed while waiting for an identical in-flight call") from None
+
+
+@lru_cache(maxsize=None)
+def get_single_flight(name: str) -> SingleFlight:
+    return SingleFlight(name)
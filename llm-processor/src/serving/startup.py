@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..settings import get_config
+
+logger = logging.getLogger(__name__)
+
+StartupStep = Callable[[], Awaitable[Any]]
+
+
+class StartupState:
+    """
+    Readiness of the process, tracked separately from liveness.
+
+    The process is live as soon as it serves HTTP. It becomes ready once the
+    startup steps (SDK imports, client connections, workflow compilation) have
+    run, whether or not each of them succeeded: a failed step is reported, and
+    the component it was meant to prepare initializes on first use instead.
+    """
+
+    def __init__(self) -> None:
+        cfg = get_config()["llm_processor"].get("startup", {})
+        self.deferred = cfg.get("deferred_init", True)
+        self._timeout_s = cfg.get("init_timeout_s", 60.0)
+        self._started = time.monotonic()
+        self.ready = False
+        self.ready_after_s: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    async def _run_step(self, name: str, step: StartupStep) -> None:
+        start = time.perf_counter()
+        self.steps[name] = {"status": "running"}
+        try:
+            await asyncio.wait_for(step(), timeout=self._timeout_s)
+            self.steps[name] = {"status": "ok"}
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Startup step {name} failed: {exc!r}")
+            self.steps[name] = {"status": "failed", "error": repr(exc)}
+        self.steps[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def run(self, steps: Dict[str, StartupStep]) -> None:
+        """Run all steps concurrently, then mark the process ready."""
+        await asyncio.gather(*(self._run_step(name, step) for name, step in steps.items()))
+        self.ready = True
+        self.ready_after_s = round(time.monotonic() - self._started, 3)
+        failed = [name for name, step in self.steps.items() if step["status"] != "ok"]
+        logger.info(f"Ready after {self.ready_after_s}s" + (f" (failed: {', '.join(failed)})" if failed else ""))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "starting",
+            "ready_after_s": self.ready_after_s,
+            "steps": self.steps,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_startup_state() -> StartupState:
+    return StartupState()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import IO, Optional
+
+from ..settings import get_config
+from .shared_cache import state_dir
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every worker behaves as the leader
+    fcntl = None
+
+
+def worker_count() -> int:
+    return max(1, int(get_config()["llm_processor"].get("workers", {}).get("count", 1)))
+
+
+class LeaderLock:
+    """
+    Elects one worker process per host to run the shared startup work.
+
+    The leader holds an exclusive flock on ``<state_dir>/startup.lock`` for its whole
+    lifetime. The kernel releases it when the process exits, so a worker respawned
+    after the leader crashed takes over on its next startup.
+    """
+
+    def __init__(self) -> None:
+        self._fh: Optional[IO[str]] = None
+        self.is_leader = self._acquire()
+
+    def _acquire(self) -> bool:
+        # Always contend for the lock: the configured count says nothing about
+        # ``--workers`` on the command line or uvicorn started directly
+        if fcntl is None:
+            return True
+        path = state_dir() / "startup.lock"
+        fh = path.open("a+")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            logger.info(f"Worker {os.getpid()} is a follower, skipping shared warm-up")
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._fh = fh
+        logger.info(f"Worker {os.getpid()} elected startup leader")
+        return True
+
+    def mark_warmed(self) -> None:
+        """Leader only: record that the shared warm-up has finished (successfully or not)."""
+        if self._fh is None:
+            return
+        marker = state_dir() / "warmed"
+        tmp_path = marker.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(str(os.getpid()))
+        os.replace(tmp_path, marker)
+
+    @staticmethod
+    def _leader_warmed() -> bool:
+        # The marker must name the current lock holder: one left by an earlier leader does not count
+        try:
+            leader_pid = (state_dir() / "startup.lock").read_text().strip()
+            if not leader_pid or (state_dir() / "warmed").read_text().strip() != leader_pid:
+                return False
+            os.kill(int(leader_pid), 0)  # a previous run's leader (and its marker) is gone
+        except (OSError, ValueError):
+            return False
+        return True
+
+    async def wait_until_warmed(self, poll_s: float = 0.25) -> None:
+        """Follower startup step: return once the leader has written its warmed marker."""
+        while not await asyncio.to_thread(self._leader_warmed):
+            await asyncio.sleep(poll_s)
+
+    def release(self) -> None:
+        if self._fh is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+
+@lru_cache(maxsize=1)
+def get_leader_lock() -> LeaderLock:
+    return LeaderLock()
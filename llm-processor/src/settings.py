@@ -1,27 +1,205 @@
 from __future__ import annotations
 
+import logging
 import os
-from functools import lru_cache
+import threading
+import weakref
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 
 import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+logger = logging.getLogger(__name__)
 
 _ROOT_CONFIG_FALLBACK = Path(__file__).parent.parent.parent / "config.yml"
 
 
-def _load_raw_config() -> Dict[str, Any]:
-    config_path = Path(os.environ.get("SOLAI_CONFIG_PATH", _ROOT_CONFIG_FALLBACK))
-    if not config_path.exists():
-        raise FileNotFoundError(f"Config file not found at {config_path}")
-    with config_path.open("r", encoding="utf-8") as fh:
-        data = yaml.safe_load(fh)
+class _Section(BaseModel):
+    # Only the keys below are checked; everything else passes through untouched
+    model_config = ConfigDict(extra="allow")
+
+
+class _GeminiSchema(_Section):
+    api_key: str
+    model_name: str
+    temperature: float = Field(ge=0.0, le=2.0)
+    max_output_tokens: int = Field(gt=0)
+
+
+class _CerebrasSchema(_Section):
+    api_key: str
+    model_name: str
+    endpoint_url: str
+
+
+class _OllamaSchema(_Section):
+    base_url: str
+    model: str
+
+
+class _VectorDbSchema(_Section):
+    api_key: str
+    environment: str
+    index_name: str
+    top_k_results: int = Field(gt=0)
+
+
+class _RagSchema(_Section):
+    enabled: bool = False
+    vector_db: _VectorDbSchema
+
+
+class _FirecrawlSchema(_Section):
+    api_key: str
+    mode: Literal["crawl", "scrape"]
+    max_crawl_depth: int = Field(ge=0)
+    source_urls: List[str]
+
+
+class _ContextGenerationSchema(_Section):
+    max_transaction_history: int = Field(gt=0)
+
+
+class _LlmProcessorSchema(_Section):
+    provider: Literal["CEREBRAS", "GEMINI"]
+    gemini: _GeminiSchema
+    cerebras: _CerebrasSchema
+    ollama_embedding: _OllamaSchema
+    rag: _RagSchema
+    firecrawl: _FirecrawlSchema
+    context_generation: _ContextGenerationSchema
+
+
+class _ConfigSchema(_Section):
+    global_: Dict[str, Any] = Field(alias="global")
+    api_gateway: Dict[str, Any]
+    llm_processor: _LlmProcessorSchema
+
+
+def config_path() -> Path:
+    return Path(os.environ.get("SOLAI_CONFIG_PATH", _ROOT_CONFIG_FALLBACK))
+
+
+def validate_config(data: Any) -> Dict[str, Any]:
+    """Check a parsed config against the typed schema; returns it unchanged or raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError("Config must be a mapping")
     provider = data.get("llm_processor", {}).get("provider")
     if provider not in ("CEREBRAS", "GEMINI"):
         raise ValueError("llm_processor.provider must be either CEREBRAS or GEMINI")
+    try:
+        _ConfigSchema.model_validate(data)
+    except ValidationError as exc:
+        raise ValueError(f"Invalid config: {exc}") from exc
     return data
 
 
-@lru_cache(maxsize=1)
+def _load_raw_config() -> Dict[str, Any]:
+    path = config_path()
+    if not path.exists():
+        raise FileNotFoundError(f"Config file not found at {path}")
+    with path.open("r", encoding="utf-8") as fh:
+        data = yaml.safe_load(fh)
+    return validate_config(data)
+
+
+# The current snapshot. Snapshots are never mutated after publication: a reload
+# swaps in a whole new dict, so readers always see one consistent version.
+_snapshot: Optional[Dict[str, Any]] = None
+_lock = threading.Lock()
+_subscribers: List[Tuple[str, Any]] = []
+
+
 def get_config() -> Dict[str, Any]:
+    global _snapshot
+    if _snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = _load_raw_config()
+    return _snapshot
+
+
+def config_section(cfg: Dict[str, Any], section: str) -> Any:
+    """Value at a dotted path (e.g. ``llm_processor.rag``), or None if absent."""
+    value: Any = cfg
+    for key in section.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def subscribe(section: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+    """
+    Call ``callback(new_config)`` after a reload that changes ``section`` (dotted path).
+
+    Bound methods are held weakly, so subscribing does not keep a component alive.
+    """
+    ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+    with _lock:
+        _subscribers.append((section, ref))
+
+
+def changed_sections(old: Dict[str, Any], new: Dict[str, Any], depth: int = 2) -> List[str]:
+    """Dotted paths (up to ``depth`` levels) whose values differ between two configs."""
+    changed: List[str] = []
+
+    def walk(a: Any, b: Any, prefix: str, level: int) -> None:
+        if a == b:
+            return
+        if level >= depth or not isinstance(a, dict) or not isinstance(b, dict):
+            changed.append(prefix)
+            return
+        for key in sorted(set(a) | set(b), key=str):
+            walk(a.get(key), b.get(key), f"{prefix}.{key}" if prefix else str(key), level + 1)
+
+    walk(old, new, "", 0)
+    return changed
+
+
+def publish_config(new: Dict[str, Any], validate: bool = True) -> List[str]:
+    """
+    Validate ``new``, make it the current snapshot and notify subscribers of changed sections.
+
+    Subscribers swap live components, so call this from the event loop thread
+    (as ConfigWatcher does), never from a worker thread while handlers run.
+
+    Returns:
+        The changed section paths (empty if nothing changed)
+    """
+    global _snapshot
+    if validate:
+        validate_config(new)
+    with _lock:
+        old = _snapshot
+        _snapshot = new
+        subscribers = list(_subscribers)
+    if old is None:
+        return []
+    changed = changed_sections(old, new)
+    if not changed:
+        return []
+    for section, ref in subscribers:
+        callback = ref()
+        if callback is None:
+            continue
+        if config_section(old, section) != config_section(new, section):
+            try:
+                callback(new)
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Config subscriber for {section} failed: {exc!r}")
+    with _lock:
+        # Drop subscribers whose components were garbage collected
+        _subscribers[:] = [entry for entry in _subscribers if entry[1]() is not None]
+    return changed
+
+
+def read_config() -> Dict[str, Any]:
+    """Read and validate SOLAI_CONFIG_PATH without publishing it (blocking; raises if invalid)."""
     return _load_raw_config()
+
+
+def reload_config() -> List[str]:
+    """Re-read SOLAI_CONFIG_PATH and publish it (raises and keeps the old snapshot if invalid)."""
+    return publish_config(_load_raw_config())
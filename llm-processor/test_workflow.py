@@ -21,6 +21,7 @@ async def test_workflow():
         "rag_sources": [],
         "crawl_response": None,
         "crawl_url": None,
+        "retrieval_options": {},
         "final_response": "",
         "sources": [],
         "confidence": 0.0,